@@ -0,0 +1,41 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import AnomalyScanState, AttendanceAnomaly, SessionEditRequest
+
+
+@admin.register(AttendanceAnomaly)
+class AttendanceAnomalyAdmin(admin.ModelAdmin):
+    list_display = ("kind", "employee", "work_date", "session", "related_session", "status", "detected_at")
+    list_filter = ("status", "kind", "work_date")
+    search_fields = ("employee__username", "employee__employee_code")
+    raw_id_fields = ("employee", "session", "related_session", "reviewed_by")
+    readonly_fields = ("detected_at", "reviewed_by", "reviewed_at")
+    list_select_related = ("employee",)
+    actions = ("confirm", "dismiss")
+
+    def _review(self, request, queryset, status):
+        queryset.update(status=status, reviewed_by=request.user, reviewed_at=timezone.now())
+
+    @admin.action(description="Confirm selected anomalies")
+    def confirm(self, request, queryset):
+        self._review(request, queryset, AttendanceAnomaly.CONFIRMED)
+
+    @admin.action(description="Dismiss selected anomalies")
+    def dismiss(self, request, queryset):
+        self._review(request, queryset, AttendanceAnomaly.DISMISSED)
+
+
+@admin.register(AnomalyScanState)
+class AnomalyScanStateAdmin(admin.ModelAdmin):
+    list_display = ("name", "last_updated_at", "last_session_id", "last_run_at", "sessions_scanned", "anomalies_found")
+    readonly_fields = ("last_run_at", "sessions_scanned", "anomalies_found")
+
+
+@admin.register(SessionEditRequest)
+class SessionEditRequestAdmin(admin.ModelAdmin):
+    list_display = ("employee", "department", "session", "clock_in_at", "clock_out_at", "status", "created_at")
+    list_filter = ("status", "department")
+    search_fields = ("employee__username", "employee__employee_code")
+    raw_id_fields = ("employee", "session", "reviewed_by")
+    readonly_fields = ("created_at", "reviewed_by", "reviewed_at")
@@ -0,0 +1,305 @@
+"""
+Batch scan of work sessions for suspicious patterns.
+
+Sessions are read in chunks ordered by (updated_at, id), starting after the
+high-water mark stored in AnomalyScanState, so each run only reads sessions
+written since the previous one (served by the ``attendance_ws_updated_id``
+index). Sessions written in the last ``LAG_SECONDS`` are left for the next
+run: a transaction can commit after a later one and its rows would
+otherwise fall behind the mark.
+
+Each chunk goes through the detectors listed in ``DETECTORS``. A detector
+gets the whole chunk once (``prepare``, for any context it needs in one
+query) and then each session (``detect``), and returns unsaved
+AttendanceAnomaly rows. Findings and the new mark are written in one
+transaction per chunk; a session scanned again does not produce
+duplicates.
+
+Configure with::
+
+    ATTENDANCE_ANOMALIES = {
+        "DETECTORS": [...],  # dotted paths of Detector subclasses
+        "CHUNK_SIZE": 2000,
+        "LAG_SECONDS": 300,
+        "LONG_SESSION_HOURS": 20,
+        "CLAMPED_SESSION_REPEATS": 3,
+        "CLAMPED_SESSION_WINDOW_DAYS": 7,
+        # Department code -> allowed clock-in sources; "*" for departments
+        # not listed. Empty: any source is expected.
+        "EXPECTED_SOURCES": {},
+    }
+"""
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from functools import reduce
+from operator import or_
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .bucketing import lookback_days
+from .models import AnomalyScanState, AttendanceAnomaly, WorkSession
+
+DEFAULT_SCAN = "default"
+
+DEFAULTS = {
+    "DETECTORS": [
+        "apps.attendance.anomalies.LongSessionDetector",
+        "apps.attendance.anomalies.ClampedSessionDetector",
+        "apps.attendance.anomalies.OverlapDetector",
+        "apps.attendance.anomalies.UnexpectedSourceDetector",
+    ],
+    "CHUNK_SIZE": 2000,
+    "LAG_SECONDS": 300,
+    "LONG_SESSION_HOURS": 20,
+    "CLAMPED_SESSION_REPEATS": 3,
+    "CLAMPED_SESSION_WINDOW_DAYS": 7,
+    "EXPECTED_SOURCES": {},
+}
+
+# Session columns handed to detectors, as dicts.
+FIELDS = (
+    "id",
+    "employee_id",
+    "employee__department__code",
+    "clock_in_at",
+    "clock_out_at",
+    "clock_in_source",
+    "clock_out_source",
+    "is_manual_edit",
+    "total_work_duration",
+    "work_date",
+    "updated_at",
+)
+
+# clock_out raises a clock-out at or before the clock-in to clock-in + 1s.
+CLAMPED_DURATION = timedelta(seconds=1)
+
+
+def _config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "ATTENDANCE_ANOMALIES", {})}
+
+
+def _finding(kind: str, session: dict, related: Optional[int] = None, **details) -> AttendanceAnomaly:
+    return AttendanceAnomaly(
+        kind=kind,
+        employee_id=session["employee_id"],
+        session_id=session["id"],
+        related_session_id=related,
+        work_date=session["work_date"],
+        details=details,
+    )
+
+
+class Detector:
+    """
+    Base class for anomaly detectors. ``kind`` is stored on each finding.
+    """
+    kind = ""
+
+    def __init__(self, config: dict):
+        self.config = config
+
+    def prepare(self, sessions: list[dict]) -> None:
+        """Load context for a chunk before ``detect`` is called on its sessions."""
+
+    def detect(self, session: dict) -> Iterable[AttendanceAnomaly]:
+        raise NotImplementedError
+
+
+class LongSessionDetector(Detector):
+    """Closed sessions of at least ``LONG_SESSION_HOURS``."""
+    kind = "long_session"
+
+    def detect(self, session):
+        limit = timedelta(hours=self.config["LONG_SESSION_HOURS"])
+        if session["clock_out_at"] is not None and session["total_work_duration"] >= limit:
+            yield _finding(
+                self.kind,
+                session,
+                hours=round(session["total_work_duration"].total_seconds() / 3600, 2),
+                clock_out_source=session["clock_out_source"],
+            )
+
+
+class ClampedSessionDetector(Detector):
+    """
+    One-second sessions, left by a clock-out at or before the clock-in, when
+    the employee has at least ``CLAMPED_SESSION_REPEATS`` of them within
+    ``CLAMPED_SESSION_WINDOW_DAYS``.
+    """
+    kind = "repeated_clamped_session"
+
+    def prepare(self, sessions):
+        clamped = [s for s in sessions if s["total_work_duration"] == CLAMPED_DURATION]
+        self.dates = defaultdict(list)
+        if not clamped:
+            return
+
+        window = timedelta(days=self.config["CLAMPED_SESSION_WINDOW_DAYS"])
+        rows = (
+            WorkSession.objects
+            .filter(
+                employee_id__in={s["employee_id"] for s in clamped},
+                work_date__gte=min(s["work_date"] for s in clamped) - window,
+                work_date__lte=max(s["work_date"] for s in clamped) + window,
+                total_work_duration=CLAMPED_DURATION,
+            )
+            .order_by()
+            .values_list("employee_id", "work_date")
+        )
+        for employee_id, work_date in rows:
+            self.dates[employee_id].append(work_date)
+
+    def detect(self, session):
+        if session["total_work_duration"] != CLAMPED_DURATION:
+            return
+        window = timedelta(days=self.config["CLAMPED_SESSION_WINDOW_DAYS"])
+        nearby = sum(
+            1 for work_date in self.dates[session["employee_id"]]
+            if abs(work_date - session["work_date"]) <= window
+        )
+        if nearby >= self.config["CLAMPED_SESSION_REPEATS"]:
+            yield _finding(self.kind, session, sessions_in_window=nearby)
+
+
+class OverlapDetector(Detector):
+    """
+    Closed sessions overlapping another session of the same employee,
+    typically left by manual edits. Each pair is reported once, on the
+    session with the higher id.
+    """
+    kind = "overlap"
+
+    def prepare(self, sessions):
+        closed = [s for s in sessions if s["clock_out_at"] is not None]
+        self.others = defaultdict(list)
+        if not closed:
+            return
+
+        dates = defaultdict(list)
+        for s in closed:
+            dates[s["employee_id"]].append(s["work_date"])
+
+        # Sessions overlapping one that started on day d started between
+        # d - lookback_days() and the last day it covers.
+        lookback = timedelta(days=lookback_days())
+        rows = (
+            WorkSession.objects
+            .filter(reduce(or_, (
+                Q(employee_id=employee_id, work_date__gte=min(days) - lookback, work_date__lte=max(days) + lookback)
+                for employee_id, days in dates.items()
+            )))
+            .order_by()
+            .values_list("id", "employee_id", "work_date", "clock_in_at", "clock_out_at", "is_manual_edit")
+        )
+        for row in rows:
+            self.others[row[1]].append(row)
+
+    def detect(self, session):
+        if session["clock_out_at"] is None:
+            return
+        for other_id, _, work_date, clock_in_at, clock_out_at, is_manual_edit in self.others[session["employee_id"]]:
+            if other_id == session["id"]:
+                continue
+            other_end = clock_out_at or datetime.max.replace(tzinfo=clock_in_at.tzinfo)
+            if clock_in_at >= session["clock_out_at"] or other_end <= session["clock_in_at"]:
+                continue
+
+            overlap = min(session["clock_out_at"], other_end) - max(session["clock_in_at"], clock_in_at)
+            details = {
+                "overlap_seconds": int(overlap.total_seconds()),
+                "manual_edit": session["is_manual_edit"] or is_manual_edit,
+            }
+            if session["id"] > other_id:
+                yield _finding(self.kind, session, related=other_id, **details)
+            else:
+                other = {"id": other_id, "employee_id": session["employee_id"], "work_date": work_date}
+                yield _finding(self.kind, other, related=session["id"], **details)
+
+
+class UnexpectedSourceDetector(Detector):
+    """Clock-ins from a source not allowed for the employee's department."""
+    kind = "unexpected_source"
+
+    def detect(self, session):
+        expected = self.config["EXPECTED_SOURCES"]
+        allowed = expected.get(session["employee__department__code"], expected.get("*"))
+        if allowed is not None and session["clock_in_source"] not in allowed:
+            yield _finding(self.kind, session, source=session["clock_in_source"], expected=list(allowed))
+
+
+def detectors(config: Optional[dict] = None) -> list[Detector]:
+    config = config or _config()
+    return [import_string(path)(config) for path in config["DETECTORS"]]
+
+
+def _after(state: AnomalyScanState) -> Q:
+    if state.last_updated_at is None:
+        return Q()
+    return Q(updated_at__gt=state.last_updated_at) | Q(
+        updated_at=state.last_updated_at, id__gt=state.last_session_id
+    )
+
+
+def scan(name: str = DEFAULT_SCAN, chunk_size: Optional[int] = None) -> Iterator[dict]:
+    """
+    Scan sessions written since the last run of scan ``name``.
+
+    Yields ``{"scanned": n, "found": n, "seconds": s}`` after each chunk.
+    """
+    config = _config()
+    chunk_size = chunk_size or config["CHUNK_SIZE"]
+    active = detectors(config)
+    cutoff = timezone.now() - timedelta(seconds=config["LAG_SECONDS"])
+
+    state, _ = AnomalyScanState.objects.get_or_create(name=name)
+
+    while True:
+        started = time.monotonic()
+        sessions = list(
+            WorkSession.objects
+            .filter(_after(state), updated_at__lte=cutoff)
+            .order_by("updated_at", "id")
+            .values(*FIELDS)[:chunk_size]
+        )
+        if not sessions:
+            state.last_run_at = timezone.now()
+            state.save(update_fields=["last_run_at"])
+            return
+
+        findings = []
+        for detector in active:
+            detector.prepare(sessions)
+            for session in sessions:
+                findings.extend(detector.detect(session))
+
+        last = sessions[-1]
+        state.last_updated_at = last["updated_at"]
+        state.last_session_id = last["id"]
+        state.sessions_scanned += len(sessions)
+        state.anomalies_found += len(findings)
+        with transaction.atomic():
+            AttendanceAnomaly.objects.bulk_create(findings, ignore_conflicts=True)
+            state.save()
+
+        yield {"scanned": len(sessions), "found": len(findings), "seconds": time.monotonic() - started}
+
+
+def reset(name: str = DEFAULT_SCAN) -> None:
+    """Forget the high-water mark so the next scan starts from the beginning."""
+    AnomalyScanState.objects.filter(name=name).update(last_updated_at=None, last_session_id=0)
+
+
+def counts_by_kind(status: str = AttendanceAnomaly.OPEN) -> dict[str, int]:
+    return dict(
+        AttendanceAnomaly.objects.filter(status=status)
+        .values_list("kind")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
@@ -0,0 +1,240 @@
+"""
+Archive tier for closed work sessions.
+
+WorkSession holds the hot window: open sessions and everything from the
+first day of the month ``settings.ATTENDANCE_HOT_MONTHS`` months ago. Older
+closed sessions are moved, in batches, to WorkSessionArchive
+(``archive_sessions``). On PostgreSQL the archive is range-partitioned by
+month, so a month is exported to a gzipped CSV and dropped as one
+partition (``export_month``/``drop_month``).
+
+Reads of recent days touch only WorkSession; ``session_sources`` adds the
+archive for reads that reach back before the hot window (summary and
+overtime rebuilds of old periods, the hours matrix), and the sessions
+export reads both tables too. The per-employee session history API
+(WorkSessionViewSet) only serves the hot window.
+"""
+import gzip
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from apps.attendance.exports import SESSIONS, ExportSpec, stream_csv
+from apps.attendance.models import WorkSession, WorkSessionArchive
+
+DEFAULT_HOT_MONTHS = 13
+
+# Sessions moved per transaction.
+ARCHIVE_BATCH_SIZE = 5000
+
+# Same columns as the sessions export, minus employee_code: the join would
+# drop sessions of employees that have since been deleted.
+ARCHIVE = ExportSpec(
+    WorkSessionArchive,
+    [column for column in SESSIONS.columns if column[0] != "employee_code"],
+    date_field="work_date",
+)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def hot_start(today: Optional[date] = None) -> date:
+    """First work_date kept in WorkSession; older closed sessions are archived."""
+    months = getattr(settings, "ATTENDANCE_HOT_MONTHS", DEFAULT_HOT_MONTHS)
+    return add_months(month_start(today or timezone.localdate()), -months)
+
+
+def session_sources(since: Optional[date]) -> list:
+    """
+    Managers holding sessions with ``work_date >= since`` (None: all time).
+    """
+    if since is not None and since >= hot_start():
+        return [WorkSession.objects]
+    return [WorkSession.objects, WorkSessionArchive.objects]
+
+
+def is_partitioned() -> bool:
+    return connection.vendor == "postgresql"
+
+
+def partition_name(month: date) -> str:
+    return f"{WorkSessionArchive._meta.db_table}_y{month.year}m{month.month:02d}"
+
+
+def _partitions() -> set[str]:
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT child.relname
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = %s
+            """,
+            [WorkSessionArchive._meta.db_table],
+        )
+        return {name for name, in cursor.fetchall()}
+
+
+def ensure_partitions(months: Iterable[date]) -> list[str]:
+    """
+    Create the monthly archive partitions that do not exist yet. Returns
+    the names created (always empty when the table is not partitioned).
+    """
+    if not is_partitioned():
+        return []
+
+    existing = _partitions()
+    quote = connection.ops.quote_name
+    created = []
+    for month in sorted({month_start(m) for m in months}):
+        name = partition_name(month)
+        if name in existing:
+            continue
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE {} PARTITION OF {} FOR VALUES FROM ('{}') TO ('{}')".format(
+                    quote(name),
+                    quote(WorkSessionArchive._meta.db_table),
+                    month.isoformat(),
+                    add_months(month, 1).isoformat(),
+                )
+            )
+        created.append(name)
+    return created
+
+
+# Columns copied to the archive. They must match the archive table created
+# in migration 0007: a column added to WorkSession is only archived once it
+# is added to both.
+ARCHIVED_COLUMNS = (
+    "id",
+    "employee_id",
+    "clock_in_at",
+    "clock_out_at",
+    "clock_in_source",
+    "clock_out_source",
+    "is_manual_edit",
+    "manual_edit_reason",
+    "approved_by_id",
+    "approved_at",
+    "total_work_duration",
+    "is_overtime",
+    "work_date",
+    "created_at",
+    "updated_at",
+)
+
+
+def _copy_sql(count: int) -> str:
+    quote = connection.ops.quote_name
+    columns = ", ".join(quote(column) for column in ARCHIVED_COLUMNS)
+    return "INSERT INTO {archive} ({columns}, {archived_at}) SELECT {columns}, %s FROM {hot} WHERE {pk} IN ({ids})".format(
+        archive=quote(WorkSessionArchive._meta.db_table),
+        hot=quote(WorkSession._meta.db_table),
+        columns=columns,
+        archived_at=quote("archived_at"),
+        pk=quote(WorkSession._meta.pk.column),
+        ids=", ".join(["%s"] * count),
+    )
+
+
+def archive_sessions(before: Optional[date] = None, batch_size: int = ARCHIVE_BATCH_SIZE) -> Iterator[dict]:
+    """
+    Move closed sessions with ``work_date < before`` (default: the hot
+    window start) into the archive, ``batch_size`` per transaction.
+
+    Yields ``{"archived": n, "seconds": s}`` after each batch. Day
+    summaries and rollups are kept; clock events lose their session link.
+    """
+    before = before or hot_start()
+    known_months: set[date] = set()
+
+    while True:
+        started = time.monotonic()
+        with transaction.atomic():
+            rows = list(
+                WorkSession.objects
+                .filter(work_date__lt=before, clock_out_at__isnull=False)
+                .order_by()
+                .values_list("pk", "work_date")[:batch_size]
+            )
+            if not rows:
+                return
+
+            months = {month_start(work_date) for _, work_date in rows} - known_months
+            ensure_partitions(months)
+            known_months |= months
+
+            ids = [pk for pk, _ in rows]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    _copy_sql(len(ids)),
+                    [connection.ops.adapt_datetimefield_value(timezone.now()), *ids],
+                )
+            WorkSession.objects.filter(pk__in=ids).delete()
+
+        yield {"archived": len(ids), "seconds": time.monotonic() - started}
+
+
+def archived_months(before: date) -> list[date]:
+    """Months with archived sessions that end before ``before``."""
+    return [
+        month for month in WorkSessionArchive.objects.filter(work_date__lt=before).dates("work_date", "month")
+        if add_months(month, 1) <= before
+    ]
+
+
+def export_month(month: date, directory: Path) -> tuple[Path, int]:
+    """
+    Write one archived month to ``<directory>/<partition>.csv.gz``.
+    Returns the path and the number of sessions written.
+    """
+    path = Path(directory) / f"{partition_name(month)}.csv.gz"
+    counted = 0
+
+    def rows():
+        nonlocal counted
+        for row in ARCHIVE.rows(start=month, end=add_months(month, 1) - timedelta(days=1)):
+            counted += 1
+            yield row
+
+    with gzip.open(path, "wt", newline="") as out:
+        for chunk in stream_csv(ARCHIVE, rows()):
+            out.write(chunk)
+    return path, counted
+
+
+def drop_month(month: date) -> None:
+    """
+    Remove one archived month: detach and drop its partition on
+    PostgreSQL, delete its rows elsewhere.
+    """
+    leftovers = WorkSessionArchive.objects.filter(work_date__gte=month, work_date__lt=add_months(month, 1))
+    if not is_partitioned():
+        leftovers.delete()
+        return
+
+    name = partition_name(month)
+    quote = connection.ops.quote_name
+    with transaction.atomic():
+        if name in _partitions():
+            with connection.cursor() as cursor:
+                cursor.execute("ALTER TABLE {} DETACH PARTITION {}".format(
+                    quote(WorkSessionArchive._meta.db_table), quote(name)
+                ))
+                cursor.execute("DROP TABLE {}".format(quote(name)))
+        # Rows that landed in the default partition.
+        leftovers.delete()
@@ -0,0 +1,198 @@
+"""
+Assignment of work time to local calendar days.
+
+A session's ``work_date`` is the date of its clock-in in the employee's
+timezone (``Employee.timezone``). Its duration is credited to the local
+days it actually covers: a 22:00–06:00 shift adds two hours to the first
+day and six to the next.
+
+``split_by_local_day`` splits one session. ``bucket_sessions`` does the
+same for a stream of sessions: the UTC instants of local midnight are
+computed once per timezone, and each session is then cut at those
+instants by bisection, with no per-session timezone conversion.
+"""
+import bisect
+import math
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from functools import lru_cache
+from time import monotonic
+from typing import Iterable, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.conf import settings
+from django.db.models import Max
+
+# Used when settings.ATTENDANCE_MAX_SESSION_DURATION is not set.
+DEFAULT_MAX_SESSION_DURATION = timedelta(hours=16)
+
+# Seconds lookback_days() is cached for.
+LOOKBACK_CACHE_SECONDS = 60
+
+ZERO = timedelta(0)
+
+_lookback: tuple[float, int] = (0.0, 0)
+
+
+@lru_cache(maxsize=256)
+def zone(name: Optional[str]) -> ZoneInfo:
+    """
+    ZoneInfo for a timezone name, cached per name. Unknown or blank names
+    fall back to UTC.
+    """
+    try:
+        return ZoneInfo(name or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def local_work_date(when: datetime, tz_name: Optional[str]) -> date:
+    """The date of an aware datetime in the given timezone."""
+    return when.astimezone(zone(tz_name)).date()
+
+
+def lookback_days() -> int:
+    """
+    Days a session can run past the local day it started on, so rebuilds
+    of a date range read sessions with work_date this far before it.
+
+    Derived from the longest session close_stale_sessions lets run
+    (``ATTENDANCE_MAX_SESSION_DURATION`` or any department's or role's
+    ``max_session_duration``) in whole days, plus one day for DST changes
+    and sessions closed some time after their limit.
+    """
+    global _lookback
+    checked_at, days = _lookback
+    now = monotonic()
+    if now - checked_at < LOOKBACK_CACHE_SECONDS:
+        return days
+
+    from apps.users.models import Department, Role
+
+    longest = max(
+        [
+            getattr(settings, "ATTENDANCE_MAX_SESSION_DURATION", DEFAULT_MAX_SESSION_DURATION),
+            *(
+                model.objects.aggregate(longest=Max("max_session_duration"))["longest"]
+                for model in (Department, Role)
+            ),
+        ],
+        key=lambda duration: duration or ZERO,
+    )
+    days = math.ceil(longest / timedelta(days=1)) + 1
+    _lookback = (now, days)
+    return days
+
+
+def lookback_start(day: date) -> date:
+    """Earliest work_date of a session that can contribute to ``day``."""
+    return day - timedelta(days=lookback_days())
+
+
+@lru_cache(maxsize=4096)
+def _local_midnight(tz_name: Optional[str], day: date) -> datetime:
+    return datetime.combine(day, time(), tzinfo=zone(tz_name)).astimezone(dt_timezone.utc)
+
+
+def midnights(tz_name: Optional[str], first: datetime, last: datetime) -> tuple[list[datetime], list[date]]:
+    """
+    UTC instants at which each local day from ``first`` to ``last`` begins,
+    plus the following midnight, and the matching local dates.
+    """
+    day = local_work_date(first, tz_name)
+    last_day = local_work_date(last, tz_name)
+    instants, days = [], []
+    while day <= last_day + timedelta(days=1):
+        instants.append(_local_midnight(tz_name, day))
+        days.append(day)
+        day += timedelta(days=1)
+    return instants, days
+
+
+def split(start: datetime, end: datetime, instants: list[datetime], days: list[date]):
+    """
+    Yield ``(local_date, duration)`` pieces of [start, end) cut at
+    ``instants``, as returned by ``midnights`` for a range covering it.
+    """
+    index = bisect.bisect_right(instants, start) - 1
+    cursor = start
+    while cursor < end:
+        piece_end = min(end, instants[index + 1])
+        yield days[index], piece_end - cursor
+        cursor = piece_end
+        index += 1
+
+
+def split_by_local_day(start: datetime, end: datetime, tz_name: Optional[str]) -> list[tuple[date, timedelta]]:
+    """
+    Split the interval [start, end) at local midnights.
+
+    Returns ``[(local_date, duration), ...]`` in date order.
+    """
+    if end <= start:
+        return [(local_work_date(start, tz_name), ZERO)]
+    instants, days = midnights(tz_name, start, end)
+    return list(split(start, end, instants, days))
+
+
+def session_days(session, tz_name: Optional[str]) -> list[date]:
+    """
+    Local days a WorkSession touches: its work_date, plus every later day
+    it covers once closed.
+    """
+    if session.clock_out_at is None:
+        return [session.work_date]
+    days = [day for day, _ in split_by_local_day(session.clock_in_at, session.clock_out_at, tz_name)]
+    return sorted({session.work_date, *days})
+
+
+def _utc_midnight(day: date) -> datetime:
+    return datetime.combine(day, time(), tzinfo=dt_timezone.utc)
+
+
+def bucket_sessions(
+    rows: Iterable[tuple[int, Optional[str], datetime, datetime]],
+    first_day: Optional[date] = None,
+    last_day: Optional[date] = None,
+) -> dict[tuple[int, date], timedelta]:
+    """
+    Total closed session time per (employee_id, local date).
+
+    ``rows`` yields ``(employee_id, tz_name, clock_in_at, clock_out_at)``.
+    Days outside [first_day, last_day] are dropped when bounds are given.
+
+    Rows are added to the totals as they arrive, so memory is bounded by
+    the totals rather than the number of sessions. Midnights are computed
+    for a timezone when its first session arrives and extended when a
+    later one falls outside them.
+    """
+    # Pieces before the first or after the last of these instants fall
+    # outside [first_day, last_day] in every timezone, so sessions are
+    # clipped to them.
+    floor = _utc_midnight(first_day - timedelta(days=1)) if first_day is not None else None
+    ceiling = _utc_midnight(last_day + timedelta(days=2)) if last_day is not None else None
+
+    totals: dict[tuple[int, date], timedelta] = defaultdict(timedelta)
+    spans: dict[Optional[str], tuple[list[datetime], list[date]]] = {}
+    for employee_id, tz_name, start, end in rows:
+        if end is None:
+            continue
+        if floor is not None:
+            start = max(start, floor)
+        if ceiling is not None:
+            end = min(end, ceiling)
+        if end <= start:
+            continue
+
+        span = spans.get(tz_name)
+        if span is None:
+            span = spans[tz_name] = midnights(tz_name, start, end)
+        elif start < span[0][0] or end > span[0][-1]:
+            span = spans[tz_name] = midnights(tz_name, min(start, span[0][0]), max(end, span[0][-1]))
+        instants, days = span
+
+        for day, duration in split(start, end, instants, days):
+            if (first_day is None or day >= first_day) and (last_day is None or day <= last_day):
+                totals[(employee_id, day)] += duration
+
+    return dict(totals)
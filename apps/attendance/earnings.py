@@ -0,0 +1,195 @@
+"""
+Base earnings per employee-day, stored in AttendanceDaySummary.total_earnings.
+
+Per pay type:
+
+- HOURLY: worked hours × pay_rate.
+- DAILY: pay_rate for a day with worked time.
+- MONTHLY: pay_rate ÷ days in the month for each paid day (worked, on
+  leave or holiday). Days without a summary row earn nothing here.
+
+Overtime premiums are computed separately (apps.overtime).
+
+Summaries are read in chunks joined to the employee's pay data with one
+``values_list`` query, computed in memory, and written back with
+``bulk_update``. Clock-outs and other summary writes do not compute
+earnings: they set ``earnings_stale`` on the rows they change, as do pay
+changes (``pay_changed``), and ``recompute_stale`` (run periodically by
+``compute_earnings --stale``) brings those rows up to date. Earnings
+totals therefore lag worked time by up to one run. ``recompute`` covers
+whole date ranges.
+"""
+import calendar
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+
+from apps.attendance.models import AttendanceDaySummary
+
+EARNINGS_BATCH_SIZE = 2000
+
+_CENTS = Decimal("0.01")
+_ZERO = Decimal("0.00")
+_SECONDS_PER_HOUR = Decimal(3600)
+
+# Statuses paid to salaried employees without worked time.
+PAID_ABSENCES = {"ON_LEAVE", "HOLIDAY"}
+
+_COLUMNS = (
+    "pk",
+    "employee_id",
+    "work_date",
+    "total_work_duration",
+    "status",
+    "total_earnings",
+    "employee__pay_type",
+    "employee__pay_rate",
+)
+
+
+def day_earnings(pay_type: str, pay_rate: Decimal, work_date: date, worked: timedelta, status: str) -> Decimal:
+    """Base earnings for one employee-day."""
+    if pay_type == "HOURLY":
+        seconds = Decimal(int(worked.total_seconds()))
+        return (seconds * pay_rate / _SECONDS_PER_HOUR).quantize(_CENTS, rounding=ROUND_HALF_UP)
+    if pay_type == "DAILY":
+        return pay_rate if worked > timedelta(0) else _ZERO
+    if pay_type == "MONTHLY":
+        if worked <= timedelta(0) and status not in PAID_ABSENCES:
+            return _ZERO
+        days = calendar.monthrange(work_date.year, work_date.month)[1]
+        return (pay_rate / days).quantize(_CENTS, rounding=ROUND_HALF_UP)
+    return _ZERO
+
+
+def _apply(summaries, keys: Optional[set[tuple[int, date]]] = None) -> int:
+    """
+    Recompute earnings for a summary queryset chunk by chunk, skipping
+    rows not in ``keys`` when given; returns the number of rows written.
+    """
+    rows = summaries.order_by().values_list(*_COLUMNS).iterator(chunk_size=EARNINGS_BATCH_SIZE)
+
+    written = 0
+    changed: list[AttendanceDaySummary] = []
+    for pk, employee_id, work_date, worked, status, current, pay_type, pay_rate in rows:
+        if keys is not None and (employee_id, work_date) not in keys:
+            continue
+        earned = day_earnings(pay_type, pay_rate, work_date, worked, status)
+        if earned != current:
+            changed.append(AttendanceDaySummary(pk=pk, total_earnings=earned))
+        if len(changed) >= EARNINGS_BATCH_SIZE:
+            written += _write(changed)
+            changed = []
+    return written + _write(changed)
+
+
+def _write(changed: list[AttendanceDaySummary]) -> int:
+    if changed:
+        with transaction.atomic():
+            AttendanceDaySummary.objects.bulk_update(changed, ["total_earnings"], batch_size=EARNINGS_BATCH_SIZE)
+    return len(changed)
+
+
+def mark_stale(employee_ids: Iterable[int], start: Optional[date] = None) -> int:
+    """Flag the employees' summaries from ``start`` on for ``recompute_stale``."""
+    summaries = AttendanceDaySummary.objects.filter(employee_id__in=list(employee_ids), earnings_stale=False)
+    if start is not None:
+        summaries = summaries.filter(work_date__gte=start)
+    return summaries.update(earnings_stale=True)
+
+
+def recompute_stale(batch_size: int = EARNINGS_BATCH_SIZE) -> int:
+    """
+    Recompute earnings of the summaries flagged ``earnings_stale`` and clear
+    the flag, ``batch_size`` rows per transaction. Returns the rows done.
+
+    Each batch is locked while it is computed, so a summary written
+    meanwhile waits and is flagged again by its own write; rows locked by
+    another run are skipped.
+    """
+    done = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                AttendanceDaySummary.objects
+                .select_for_update(skip_locked=True, of=("self",))
+                .filter(earnings_stale=True)
+                .order_by()
+                .values_list(*_COLUMNS)[:batch_size]
+            )
+            if not rows:
+                return done
+            AttendanceDaySummary.objects.bulk_update(
+                [
+                    AttendanceDaySummary(
+                        pk=pk,
+                        total_earnings=day_earnings(pay_type, pay_rate, work_date, worked, status),
+                        earnings_stale=False,
+                    )
+                    for pk, _, work_date, worked, status, _, pay_type, pay_rate in rows
+                ],
+                ["total_earnings", "earnings_stale"],
+                batch_size=batch_size,
+            )
+        done += len(rows)
+
+
+def recompute(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    employee_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Recompute earnings for every summary in the (inclusive) date range,
+    optionally limited to some employees. Returns the rows changed.
+    """
+    summaries = AttendanceDaySummary.objects.all()
+    if start is not None:
+        summaries = summaries.filter(work_date__gte=start)
+    if end is not None:
+        summaries = summaries.filter(work_date__lte=end)
+    if employee_ids is not None:
+        summaries = summaries.filter(employee_id__in=list(employee_ids))
+    return _apply(summaries)
+
+
+def recompute_for(keys: Iterable[tuple[int, date]]) -> int:
+    """Recompute earnings for the given (employee_id, work_date) pairs."""
+    keys = set(keys)
+    if not keys:
+        return 0
+    summaries = AttendanceDaySummary.objects.filter(
+        employee_id__in={employee_id for employee_id, _ in keys},
+        work_date__gte=min(work_date for _, work_date in keys),
+        work_date__lte=max(work_date for _, work_date in keys),
+    )
+    # The range may cover days that were not asked for; _apply skips them.
+    return _apply(summaries, keys)
+
+
+def totals(
+    start: date,
+    end: date,
+    department_id: Optional[int] = None,
+    using: Optional[str] = None,
+) -> list[dict]:
+    """
+    Earnings per department and day in [start, end], from one grouped
+    query over the summaries.
+    """
+    summaries = AttendanceDaySummary.objects.using(using) if using else AttendanceDaySummary.objects.all()
+    summaries = summaries.filter(work_date__gte=start, work_date__lte=end)
+    if department_id is not None:
+        summaries = summaries.filter(employee__department_id=department_id)
+    return list(
+        summaries
+        .values("employee__department_id", "employee__department__name", "work_date")
+        .annotate(
+            employees=Count("employee_id", filter=Q(total_earnings__gt=0)),
+            total_earnings=Sum("total_earnings"),
+        )
+        .order_by("work_date", "employee__department_id")
+    )
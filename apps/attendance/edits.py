@@ -0,0 +1,201 @@
+"""
+Session edit requests: employees submit corrections, managers approve or
+reject them in batches. Nobody reviews their own requests.
+
+A batch is reviewed in one transaction. Approved requests are applied with
+one ``bulk_update`` of the edited sessions and one ``bulk_create`` of the
+added ones; the day summaries they touch (before and after the edit) are
+then rebuilt once per (employee, day), however many requests fall on it.
+``sessions_edited`` is sent with those keys in the same transaction; the
+overtime app queues a recalculation of the periods they fall in
+(apps.overtime.signals), so the review request does not run it.
+"""
+from datetime import date
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.attendance import bucketing, events, services
+from apps.attendance.models import SessionEditRequest, WorkSession
+from apps.users.models import Employee
+
+# Requests accepted in one review call.
+MAX_REVIEW_BATCH = 1000
+
+# Role names whose holders review their own department's requests.
+MANAGER_ROLES = {"MANAGER", "HR_ADMIN"}
+
+_SESSION_FIELDS = [
+    "clock_in_at",
+    "clock_out_at",
+    "clock_out_source",
+    "total_work_duration",
+    "work_date",
+    "is_manual_edit",
+    "manual_edit_reason",
+    "approved_by",
+    "approved_at",
+    "updated_at",
+]
+
+
+def is_manager(employee: Employee) -> bool:
+    return employee.is_staff or (employee.role is not None and employee.role.name in MANAGER_ROLES)
+
+
+def reviewable(reviewer: Employee):
+    """
+    Edit requests ``reviewer`` may review: all of them for staff, their
+    own department's otherwise, never their own.
+    """
+    requests = SessionEditRequest.objects.exclude(employee=reviewer)
+    if reviewer.is_staff:
+        return requests
+    if reviewer.department_id is None:
+        return requests.none()
+    return requests.filter(department_id=reviewer.department_id)
+
+
+def pending(reviewer: Employee, department_id: Optional[int] = None):
+    """Pending requests for ``reviewer``, oldest first."""
+    requests = reviewable(reviewer).filter(status=SessionEditRequest.PENDING)
+    if department_id is not None:
+        requests = requests.filter(department_id=department_id)
+    return requests.order_by("created_at", "id")
+
+
+def overlapping(employee: Employee, clock_in_at, clock_out_at, exclude: Optional[WorkSession] = None):
+    """``employee``'s sessions overlapping [clock_in_at, clock_out_at), open ones included."""
+    sessions = WorkSession.objects.filter(employee=employee, clock_in_at__lt=clock_out_at).filter(
+        Q(clock_out_at__gt=clock_in_at) | Q(clock_out_at__isnull=True)
+    )
+    if exclude is not None:
+        sessions = sessions.exclude(pk=exclude.pk)
+    return sessions
+
+
+def submit(
+    employee: Employee,
+    clock_in_at,
+    clock_out_at,
+    reason: str,
+    session: Optional[WorkSession] = None,
+) -> SessionEditRequest:
+    return SessionEditRequest.objects.create(
+        employee=employee,
+        department_id=employee.department_id,
+        session=session,
+        clock_in_at=clock_in_at,
+        clock_out_at=clock_out_at,
+        reason=reason,
+    )
+
+
+def _days(employee_id: int, tz_name: str, clock_in_at, clock_out_at, work_date: date) -> set:
+    days = {day for day, _ in bucketing.split_by_local_day(clock_in_at, clock_out_at, tz_name)}
+    return {(employee_id, day) for day in days | {work_date}}
+
+
+def _apply(requests: list[SessionEditRequest], reviewer: Employee, now) -> tuple[set, list[int]]:
+    """
+    Apply approved requests to their sessions. Returns the (employee_id,
+    work_date) keys touched and the ids of requests whose session is gone.
+    """
+    sessions = WorkSession.objects.in_bulk(
+        [request.session_id for request in requests if request.session_id]
+    )
+    timezones = dict(
+        Employee.objects
+        .filter(pk__in={request.employee_id for request in requests})
+        .values_list("pk", "timezone")
+    )
+
+    keys = set()
+    missing = []
+    edited = {}
+    added = []
+    for request in requests:
+        tz_name = timezones[request.employee_id]
+        if request.session_id:
+            session = sessions.get(request.session_id)
+            if session is None or session.clock_out_at is None:
+                missing.append(request.pk)
+                continue
+            # Days the session counted towards before the edit.
+            keys |= _days(session.employee_id, tz_name, session.clock_in_at, session.clock_out_at, session.work_date)
+            edited[session.pk] = session
+        else:
+            session = WorkSession(employee_id=request.employee_id, clock_in_source="WEB")
+            added.append(session)
+
+        session.clock_in_at = request.clock_in_at
+        session.clock_out_at = request.clock_out_at
+        session.clock_out_source = "MANUAL_ADJUST"
+        session.total_work_duration = request.clock_out_at - request.clock_in_at
+        session.work_date = bucketing.local_work_date(request.clock_in_at, tz_name)
+        session.is_manual_edit = True
+        session.manual_edit_reason = request.reason
+        session.approved_by = reviewer
+        session.approved_at = now
+        session.updated_at = now
+        keys |= _days(request.employee_id, tz_name, session.clock_in_at, session.clock_out_at, session.work_date)
+
+    # Queryset writes skip the per-session post_save summary rebuild; the
+    # summaries are rebuilt once for all keys by the caller.
+    WorkSession.objects.bulk_update(edited.values(), _SESSION_FIELDS, batch_size=services.SUMMARY_BATCH_SIZE)
+    WorkSession.objects.bulk_create(added, batch_size=services.SUMMARY_BATCH_SIZE)
+    return keys, missing
+
+
+def review(
+    reviewer: Employee,
+    request_ids: Iterable[int],
+    approve: bool,
+    note: str = "",
+) -> dict:
+    """
+    Approve or reject pending requests ``reviewer`` may review.
+
+    Returns the ids approved or rejected, and those skipped because they
+    are not pending, not reviewable by ``reviewer`` or (when approving)
+    their session no longer exists, plus the number of summaries rebuilt.
+    """
+    request_ids = set(request_ids)
+    now = timezone.now()
+
+    with transaction.atomic():
+        requests = list(
+            reviewable(reviewer)
+            .select_for_update(of=("self",))
+            .filter(pk__in=request_ids, status=SessionEditRequest.PENDING)
+            .order_by("created_at", "id")
+        )
+
+        keys, missing = set(), []
+        if approve and requests:
+            keys, missing = _apply(requests, reviewer, now)
+
+        status = SessionEditRequest.APPROVED if approve else SessionEditRequest.REJECTED
+        missing = set(missing)
+        done = [request.pk for request in requests if request.pk not in missing]
+        SessionEditRequest.objects.filter(pk__in=done).update(
+            status=status,
+            reviewed_by=reviewer,
+            reviewed_at=now,
+            review_note=note,
+            updated_at=now,
+        )
+
+        summaries = services.rebuild_daily_summaries_for(keys) if keys else 0
+        if keys:
+            events.sessions_edited.send(sender=WorkSession, keys=keys, reviewer=reviewer)
+
+    return {
+        "status": status,
+        "reviewed": sorted(done),
+        "skipped": sorted(request_ids - set(done)),
+        "summaries_rebuilt": summaries,
+    }
+
@@ -0,0 +1,22 @@
+"""
+Signals sent by the attendance app.
+
+They live apart from apps.attendance.signals (the app's own receivers) so
+that services and edits can send them without importing the receivers,
+which import services in turn.
+"""
+from django.dispatch import Signal
+
+# Sent after the transaction that opened or closed a session commits.
+# Receivers get the WorkSession as ``session``.
+session_clocked_in = Signal()
+session_clocked_out = Signal()
+
+# Sent after a transaction that wrote AttendanceDaySummary rows commits.
+# Receivers get ``keys``, a set of (employee_id, work_date) pairs.
+summaries_changed = Signal()
+
+# Sent inside the transaction that applies approved session edits.
+# Receivers get ``keys``, the (employee_id, work_date) pairs whose time
+# changed, and the ``reviewer``.
+sessions_edited = Signal()
@@ -0,0 +1,231 @@
+"""
+Streaming exports of work sessions and daily summaries for payroll.
+
+Rows are read with ``values_list().iterator(chunk_size=...)`` (a server-side
+cursor on PostgreSQL) and encoded chunk by chunk, so memory stays flat
+whatever the size of the export. Session exports reaching back before the
+hot window read archived sessions first (apps.attendance.archive). Under ASGI the encoded blocks are
+handed out through ``aiter_blocks``.
+
+Two encodings are supported:
+
+- ``csv``: one header line, then one line per row.
+- ``columnar``: a compact binary format. The stream starts with the magic
+  bytes ``OTCOL1``, then a 4-byte big-endian length and a JSON schema
+  ``{"columns": [[name, type], ...]}``. Each block follows as a 4-byte
+  row count (0 ends the stream) and one encoded column after another:
+  ``int`` columns as little-endian int64 (nulls as INT64_MIN), ``str``
+  columns as a 4-byte byte length plus the newline-joined UTF-8 values.
+  Dates are day ordinals, datetimes epoch microseconds and durations
+  whole seconds.
+"""
+import csv
+import io
+import itertools
+import json
+import struct
+import sys
+from array import array
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from typing import AsyncIterator, Iterable, Iterator, Optional
+
+from asgiref.sync import sync_to_async
+
+from apps.attendance.models import WorkSession, WorkSessionArchive, AttendanceDaySummary
+
+# Rows fetched from the database cursor and encoded per block.
+CHUNK_SIZE = 5000
+
+NULL_INT = -(2 ** 63)
+
+INT = "int"
+STR = "str"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class ExportSpec:
+    """
+    Describes one exportable dataset: the queryset, the columns pulled with
+    values_list and their columnar types.
+    """
+
+    def __init__(self, model, columns: list[tuple[str, str, str]], date_field: str, archive_model=None):
+        self.model = model
+        # (output name, values_list lookup, columnar type)
+        self.columns = columns
+        self.date_field = date_field
+        # Rows moved out of ``model`` (apps.attendance.archive), read first
+        # when the export reaches back before the hot window.
+        self.archive_model = archive_model
+
+    @property
+    def names(self) -> list[str]:
+        return [name for name, _, _ in self.columns]
+
+    def queryset(
+        self,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        department_id: Optional[int] = None,
+        employee_id: Optional[int] = None,
+        using: Optional[str] = None,
+        model=None,
+    ):
+        model = model or self.model
+        qs = model.objects.using(using) if using else model.objects.all()
+        if start is not None:
+            qs = qs.filter(**{f"{self.date_field}__gte": start})
+        if end is not None:
+            qs = qs.filter(**{f"{self.date_field}__lte": end})
+        if department_id is not None:
+            qs = qs.filter(employee__department_id=department_id)
+        if employee_id is not None:
+            qs = qs.filter(employee_id=employee_id)
+        return qs.order_by(self.date_field, "id").values_list(
+            *(lookup for _, lookup, _ in self.columns)
+        )
+
+    def rows(self, chunk_size: int = CHUNK_SIZE, **filters) -> Iterator[tuple]:
+        querysets = [self.queryset(**filters)]
+        if self.archive_model is not None:
+            # archive imports this module.
+            from apps.attendance.archive import hot_start
+
+            start = filters.get("start")
+            if start is None or start < hot_start():
+                querysets.insert(0, self.queryset(model=self.archive_model, **filters))
+        return itertools.chain.from_iterable(qs.iterator(chunk_size=chunk_size) for qs in querysets)
+
+
+SESSIONS = ExportSpec(
+    WorkSession,
+    [
+        ("id", "id", INT),
+        ("employee_id", "employee_id", INT),
+        ("employee_code", "employee__employee_code", STR),
+        ("work_date", "work_date", INT),
+        ("clock_in_at", "clock_in_at", INT),
+        ("clock_out_at", "clock_out_at", INT),
+        ("clock_in_source", "clock_in_source", STR),
+        ("clock_out_source", "clock_out_source", STR),
+        ("total_work_seconds", "total_work_duration", INT),
+    ],
+    date_field="work_date",
+    archive_model=WorkSessionArchive,
+)
+
+SUMMARIES = ExportSpec(
+    AttendanceDaySummary,
+    [
+        ("id", "id", INT),
+        ("employee_id", "employee_id", INT),
+        ("employee_code", "employee__employee_code", STR),
+        ("work_date", "work_date", INT),
+        ("total_work_seconds", "total_work_duration", INT),
+        ("total_overtime_seconds", "total_overtime_duration", INT),
+        ("status", "status", STR),
+        ("total_earnings", "total_earnings", STR),
+    ],
+    date_field="work_date",
+)
+
+DATASETS = {
+    "sessions": SESSIONS,
+    "summaries": SUMMARIES,
+}
+
+
+def _chunks(rows: Iterable[tuple], size: int) -> Iterator[list[tuple]]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _as_int(value) -> int:
+    if value is None:
+        return NULL_INT
+    if isinstance(value, datetime):
+        delta = value - _EPOCH
+        return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, timedelta):
+        return int(value.total_seconds())
+    return int(value)
+
+
+def _as_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, timedelta):
+        return str(int(value.total_seconds()))
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def stream_csv(spec: ExportSpec, rows: Iterable[tuple], chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(spec.names)
+    yield buffer.getvalue()
+
+    for chunk in _chunks(rows, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_as_text(v) for v in row] for row in chunk)
+        yield buffer.getvalue()
+
+
+def stream_columnar(spec: ExportSpec, rows: Iterable[tuple], chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    schema = json.dumps({"columns": [[name, kind] for name, _, kind in spec.columns]}).encode()
+    yield b"OTCOL1" + struct.pack(">I", len(schema)) + schema
+
+    kinds = [kind for _, _, kind in spec.columns]
+
+    for chunk in _chunks(rows, chunk_size):
+        parts = [struct.pack(">I", len(chunk))]
+        for index, kind in enumerate(kinds):
+            if kind == INT:
+                column = array("q", (_as_int(row[index]) for row in chunk))
+                if sys.byteorder == "big":
+                    column.byteswap()
+                parts.append(column.tobytes())
+            else:
+                text = "\n".join(
+                    _as_text(row[index]).replace("\n", " ") for row in chunk
+                ).encode()
+                parts.append(struct.pack(">I", len(text)))
+                parts.append(text)
+        yield b"".join(parts)
+
+    yield struct.pack(">I", 0)
+
+
+FORMATS = {
+    "csv": (stream_csv, "text/csv", "csv"),
+    "columnar": (stream_columnar, "application/octet-stream", "otcol"),
+}
+
+
+async def aiter_blocks(blocks: Iterator) -> AsyncIterator:
+    """
+    Async iterator over encoded ``blocks``, for responses served under
+    ASGI, where Django would read a sync iterator to the end before
+    sending anything. Each block is encoded in the thread-sensitive sync
+    thread, so the database cursor stays on one connection throughout.
+    """
+    next_block = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (block := await next_block(blocks, None)) is not None:
+            yield block
+    finally:
+        # Release the cursor when the client disconnects early.
+        await sync_to_async(blocks.close, thread_sensitive=True)()
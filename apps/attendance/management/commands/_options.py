@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from django.core.management.base import CommandError
+
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise CommandError(f"Invalid date '{value}'. Use YYYY-MM-DD.")
+
+
+def add_date_range_arguments(parser, noun="work_date"):
+    parser.add_argument("--start", type=parse_date, help=f"First {noun} (YYYY-MM-DD).")
+    parser.add_argument("--end", type=parse_date, help=f"Last {noun} (YYYY-MM-DD).")
+
+
+def date_range(options):
+    start, end = options["start"], options["end"]
+    if start and end and start > end:
+        raise CommandError("--start must be before or equal to --end.")
+    return start, end
@@ -0,0 +1,69 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.attendance import archive
+from ._options import parse_date
+
+
+class Command(BaseCommand):
+    help = (
+        "Move closed work sessions older than the hot window into the archive, "
+        "create upcoming archive partitions and optionally export and drop old "
+        "archived months."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=archive.ARCHIVE_BATCH_SIZE,
+            help="Sessions moved per transaction.",
+        )
+        parser.add_argument(
+            "--create-ahead",
+            type=int,
+            default=3,
+            help="Archive partitions to create for the months after the hot window start (PostgreSQL).",
+        )
+        parser.add_argument(
+            "--export-before",
+            type=parse_date,
+            help="Export whole archived months before this date (YYYY-MM-DD) to gzipped CSV and drop them.",
+        )
+        parser.add_argument(
+            "--export-dir",
+            default=".",
+            help="Directory for exported months.",
+        )
+
+    def handle(self, *args, **options):
+        hot_start = archive.hot_start()
+
+        created = archive.ensure_partitions(
+            archive.add_months(hot_start, n) for n in range(options["create_ahead"] + 1)
+        )
+        for name in created:
+            self.stdout.write(f"Created partition {name}")
+
+        started = time.monotonic()
+        total = 0
+        for number, batch in enumerate(archive.archive_sessions(hot_start, options["batch_size"]), start=1):
+            total += batch["archived"]
+            self.stdout.write(f"Batch {number}: archived {batch['archived']} sessions in {batch['seconds']:.3f}s")
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {total} sessions before {hot_start} in {time.monotonic() - started:.2f}s"
+        ))
+
+        if options["export_before"]:
+            self.export(options["export_before"], Path(options["export_dir"]))
+
+    def export(self, before, directory: Path):
+        if not directory.is_dir():
+            raise CommandError(f"Export directory {directory} does not exist.")
+
+        for month in archive.archived_months(before):
+            path, count = archive.export_month(month, directory)
+            archive.drop_month(month)
+            self.stdout.write(self.style.SUCCESS(f"Exported {count} sessions to {path} and dropped {month:%Y-%m}"))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.attendance import rollups
+from ._options import add_date_range_arguments, date_range
+
+
+class Command(BaseCommand):
+    help = "Rebuild weekly, monthly and department-day rollups from daily summaries."
+
+    def add_arguments(self, parser):
+        add_date_range_arguments(parser)
+
+    def handle(self, *args, **options):
+        start, end = date_range(options)
+
+        started = time.monotonic()
+        written = rollups.backfill(start, end)
+        for name, count in written.items():
+            self.stdout.write(f"{name}: {count} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Backfilled rollups in {time.monotonic() - started:.2f}s"
+        ))
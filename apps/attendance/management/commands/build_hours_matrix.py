@@ -0,0 +1,46 @@
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.attendance.matrix import HoursMatrix, file_name
+from ._options import add_date_range_arguments, date_range
+
+
+class Command(BaseCommand):
+    help = (
+        "Build the employee x day hours matrix for a date range and write it "
+        "where worker processes map it (ATTENDANCE_MATRIX_DIR)."
+    )
+
+    def add_arguments(self, parser):
+        add_date_range_arguments(parser, "day in the matrix")
+        parser.add_argument(
+            "--output-dir",
+            default=getattr(settings, "ATTENDANCE_MATRIX_DIR", ""),
+            help="Directory to write to (default: ATTENDANCE_MATRIX_DIR).",
+        )
+
+    def handle(self, *args, **options):
+        start, end = date_range(options)
+        today = timezone.localdate()
+        start = start or today.replace(day=1)
+        end = end or today
+        if start > end:
+            raise CommandError("--start must be before or equal to --end.")
+
+        if not options["output_dir"]:
+            raise CommandError("Give --output-dir or set ATTENDANCE_MATRIX_DIR.")
+        directory = Path(options["output_dir"])
+        if not directory.is_dir():
+            raise CommandError(f"Output directory {directory} does not exist.")
+
+        started = time.monotonic()
+        matrix = HoursMatrix.build(start, end)
+        path = directory / file_name(start, end)
+        matrix.save(path)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(matrix)} employees x {matrix.days} days to {path} in {time.monotonic() - started:.2f}s"
+        ))
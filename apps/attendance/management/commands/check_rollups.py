@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.attendance import rollups
+from ._options import add_date_range_arguments, date_range
+
+
+class Command(BaseCommand):
+    help = "Compare rollups with totals recomputed from daily summaries."
+
+    def add_arguments(self, parser):
+        add_date_range_arguments(parser)
+        parser.add_argument(
+            "--fix",
+            action="store_true",
+            help="Backfill the range when mismatches are found.",
+        )
+        parser.add_argument(
+            "--show",
+            type=int,
+            default=10,
+            help="Mismatching rows to print per rollup.",
+        )
+
+    def handle(self, *args, **options):
+        start, end = date_range(options)
+
+        mismatches = rollups.check(start, end)
+        total = sum(len(rows) for rows in mismatches.values())
+
+        for name, rows in mismatches.items():
+            self.stdout.write(f"{name}: {len(rows)} mismatches")
+            for key, stored, expected in rows[:options["show"]]:
+                self.stdout.write(f"  {key}: stored={stored} expected={expected}")
+
+        if not total:
+            self.stdout.write(self.style.SUCCESS("Rollups are consistent."))
+            return
+
+        if options["fix"]:
+            rollups.backfill(start, end)
+            self.stdout.write(self.style.SUCCESS(f"Repaired {total} rollup rows."))
+            return
+
+        raise CommandError(f"{total} rollup rows are inconsistent. Re-run with --fix to repair.")
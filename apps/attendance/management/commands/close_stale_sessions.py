@@ -0,0 +1,47 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.attendance.services import STALE_BATCH_SIZE, close_stale_sessions
+
+
+class Command(BaseCommand):
+    help = "Close open work sessions that have run past their maximum duration."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=STALE_BATCH_SIZE,
+            help="Sessions closed per transaction.",
+        )
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep sweeping instead of exiting after one pass.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=60.0,
+            help="Seconds to wait between sweeps with --loop.",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            self.sweep(options["batch_size"])
+            if not options["loop"]:
+                return
+            time.sleep(options["interval"])
+
+    def sweep(self, batch_size):
+        started = time.monotonic()
+        total = 0
+
+        for number, batch in enumerate(close_stale_sessions(batch_size=batch_size), start=1):
+            total += batch["closed"]
+            self.stdout.write(f"Batch {number}: closed {batch['closed']} sessions in {batch['seconds']:.3f}s")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {total} stale sessions in {time.monotonic() - started:.2f}s"
+        ))
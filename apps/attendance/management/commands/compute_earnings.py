@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.attendance.earnings import recompute, recompute_stale
+from ._options import add_date_range_arguments, date_range
+
+
+class Command(BaseCommand):
+    help = "Compute AttendanceDaySummary.total_earnings from employee pay data."
+
+    def add_arguments(self, parser):
+        add_date_range_arguments(parser, "work_date to compute")
+        parser.add_argument(
+            "--employee",
+            type=int,
+            action="append",
+            dest="employee_ids",
+            help="Limit to an employee id. May be given more than once.",
+        )
+        parser.add_argument(
+            "--stale",
+            action="store_true",
+            help=(
+                "Only recompute summaries whose worked time or pay changed "
+                "since their earnings were computed. Run this periodically."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        start, end = date_range(options)
+
+        started = time.monotonic()
+        if options["stale"]:
+            written = recompute_stale()
+        else:
+            written = recompute(start=start, end=end, employee_ids=options["employee_ids"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated earnings on {written} summaries in {time.monotonic() - started:.2f}s"
+        ))
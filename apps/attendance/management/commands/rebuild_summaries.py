@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.attendance.services import rebuild_daily_summaries
+from ._options import add_date_range_arguments, date_range
+
+
+class Command(BaseCommand):
+    help = "Rebuild AttendanceDaySummary rows from work sessions."
+
+    def add_arguments(self, parser):
+        add_date_range_arguments(parser, "work_date to rebuild")
+        parser.add_argument(
+            "--employee",
+            type=int,
+            action="append",
+            dest="employee_ids",
+            help="Limit to an employee id. May be given more than once.",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=500,
+            help="Employees rebuilt per transaction.",
+        )
+
+    def handle(self, *args, **options):
+        start, end = date_range(options)
+
+        started = time.monotonic()
+        written = rebuild_daily_summaries(
+            start=start,
+            end=end,
+            employee_ids=options["employee_ids"],
+            batch_size=options["batch_size"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} summaries in {time.monotonic() - started:.2f}s"
+        ))
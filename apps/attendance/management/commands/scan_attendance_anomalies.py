@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.attendance import anomalies
+
+
+class Command(BaseCommand):
+    help = (
+        "Scan work sessions written since the last scan for anomalies (long, "
+        "overlapping or repeatedly clamped sessions, unexpected sources) and "
+        "record them for review in the admin."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help="Sessions read per query (default: ATTENDANCE_ANOMALIES['CHUNK_SIZE']).",
+        )
+        parser.add_argument(
+            "--name",
+            default=anomalies.DEFAULT_SCAN,
+            help="Scan whose high-water mark is used.",
+        )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            help="Rescan all sessions instead of only those written since the last scan.",
+        )
+
+    def handle(self, *args, **options):
+        if options["full"]:
+            anomalies.reset(options["name"])
+
+        started = time.monotonic()
+        scanned = found = 0
+        for chunk in anomalies.scan(options["name"], options["chunk_size"]):
+            scanned += chunk["scanned"]
+            found += chunk["found"]
+            if options["verbosity"] > 1:
+                self.stdout.write(
+                    f"Scanned {chunk['scanned']} sessions, {chunk['found']} findings in {chunk['seconds']:.3f}s"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {scanned} sessions with {found} findings in {time.monotonic() - started:.2f}s"
+        ))
+        for kind, count in sorted(anomalies.counts_by_kind().items()):
+            self.stdout.write(f"  {kind}: {count} open")
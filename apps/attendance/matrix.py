@@ -0,0 +1,384 @@
+"""
+Employee × day matrix of worked seconds for analytics.
+
+One float64 cell per (employee, local day) in a flat row-major buffer: an
+``array('d')`` when the matrix is built, a memory-mapped file when it is
+loaded. Row metadata (employee, department, role, pay rate) is kept in
+parallel arrays, so no model instances are held.
+
+``HoursMatrix.build`` fills the matrix from one streamed ``values_list``
+query, crediting time to local days like apps.attendance.bucketing.
+``add_session`` adds a closed session afterwards, so a cached matrix can
+follow clock-outs instead of being rebuilt. ``save`` writes it to a file
+that ``load`` maps copy-on-write: worker processes loading the same file
+share its pages, and only the pages one of them updates are copied.
+
+Aggregations (``totals``, ``department_totals``, ``weekly_totals``,
+``daily_overages``, ``weekly_overages``, ``period_overages``) are
+vectorized with NumPy (in requirements.txt); loops over the buffer give
+the same results where it is not installed. They return sequences
+indexed like their ``rows`` argument (all rows by default).
+"""
+import itertools
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from django.conf import settings
+
+from apps.attendance import archive, bucketing
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - installs without requirements.txt
+    np = None
+
+MATRIX_CHUNK_SIZE = 2000
+
+_MAGIC = b"OPTITRACK-HOURS-1\n"
+_HEADER_LENGTH = struct.Struct("<I")
+_CELL = 8
+
+# Stored for a missing department or role (ids start at 1).
+_NONE = 0
+
+
+def _ids(values: Iterable[Optional[int]]) -> array:
+    return array("q", (value or _NONE for value in values))
+
+
+def _utc_midnight(day: date) -> datetime:
+    return datetime.combine(day, dt_time(), tzinfo=dt_timezone.utc)
+
+
+class HoursMatrix:
+    """
+    Worked seconds per employee (row) and local day (column) from
+    ``start`` for ``days`` days.
+
+    A built matrix grows a row for each new employee; a loaded one has a
+    fixed set of rows and ``add_session`` returns False for employees it
+    does not know. NumPy views of the cells (``cells``) must not be kept
+    across ``add_session`` calls, which may resize the buffer; readers
+    running alongside updates work on a ``copy``.
+    """
+
+    def __init__(
+        self,
+        start: date,
+        days: int,
+        employee_ids: Iterable[int] = (),
+        departments: Iterable[Optional[int]] = (),
+        roles: Iterable[Optional[int]] = (),
+        pay_rates: Iterable[float] = (),
+        seconds=None,
+    ):
+        self.start = start
+        self.days = days
+        self.employee_ids = array("q", employee_ids)
+        self.departments = _ids(departments)
+        self.roles = _ids(roles)
+        self.pay_rates = array("d", pay_rates)
+        self._rows = {employee_id: row for row, employee_id in enumerate(self.employee_ids)}
+        self._fixed = seconds is not None
+        self._seconds = seconds if seconds is not None else array("d", bytes(_CELL * days * len(self._rows)))
+        self._blank = array("d", bytes(_CELL * days))
+
+    def __len__(self) -> int:
+        return len(self.employee_ids)
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=self.days - 1)
+
+    def covers(self, day: date) -> bool:
+        return self.start <= day <= self.end
+
+    def row(self, employee_id: int) -> Optional[int]:
+        return self._rows.get(employee_id)
+
+    def groups(self, row: int) -> tuple[Optional[int], Optional[int]]:
+        """(department id, role id) of a row."""
+        return self.departments[row] or None, self.roles[row] or None
+
+    def week_starts(self) -> list[date]:
+        """Monday of each week ``weekly_totals`` returns a column for."""
+        first = self.start - timedelta(days=self.start.weekday())
+        return [first + timedelta(weeks=n) for n in range(self._weeks())]
+
+    def copy(self) -> "HoursMatrix":
+        """
+        Independent copy with its cells in memory, safe to read while the
+        original is updated.
+        """
+        seconds = array("d")
+        seconds.frombytes(memoryview(self._seconds).cast("B"))
+        clone = HoursMatrix(
+            self.start, self.days, self.employee_ids, self.departments, self.roles, self.pay_rates, seconds=seconds
+        )
+        clone._fixed = self._fixed
+        return clone
+
+    # -- building -------------------------------------------------------
+
+    def _add_row(self, employee_id: int, department_id, role_id, pay_rate) -> Optional[int]:
+        row = self._rows.get(employee_id)
+        if row is None and not self._fixed:
+            row = len(self.employee_ids)
+            self.employee_ids.append(employee_id)
+            self.departments.append(department_id or _NONE)
+            self.roles.append(role_id or _NONE)
+            self.pay_rates.append(float(pay_rate))
+            self._seconds.extend(self._blank)
+            self._rows[employee_id] = row
+        return row
+
+    def _credit(self, row: int, pieces) -> None:
+        base = row * self.days
+        for day, duration in pieces:
+            column = (day - self.start).days
+            if 0 <= column < self.days:
+                self._seconds[base + column] += duration.total_seconds()
+
+    def add_session(self, employee, clock_in_at: datetime, clock_out_at: datetime) -> bool:
+        """
+        Credit one closed session of ``employee`` to the days it covers.
+        Returns False when the employee has no row and none can be added.
+        """
+        row = self._add_row(employee.pk, employee.department_id, employee.role_id, employee.pay_rate)
+        if row is None:
+            return False
+        if clock_out_at > clock_in_at:
+            self._credit(row, bucketing.split_by_local_day(clock_in_at, clock_out_at, employee.timezone))
+        return True
+
+    @classmethod
+    def build(
+        cls,
+        start: date,
+        end: date,
+        employee_ids: Optional[Iterable[int]] = None,
+    ) -> "HoursMatrix":
+        """
+        Matrix of closed session time of active employees over [start, end].
+
+        Sessions are read once, in chunks, and cut at the local midnights of
+        their employee's timezone, computed once per timezone for the whole
+        range.
+        """
+        since = bucketing.lookback_start(start)
+        filters = {
+            "employee__is_active": True,
+            "work_date__gte": since,
+            "work_date__lte": end,
+            "clock_in_at__isnull": False,
+            "clock_out_at__isnull": False,
+        }
+        if employee_ids is not None:
+            filters["employee_id__in"] = list(employee_ids)
+
+        rows = itertools.chain.from_iterable(
+            source
+            .filter(**filters)
+            .order_by()
+            .values_list(
+                "employee_id",
+                "employee__department_id",
+                "employee__role_id",
+                "employee__pay_rate",
+                "employee__timezone",
+                "clock_in_at",
+                "clock_out_at",
+            )
+            .iterator(chunk_size=MATRIX_CHUNK_SIZE)
+            for source in archive.session_sources(since)
+        )
+
+        matrix = cls(start, (end - start).days + 1)
+        # Pieces before the first or after the last of these midnights fall
+        # outside [start, end], so sessions are clipped to them.
+        span = (_utc_midnight(since - timedelta(days=1)), _utc_midnight(end + timedelta(days=1)))
+        midnights: dict[Optional[str], tuple[list, list]] = {}
+
+        for employee_id, department_id, role_id, pay_rate, tz_name, clock_in_at, clock_out_at in rows:
+            row = matrix._add_row(employee_id, department_id, role_id, pay_rate)
+            if tz_name not in midnights:
+                midnights[tz_name] = bucketing.midnights(tz_name, *span)
+            instants, days = midnights[tz_name]
+            clock_in_at = max(clock_in_at, instants[0])
+            clock_out_at = min(clock_out_at, instants[-1])
+            if clock_out_at > clock_in_at:
+                matrix._credit(row, bucketing.split(clock_in_at, clock_out_at, instants, days))
+
+        return matrix
+
+    # -- files ----------------------------------------------------------
+
+    def save(self, path) -> None:
+        """
+        Write the matrix to ``path``, replacing it atomically so processes
+        that mapped the previous file keep a consistent view.
+        """
+        header = json.dumps({
+            "start": self.start.isoformat(),
+            "days": self.days,
+            "byteorder": sys.byteorder,
+            "employees": self.employee_ids.tolist(),
+            "departments": self.departments.tolist(),
+            "roles": self.roles.tolist(),
+            "pay_rates": self.pay_rates.tolist(),
+        }).encode()
+        # Cells start on an 8-byte boundary.
+        padding = -(len(_MAGIC) + _HEADER_LENGTH.size + len(header)) % _CELL
+
+        path = Path(path)
+        partial = path.with_name(f".{path.name}.{os.getpid()}")
+        with open(partial, "wb") as out:
+            out.write(_MAGIC)
+            out.write(_HEADER_LENGTH.pack(len(header) + padding))
+            out.write(header + b" " * padding)
+            out.write(memoryview(self._seconds).cast("B"))
+        os.replace(partial, path)
+
+    @classmethod
+    def load(cls, path) -> "HoursMatrix":
+        """Map a file written by ``save`` copy-on-write."""
+        with open(path, "rb") as source:
+            if source.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not an hours matrix file.")
+            (length,) = _HEADER_LENGTH.unpack(source.read(_HEADER_LENGTH.size))
+            header = json.loads(source.read(length))
+            if header["byteorder"] != sys.byteorder:
+                raise ValueError(f"{path} was written with {header['byteorder']}-endian cells.")
+
+            offset = len(_MAGIC) + _HEADER_LENGTH.size + length
+            size = _CELL * header["days"] * len(header["employees"])
+            if size:
+                mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_COPY)
+                seconds = memoryview(mapped)[offset:offset + size].cast("d")
+            else:
+                seconds = memoryview(bytearray()).cast("d")
+
+        return cls(
+            date.fromisoformat(header["start"]),
+            header["days"],
+            header["employees"],
+            header["departments"],
+            header["roles"],
+            header["pay_rates"],
+            seconds=seconds,
+        )
+
+    # -- aggregations ---------------------------------------------------
+
+    @property
+    def cells(self):
+        """NumPy view of the cells, shape (rows, days)."""
+        return np.frombuffer(self._seconds, dtype=np.float64).reshape(len(self), self.days)
+
+    def _row_cells(self, row: int):
+        base = row * self.days
+        return self._seconds[base:base + self.days]
+
+    def _all(self, rows: Optional[Sequence[int]]) -> Sequence[int]:
+        return range(len(self)) if rows is None else rows
+
+    def totals(self, rows: Optional[Sequence[int]] = None):
+        """Seconds per row over the whole range."""
+        if np is not None:
+            cells = self.cells if rows is None else self.cells[np.asarray(rows, dtype=np.intp)]
+            return cells.sum(axis=1)
+        return [sum(self._row_cells(row)) for row in self._all(rows)]
+
+    def department_totals(self) -> dict[Optional[int], float]:
+        """Seconds per department id (None: no department)."""
+        totals = self.totals()
+        if np is not None:
+            ids, groups = np.unique(np.frombuffer(self.departments, dtype=np.int64), return_inverse=True)
+            sums = np.bincount(groups, weights=totals, minlength=len(ids))
+            return {int(department_id) or None: float(total) for department_id, total in zip(ids, sums)}
+
+        result: dict[Optional[int], float] = {}
+        for department_id, total in zip(self.departments, totals):
+            result[department_id or None] = result.get(department_id or None, 0.0) + total
+        return result
+
+    def _weeks(self) -> int:
+        return (self.start.weekday() + self.days + 6) // 7
+
+    def weekly_totals(self, rows: Optional[Sequence[int]] = None):
+        """
+        Seconds per row and calendar week (Monday to Sunday), one column
+        per ``week_starts()`` entry; partial weeks at either end only
+        count the days in range.
+        """
+        lead, weeks = self.start.weekday(), self._weeks()
+        if np is not None:
+            cells = self.cells if rows is None else self.cells[np.asarray(rows, dtype=np.intp)]
+            padded = np.zeros((len(cells), weeks * 7))
+            padded[:, lead:lead + self.days] = cells
+            return padded.reshape(len(cells), weeks, 7).sum(axis=2)
+
+        result = []
+        for row in self._all(rows):
+            sums = [0.0] * weeks
+            for column, seconds in enumerate(self._row_cells(row)):
+                sums[(lead + column) // 7] += seconds
+            result.append(sums)
+        return result
+
+    def daily_overages(self, threshold_hours: float, rows: Optional[Sequence[int]] = None):
+        """Hours above ``threshold_hours`` per day, summed per row."""
+        threshold = threshold_hours * 3600.0
+        if np is not None:
+            cells = self.cells if rows is None else self.cells[np.asarray(rows, dtype=np.intp)]
+            return np.maximum(cells - threshold, 0.0).sum(axis=1) / 3600.0
+        return [
+            sum(seconds - threshold for seconds in self._row_cells(row) if seconds > threshold) / 3600.0
+            for row in self._all(rows)
+        ]
+
+    def weekly_overages(self, threshold_hours: float, rows: Optional[Sequence[int]] = None):
+        """Hours above ``threshold_hours`` per calendar week, summed per row."""
+        threshold = threshold_hours * 3600.0
+        weekly = self.weekly_totals(rows)
+        if np is not None:
+            return np.maximum(weekly - threshold, 0.0).sum(axis=1) / 3600.0
+        return [sum(max(total - threshold, 0.0) for total in weeks) / 3600.0 for weeks in weekly]
+
+    def period_overages(self, threshold_hours: float, rows: Optional[Sequence[int]] = None):
+        """Hours above ``threshold_hours`` over the whole range, per row."""
+        totals = self.totals(rows)
+        threshold = threshold_hours * 3600.0
+        if np is not None:
+            return np.maximum(totals - threshold, 0.0) / 3600.0
+        return [max(total - threshold, 0.0) / 3600.0 for total in totals]
+
+
+def file_name(start: date, end: date) -> str:
+    return f"hours-{start.isoformat()}-{end.isoformat()}.matrix"
+
+
+def load_shared(start: date, end: date, max_age: float) -> Optional[HoursMatrix]:
+    """
+    The matrix for [start, end] written to ``settings.ATTENDANCE_MATRIX_DIR``
+    (``build_hours_matrix``), if there is one younger than ``max_age``
+    seconds.
+    """
+    directory = getattr(settings, "ATTENDANCE_MATRIX_DIR", "")
+    if not directory:
+        return None
+    path = Path(directory) / file_name(start, end)
+    try:
+        if time.time() - path.stat().st_mtime >= max_age:
+            return None
+        return HoursMatrix.load(path)
+    except (OSError, ValueError):
+        return None
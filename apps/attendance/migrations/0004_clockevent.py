@@ -0,0 +1,34 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_alter_attendancedaysummary_employee_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='worksession',
+            name='clock_out_source',
+            field=models.CharField(blank=True, choices=[('WEB', 'Web'), ('MOBILE', 'Mobile'), ('KIOSK', 'Kiosk'), ('API', 'API'), ('AUTO_TIMEOUT', 'Auto timeout'), ('MANUAL_ADJUST', 'Manual adjust')], max_length=20, null=True),
+        ),
+        migrations.CreateModel(
+            name='ClockEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=100, unique=True)),
+                ('action', models.CharField(choices=[('CLOCK_IN', 'Clock in'), ('CLOCK_OUT', 'Clock out')], max_length=10)),
+                ('occurred_at', models.DateTimeField()),
+                ('source', models.CharField(choices=[('WEB', 'Web'), ('MOBILE', 'Mobile'), ('KIOSK', 'Kiosk'), ('API', 'API')], max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clock_events', to=settings.AUTH_USER_MODEL)),
+                ('session', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='clock_events', to='attendance.worksession')),
+            ],
+        ),
+    ]
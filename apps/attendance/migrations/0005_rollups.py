@@ -0,0 +1,63 @@
+# Generated by Django 5.1.3 on 2026-10-18 17:55
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_clockevent'),
+        ('users', '0004_alter_employee_pay_rate_alter_employee_pay_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentDayRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('work_date', models.DateField()),
+                ('total_work_duration', models.DurationField(default=datetime.timedelta(0))),
+                ('total_overtime_duration', models.DurationField(default=datetime.timedelta(0))),
+                ('employees_present', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('department', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_rollups', to='users.department')),
+            ],
+            options={
+                'unique_together': {('department', 'work_date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='EmployeeMonthRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month_start', models.DateField()),
+                ('total_work_duration', models.DurationField(default=datetime.timedelta(0))),
+                ('total_overtime_duration', models.DurationField(default=datetime.timedelta(0))),
+                ('days_present', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='month_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('employee', 'month_start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='EmployeeWeekRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('week_start', models.DateField()),
+                ('total_work_duration', models.DurationField(default=datetime.timedelta(0))),
+                ('total_overtime_duration', models.DurationField(default=datetime.timedelta(0))),
+                ('days_present', models.PositiveSmallIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='week_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('employee', 'week_start')},
+            },
+        ),
+    ]
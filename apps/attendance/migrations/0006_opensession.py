@@ -0,0 +1,50 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_open_sessions(apps, schema_editor):
+    WorkSession = apps.get_model("attendance", "WorkSession")
+    OpenSession = apps.get_model("attendance", "OpenSession")
+    OpenSession.objects.bulk_create(
+        [
+            OpenSession(
+                employee_id=employee_id,
+                session_id=session_id,
+                clock_in_at=clock_in_at,
+                clock_in_source=clock_in_source,
+                work_date=work_date,
+            )
+            for employee_id, session_id, clock_in_at, clock_in_source, work_date in (
+                WorkSession.objects
+                .filter(clock_out_at__isnull=True)
+                .values_list("employee_id", "id", "clock_in_at", "clock_in_source", "work_date")
+                .iterator()
+            )
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_rollups'),
+        ('users', '0004_alter_employee_pay_rate_alter_employee_pay_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OpenSession',
+            fields=[
+                ('employee', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='open_session', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('clock_in_at', models.DateTimeField()),
+                ('clock_in_source', models.CharField(choices=[('WEB', 'Web'), ('MOBILE', 'Mobile'), ('KIOSK', 'Kiosk'), ('API', 'API')], default='WEB', max_length=20)),
+                ('work_date', models.DateField()),
+                ('session', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='open_entry', to='attendance.worksession')),
+            ],
+        ),
+        migrations.RunPython(populate_open_sessions, migrations.RunPython.noop),
+    ]
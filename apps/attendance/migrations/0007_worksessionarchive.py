@@ -0,0 +1,85 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:10
+
+import datetime
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# On PostgreSQL the archive is range-partitioned by work_date. The primary
+# key must include the partition key; ids stay unique because they are
+# copied from WorkSession. Monthly partitions are created by
+# apps.attendance.archive; the default partition catches anything else.
+POSTGRES_CREATE = """
+CREATE TABLE attendance_worksessionarchive (
+    id bigint NOT NULL,
+    employee_id bigint NOT NULL,
+    clock_in_at timestamp with time zone NOT NULL,
+    clock_out_at timestamp with time zone NULL,
+    clock_in_source varchar(20) NOT NULL,
+    clock_out_source varchar(20) NULL,
+    is_manual_edit boolean NOT NULL,
+    manual_edit_reason text NOT NULL,
+    approved_by_id bigint NULL,
+    approved_at timestamp with time zone NULL,
+    total_work_duration interval NOT NULL,
+    is_overtime boolean NOT NULL,
+    work_date date NOT NULL,
+    created_at timestamp with time zone NOT NULL,
+    updated_at timestamp with time zone NOT NULL,
+    archived_at timestamp with time zone NOT NULL,
+    PRIMARY KEY (id, work_date)
+) PARTITION BY RANGE (work_date);
+CREATE INDEX attendance_wsarchive_emp_date ON attendance_worksessionarchive (employee_id, work_date);
+CREATE TABLE attendance_worksessionarchive_default PARTITION OF attendance_worksessionarchive DEFAULT;
+"""
+
+
+def create_archive_table(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(POSTGRES_CREATE)
+    else:
+        schema_editor.create_model(apps.get_model("attendance", "WorkSessionArchive"))
+
+
+def drop_archive_table(apps, schema_editor):
+    schema_editor.delete_model(apps.get_model("attendance", "WorkSessionArchive"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_opensession'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='WorkSessionArchive',
+                    fields=[
+                        ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                        ('clock_in_at', models.DateTimeField()),
+                        ('clock_out_at', models.DateTimeField(blank=True, null=True)),
+                        ('clock_in_source', models.CharField(choices=[('WEB', 'Web'), ('MOBILE', 'Mobile'), ('KIOSK', 'Kiosk'), ('API', 'API')], max_length=20)),
+                        ('clock_out_source', models.CharField(blank=True, choices=[('WEB', 'Web'), ('MOBILE', 'Mobile'), ('KIOSK', 'Kiosk'), ('API', 'API'), ('AUTO_TIMEOUT', 'Auto timeout'), ('MANUAL_ADJUST', 'Manual adjust')], max_length=20, null=True)),
+                        ('is_manual_edit', models.BooleanField(default=False)),
+                        ('manual_edit_reason', models.TextField(blank=True)),
+                        ('approved_at', models.DateTimeField(blank=True, null=True)),
+                        ('total_work_duration', models.DurationField(default=datetime.timedelta(0))),
+                        ('is_overtime', models.BooleanField(default=False)),
+                        ('work_date', models.DateField()),
+                        ('created_at', models.DateTimeField()),
+                        ('updated_at', models.DateTimeField()),
+                        ('archived_at', models.DateTimeField()),
+                        ('approved_by', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                        ('employee', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='archived_sessions', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['employee', 'work_date'], name='attendance_wsarchive_emp_date')],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_archive_table, drop_archive_table),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_worksessionarchive'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnomalyScanState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_updated_at', models.DateTimeField(blank=True, null=True)),
+                ('last_session_id', models.BigIntegerField(default=0)),
+                ('last_run_at', models.DateTimeField(blank=True, null=True)),
+                ('sessions_scanned', models.PositiveBigIntegerField(default=0)),
+                ('anomalies_found', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AttendanceAnomaly',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=40)),
+                ('work_date', models.DateField()),
+                ('details', models.JSONField(blank=True, default=dict)),
+                ('status', models.CharField(choices=[('OPEN', 'Open'), ('CONFIRMED', 'Confirmed'), ('DISMISSED', 'Dismissed')], default='OPEN', max_length=20)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('detected_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name_plural': 'Attendance anomalies',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='worksession',
+            index=models.Index(fields=['updated_at', 'id'], name='attendance_ws_updated_id'),
+        ),
+        migrations.AddField(
+            model_name='attendanceanomaly',
+            name='employee',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_anomalies', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='attendanceanomaly',
+            name='related_session',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='attendance.worksession'),
+        ),
+        migrations.AddField(
+            model_name='attendanceanomaly',
+            name='reviewed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='reviewed_attendance_anomalies', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='attendanceanomaly',
+            name='session',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='anomalies', to='attendance.worksession'),
+        ),
+        migrations.AddIndex(
+            model_name='attendanceanomaly',
+            index=models.Index(fields=['status', 'kind'], name='attendance__status_f53684_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendanceanomaly',
+            index=models.Index(fields=['employee', 'work_date'], name='attendance__employe_512199_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendanceanomaly',
+            constraint=models.UniqueConstraint(condition=models.Q(('related_session__isnull', True)), fields=('kind', 'session'), name='uniq_anomaly_per_session'),
+        ),
+        migrations.AddConstraint(
+            model_name='attendanceanomaly',
+            constraint=models.UniqueConstraint(condition=models.Q(('related_session__isnull', False)), fields=('kind', 'session', 'related_session'), name='uniq_anomaly_per_session_pair'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_sessioneditrequest'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendancedaysummary',
+            name='earnings_stale',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddIndex(
+            model_name='attendancedaysummary',
+            index=models.Index(condition=models.Q(('earnings_stale', True)), fields=['work_date'], name='attendance_summary_earn_stale'),
+        ),
+    ]
@@ -16,6 +16,8 @@ class WorkSession(models.Model):
     END_SOURCE_CHOICES = [
         ("WEB", "Web"),
         ("MOBILE", "Mobile"),
+        ("KIOSK", "Kiosk"),
+        ("API", "API"),
         ("AUTO_TIMEOUT", "Auto timeout"),
         ("MANUAL_ADJUST", "Manual adjust"),
     ]
@@ -72,12 +74,105 @@ class WorkSession(models.Model):
         ]
         indexes = [
             models.Index(fields=["employee", "work_date"]),
+            # Incremental scans from a high-water mark (apps.attendance.anomalies).
+            models.Index(fields=["updated_at", "id"], name="attendance_ws_updated_id"),
         ]
 
     def __str__(self):
         return f"{self.employee} {self.work_date} {self.clock_in_at}–{self.clock_out_at or 'OPEN'}"
 
 
+class OpenSession(models.Model):
+    """
+    One row per employee who is currently clocked in, pointing at their
+    open WorkSession. Written with the WorkSession, in the same
+    transaction: by the post_save receiver in apps.attendance.signals for
+    single saves, by the bulk writers in apps.attendance.services.
+    """
+    employee = models.OneToOneField(
+        Employee,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="open_session",
+    )
+    session = models.OneToOneField(
+        WorkSession,
+        on_delete=models.CASCADE,
+        related_name="open_entry",
+    )
+
+    clock_in_at = models.DateTimeField()
+    clock_in_source = models.CharField(
+        max_length=20,
+        choices=WorkSession.SOURCE_CHOICES,
+        default="WEB",
+    )
+    work_date = models.DateField()
+
+    def __str__(self):
+        return f"{self.employee} since {self.clock_in_at}"
+
+
+class WorkSessionArchive(models.Model):
+    """
+    Closed work sessions moved out of WorkSession once they fall outside
+    the hot window (``settings.ATTENDANCE_HOT_MONTHS``).
+
+    Rows keep their original WorkSession id. On PostgreSQL the table is
+    range-partitioned by ``work_date``, one partition per month (see
+    apps.attendance.archive); old months can be exported and dropped
+    whole. Foreign keys are not enforced so history outlives employees.
+    """
+    id = models.BigIntegerField(primary_key=True)
+
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="archived_sessions",
+    )
+
+    clock_in_at = models.DateTimeField()
+    clock_out_at = models.DateTimeField(null=True, blank=True)
+    clock_in_source = models.CharField(max_length=20, choices=WorkSession.SOURCE_CHOICES)
+    clock_out_source = models.CharField(
+        max_length=20,
+        choices=WorkSession.END_SOURCE_CHOICES,
+        null=True,
+        blank=True,
+    )
+
+    is_manual_edit = models.BooleanField(default=False)
+    manual_edit_reason = models.TextField(blank=True)
+
+    approved_by = models.ForeignKey(
+        Employee,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    approved_at = models.DateTimeField(null=True, blank=True)
+
+    total_work_duration = models.DurationField(default=timedelta(0))
+    is_overtime = models.BooleanField(default=False)
+
+    work_date = models.DateField()
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["employee", "work_date"], name="attendance_wsarchive_emp_date"),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} {self.work_date} {self.clock_in_at}–{self.clock_out_at} (archived)"
+
+
 class AttendanceDaySummary(models.Model):
     STATUS_CHOICES = [
         ("PRESENT", "Present"),
@@ -98,6 +193,9 @@ class AttendanceDaySummary(models.Model):
     total_overtime_duration = models.DurationField(default=timedelta(0))
     expected_work_duration = models.DurationField(default=timedelta(hours=8))
     total_earnings = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    # Set whenever the worked time changes, cleared when total_earnings is
+    # recomputed (apps.attendance.earnings.recompute_stale).
+    earnings_stale = models.BooleanField(default=False)
 
     status = models.CharField(
         max_length=20,
@@ -112,7 +210,294 @@ class AttendanceDaySummary(models.Model):
         unique_together = ("employee", "work_date")
         indexes = [
             models.Index(fields=["employee", "work_date"]),
+            models.Index(
+                fields=["work_date"],
+                condition=models.Q(earnings_stale=True),
+                name="attendance_summary_earn_stale",
+            ),
         ]
 
     def __str__(self):
         return f"{self.employee} {self.work_date} ({self.status})"
+
+
+class ClockEvent(models.Model):
+    """
+    A clock event received through batch ingestion, kept so that replayed
+    events with the same idempotency key are not applied twice.
+    """
+    CLOCK_IN = "CLOCK_IN"
+    CLOCK_OUT = "CLOCK_OUT"
+
+    ACTION_CHOICES = [
+        (CLOCK_IN, "Clock in"),
+        (CLOCK_OUT, "Clock out"),
+    ]
+
+    idempotency_key = models.CharField(max_length=100, unique=True)
+
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="clock_events",
+    )
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    occurred_at = models.DateTimeField()
+    source = models.CharField(max_length=20, choices=WorkSession.SOURCE_CHOICES)
+
+    session = models.ForeignKey(
+        WorkSession,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="clock_events",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.employee} {self.action} {self.occurred_at}"
+
+
+class EmployeeWeekRollup(models.Model):
+    """
+    Per-employee totals for the week starting on ``week_start`` (Monday),
+    maintained from AttendanceDaySummary.
+    """
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="week_rollups",
+    )
+    week_start = models.DateField()
+
+    total_work_duration = models.DurationField(default=timedelta(0))
+    total_overtime_duration = models.DurationField(default=timedelta(0))
+    days_present = models.PositiveSmallIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("employee", "week_start")
+
+    def __str__(self):
+        return f"{self.employee} week of {self.week_start}"
+
+
+class EmployeeMonthRollup(models.Model):
+    """
+    Per-employee totals for the month starting on ``month_start``,
+    maintained from AttendanceDaySummary.
+    """
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="month_rollups",
+    )
+    month_start = models.DateField()
+
+    total_work_duration = models.DurationField(default=timedelta(0))
+    total_overtime_duration = models.DurationField(default=timedelta(0))
+    days_present = models.PositiveSmallIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("employee", "month_start")
+
+    def __str__(self):
+        return f"{self.employee} {self.month_start:%Y-%m}"
+
+
+class DepartmentDayRollup(models.Model):
+    """
+    Per-department totals for one work_date, attributed by each employee's
+    current department. Employees without a department are not included.
+    """
+    department = models.ForeignKey(
+        "users.Department",
+        on_delete=models.CASCADE,
+        related_name="day_rollups",
+    )
+    work_date = models.DateField()
+
+    total_work_duration = models.DurationField(default=timedelta(0))
+    total_overtime_duration = models.DurationField(default=timedelta(0))
+    employees_present = models.PositiveIntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("department", "work_date")
+
+    def __str__(self):
+        return f"{self.department} {self.work_date}"
+
+
+class AttendanceAnomaly(models.Model):
+    """
+    A suspicious session found by the anomaly scan (apps.attendance.anomalies),
+    kept for review. ``kind`` names the detector. Findings about a pair of
+    sessions (e.g. overlaps) also point at ``related_session``.
+
+    Session links are not enforced so findings survive archiving.
+    """
+    OPEN = "OPEN"
+    CONFIRMED = "CONFIRMED"
+    DISMISSED = "DISMISSED"
+
+    STATUS_CHOICES = [
+        (OPEN, "Open"),
+        (CONFIRMED, "Confirmed"),
+        (DISMISSED, "Dismissed"),
+    ]
+
+    kind = models.CharField(max_length=40)
+
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="attendance_anomalies",
+    )
+    session = models.ForeignKey(
+        WorkSession,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="anomalies",
+    )
+    related_session = models.ForeignKey(
+        WorkSession,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="+",
+    )
+    work_date = models.DateField()
+    details = models.JSONField(default=dict, blank=True)
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=OPEN)
+    reviewed_by = models.ForeignKey(
+        Employee,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reviewed_attendance_anomalies",
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    detected_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name_plural = "Attendance anomalies"
+        constraints = [
+            # Rescanning a session does not report it twice.
+            UniqueConstraint(
+                fields=["kind", "session"],
+                condition=Q(related_session__isnull=True),
+                name="uniq_anomaly_per_session",
+            ),
+            UniqueConstraint(
+                fields=["kind", "session", "related_session"],
+                condition=Q(related_session__isnull=False),
+                name="uniq_anomaly_per_session_pair",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["status", "kind"]),
+            models.Index(fields=["employee", "work_date"]),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.employee} {self.work_date}"
+
+
+class AnomalyScanState(models.Model):
+    """
+    High-water mark of the anomaly scan: the (updated_at, id) of the last
+    session scanned. The next scan starts after it.
+    """
+    name = models.CharField(max_length=50, unique=True)
+
+    last_updated_at = models.DateTimeField(null=True, blank=True)
+    last_session_id = models.BigIntegerField(default=0)
+
+    last_run_at = models.DateTimeField(null=True, blank=True)
+    sessions_scanned = models.PositiveBigIntegerField(default=0)
+    anomalies_found = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name} up to {self.last_updated_at}"
+
+
+class SessionEditRequest(models.Model):
+    """
+    An employee's request to correct a work session, or to add a missing
+    one when ``session`` is empty. Approving it applies the times to the
+    session and marks it as a manual edit (see apps.attendance.edits).
+
+    ``department`` is copied from the employee on submission so managers'
+    pending lists are one index range scan.
+    """
+    PENDING = "PENDING"
+    APPROVED = "APPROVED"
+    REJECTED = "REJECTED"
+
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (APPROVED, "Approved"),
+        (REJECTED, "Rejected"),
+    ]
+
+    employee = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        related_name="session_edit_requests",
+    )
+    department = models.ForeignKey(
+        "users.Department",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="session_edit_requests",
+    )
+    # Not enforced so requests outlive archived sessions.
+    session = models.ForeignKey(
+        WorkSession,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name="edit_requests",
+    )
+
+    clock_in_at = models.DateTimeField()
+    clock_out_at = models.DateTimeField()
+    reason = models.TextField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=PENDING)
+    reviewed_by = models.ForeignKey(
+        Employee,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reviewed_session_edit_requests",
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+    review_note = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["department", "created_at"],
+                condition=Q(status="PENDING"),
+                name="attendance_edit_pending_dept",
+            ),
+            models.Index(fields=["employee", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.employee} {self.clock_in_at}–{self.clock_out_at} ({self.status})"
@@ -0,0 +1,102 @@
+import base64
+from collections import OrderedDict
+from datetime import date
+
+from django.db.models import Q
+from django.utils.encoding import force_str
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class WorkDateCursorPagination(BasePagination):
+    """
+    Keyset pagination over (work_date, id), newest first.
+
+    Each page is a single range scan that starts after the last row of the
+    previous page, so response time does not grow with history length.
+    The cursor is an opaque token: base64 of "<work_date>|<id>".
+    """
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = "page_size"
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def _page_size(self, request) -> int:
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return min(max(size, 1), self.max_page_size)
+
+    def _decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw = force_str(base64.urlsafe_b64decode(encoded.encode("ascii")))
+            work_date, pk = raw.split("|")
+            return date.fromisoformat(work_date), int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _encode_cursor(self, work_date: date, pk: int) -> str:
+        raw = f"{work_date.isoformat()}|{pk}"
+        return base64.urlsafe_b64encode(raw.encode("ascii")).decode("ascii")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self._page_size(request)
+
+        queryset = queryset.order_by("-work_date", "-id")
+        cursor = self._decode_cursor(request)
+        if cursor is not None:
+            work_date, pk = cursor
+            queryset = queryset.filter(
+                Q(work_date__lt=work_date) | Q(work_date=work_date, id__lt=pk)
+            )
+
+        rows = list(queryset[:size + 1])
+        self.next_cursor = None
+        if len(rows) > size:
+            rows = rows[:size]
+            last = rows[-1]
+            self.next_cursor = self._encode_cursor(last.work_date, last.pk)
+        return rows
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """Keyset pagination over (created_at, id), newest first."""
+    ordering = ("-created_at", "-id")
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = "page_size"
+
+
+class OldestFirstCursorPagination(CreatedAtCursorPagination):
+    """Keyset pagination over (created_at, id), oldest first."""
+    ordering = ("created_at", "id")
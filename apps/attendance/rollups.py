@@ -0,0 +1,272 @@
+"""
+Weekly, monthly and department-day rollups of AttendanceDaySummary.
+
+The clock-out path applies each summary change as a delta
+(``apply_day_change``). Bulk summary rebuilds recompute the rollup rows
+they touch from the summaries (``refresh``). ``backfill`` and ``check``
+recompute or compare whole date ranges.
+"""
+from datetime import date, timedelta
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, DurationField, F, Q, Sum, Value
+from django.db.models.functions import TruncMonth, TruncWeek
+from django.utils import timezone
+
+from apps.attendance.models import (
+    AttendanceDaySummary,
+    DepartmentDayRollup,
+    EmployeeMonthRollup,
+    EmployeeWeekRollup,
+)
+from apps.attendance.utils import update_or_insert
+from apps.users.models import Employee
+
+ROLLUP_BATCH_SIZE = 1000
+
+ZERO = timedelta(0)
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def apply_day_change(
+    employee_id: int,
+    department_id: Optional[int],
+    work_date: date,
+    work_delta: timedelta,
+    overtime_delta: timedelta,
+    present_delta: int,
+) -> None:
+    """
+    Add the change in one employee-day summary to its week, month and
+    department-day rollups with F() expression upserts.
+    """
+    now = timezone.now()
+    targets = [
+        (EmployeeWeekRollup, {"employee_id": employee_id, "week_start": week_start(work_date)}, "days_present"),
+        (EmployeeMonthRollup, {"employee_id": employee_id, "month_start": month_start(work_date)}, "days_present"),
+    ]
+    if department_id is not None:
+        targets.append(
+            (DepartmentDayRollup, {"department_id": department_id, "work_date": work_date}, "employees_present")
+        )
+
+    for model, lookup, count_field in targets:
+        update_or_insert(
+            model,
+            lookup=lookup,
+            updates={
+                "total_work_duration": F("total_work_duration") + Value(work_delta, output_field=DurationField()),
+                "total_overtime_duration": F("total_overtime_duration") + Value(overtime_delta, output_field=DurationField()),
+                count_field: F(count_field) + present_delta,
+                "updated_at": now,
+            },
+            defaults={
+                "total_work_duration": work_delta,
+                "total_overtime_duration": overtime_delta,
+                count_field: max(present_delta, 0),
+            },
+        )
+
+
+def _totals():
+    return {
+        "work": Sum("total_work_duration"),
+        "overtime": Sum("total_overtime_duration"),
+        "present": Count("id", filter=Q(total_work_duration__gt=ZERO)),
+    }
+
+
+def _employee_period_rows(summaries, trunc) -> dict:
+    rows = (
+        summaries
+        .annotate(period=trunc("work_date"))
+        .values("employee_id", "period")
+        .annotate(**_totals())
+        .order_by()
+    )
+    return {
+        (row["employee_id"], _as_date(row["period"])): (row["work"] or ZERO, row["overtime"] or ZERO, row["present"])
+        for row in rows
+    }
+
+
+def _department_day_rows(summaries) -> dict:
+    rows = (
+        summaries
+        .filter(employee__department__isnull=False)
+        .values("employee__department_id", "work_date")
+        .annotate(**_totals())
+        .order_by()
+    )
+    return {
+        (row["employee__department_id"], row["work_date"]): (row["work"] or ZERO, row["overtime"] or ZERO, row["present"])
+        for row in rows
+    }
+
+
+def _as_date(value) -> date:
+    return value.date() if hasattr(value, "date") else value
+
+
+def _write(model, owner_field: str, period_field: str, count_field: str, totals: dict) -> int:
+    model.objects.bulk_create(
+        [
+            model(**{
+                f"{owner_field}_id": owner_id,
+                period_field: period,
+                "total_work_duration": work,
+                "total_overtime_duration": overtime,
+                count_field: present,
+            })
+            for (owner_id, period), (work, overtime, present) in totals.items()
+        ],
+        batch_size=ROLLUP_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=[owner_field, period_field],
+        update_fields=["total_work_duration", "total_overtime_duration", count_field, "updated_at"],
+    )
+    return len(totals)
+
+
+def _expected(summaries) -> tuple[dict, dict, dict]:
+    return (
+        _employee_period_rows(summaries, TruncWeek),
+        _employee_period_rows(summaries, TruncMonth),
+        _department_day_rows(summaries),
+    )
+
+
+def refresh(keys: Iterable[tuple[int, date]]) -> None:
+    """
+    Recompute the rollup rows covering the given (employee_id, work_date)
+    pairs from AttendanceDaySummary.
+    """
+    keys = set(keys)
+    if not keys:
+        return
+
+    employee_ids = {employee_id for employee_id, _ in keys}
+    departments = dict(
+        Employee.objects
+        .filter(pk__in=employee_ids, department__isnull=False)
+        .values_list("pk", "department_id")
+    )
+
+    weeks = {(e, week_start(d)) for e, d in keys}
+    months = {(e, month_start(d)) for e, d in keys}
+    department_days = {(departments[e], d) for e, d in keys if e in departments}
+
+    in_range, _, _ = _range_summaries(min(d for _, d in keys), max(d for _, d in keys))
+    week_rows, month_rows, _ = _expected(in_range.filter(employee_id__in=employee_ids))
+    department_rows = _department_day_rows(
+        AttendanceDaySummary.objects.filter(
+            employee__department_id__in={d for d, _ in department_days},
+            work_date__in={d for _, d in department_days},
+        )
+    )
+
+    empty = (ZERO, ZERO, 0)
+    with transaction.atomic():
+        _write(EmployeeWeekRollup, "employee", "week_start", "days_present",
+               {key: week_rows.get(key, empty) for key in weeks})
+        _write(EmployeeMonthRollup, "employee", "month_start", "days_present",
+               {key: month_rows.get(key, empty) for key in months})
+        _write(DepartmentDayRollup, "department", "work_date", "employees_present",
+               {key: department_rows.get(key, empty) for key in department_days})
+
+
+def _range_summaries(start: Optional[date], end: Optional[date]):
+    """
+    Summaries covering whole weeks and months around [start, end].
+    """
+    summaries = AttendanceDaySummary.objects.all()
+    if start is not None:
+        start = min(week_start(start), month_start(start))
+        summaries = summaries.filter(work_date__gte=start)
+    if end is not None:
+        next_month = month_start(end) + timedelta(days=32)
+        end = max(week_start(end) + timedelta(days=6), month_start(next_month) - timedelta(days=1))
+        summaries = summaries.filter(work_date__lte=end)
+    return summaries, start, end
+
+
+def _stored(model, owner_field: str, period_field: str, count_field: str, start, end) -> dict:
+    rows = model.objects.all()
+    if start is not None:
+        rows = rows.filter(**{f"{period_field}__gte": start})
+    if end is not None:
+        rows = rows.filter(**{f"{period_field}__lte": end})
+    return {
+        (owner_id, period): (work, overtime, present)
+        for owner_id, period, work, overtime, present in rows.values_list(
+            f"{owner_field}_id", period_field, "total_work_duration", "total_overtime_duration", count_field
+        )
+    }
+
+
+ROLLUPS = [
+    (EmployeeWeekRollup, "employee", "week_start", "days_present"),
+    (EmployeeMonthRollup, "employee", "month_start", "days_present"),
+    (DepartmentDayRollup, "department", "work_date", "employees_present"),
+]
+
+
+def backfill(start: Optional[date] = None, end: Optional[date] = None) -> dict[str, int]:
+    """
+    Rebuild every rollup row overlapping [start, end] from the summaries.
+    Rows with no remaining summaries are reset to zero.
+
+    Returns the number of rows written per rollup model.
+    """
+    summaries, start, end = _range_summaries(start, end)
+    written = {}
+
+    with transaction.atomic():
+        for (model, owner, period, count), expected in zip(ROLLUPS, _expected(summaries)):
+            totals = dict.fromkeys(_stored(model, owner, period, count, start, end), (ZERO, ZERO, 0))
+            totals.update(expected)
+            written[model.__name__] = _write(model, owner, period, count, totals)
+
+    return written
+
+
+def check(start: Optional[date] = None, end: Optional[date] = None) -> dict[str, list]:
+    """
+    Compare stored rollups with totals recomputed from the summaries.
+
+    Returns, per rollup model, a list of ``(key, stored, expected)`` for
+    every row that differs.
+    """
+    summaries, start, end = _range_summaries(start, end)
+    mismatches = {}
+
+    for (model, owner, period, count), expected in zip(ROLLUPS, _expected(summaries)):
+        stored = _stored(model, owner, period, count, start, end)
+        empty = (ZERO, ZERO, 0)
+        mismatches[model.__name__] = [
+            (key, stored.get(key, empty), expected.get(key, empty))
+            for key in sorted(set(stored) | set(expected), key=str)
+            if stored.get(key, empty) != expected.get(key, empty)
+        ]
+
+    return mismatches
+
+
+def weekly_totals(employee_id: int, start: date, end: date) -> list[dict]:
+    """
+    Week rollups for one employee whose weeks overlap [start, end].
+    """
+    return list(
+        EmployeeWeekRollup.objects
+        .filter(employee_id=employee_id, week_start__gte=week_start(start), week_start__lte=end)
+        .order_by("week_start")
+        .values("week_start", "total_work_duration", "total_overtime_duration", "days_present")
+    )
@@ -1,8 +1,34 @@
 from rest_framework import serializers
-from .models import WorkSession, AttendanceDaySummary
+from . import edits, services
+from .edits import MAX_REVIEW_BATCH
+from .models import WorkSession, AttendanceDaySummary, ClockEvent, SessionEditRequest
 
 
-class WorkSessionSerializer(serializers.ModelSerializer):
+class SparseFieldsMixin:
+    """
+    Trim the serializer to the comma-separated ``?fields=`` query parameter.
+    Unknown names are ignored; no parameter keeps every field.
+    """
+    fields_query_param = "fields"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = self.requested_fields(self.context.get("request"))
+        if requested is not None:
+            for name in set(self.fields) - requested:
+                self.fields.pop(name)
+
+    @classmethod
+    def requested_fields(cls, request):
+        if request is None:
+            return None
+        value = request.query_params.get(cls.fields_query_param)
+        if not value:
+            return None
+        return {name.strip() for name in value.split(",") if name.strip()}
+
+
+class WorkSessionSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     employee_name = serializers.ReadOnlyField(source="employee.get_full_name")
     duration_display = serializers.SerializerMethodField()
     employee = serializers.PrimaryKeyRelatedField(read_only=True)
@@ -31,7 +57,7 @@ class WorkSessionSerializer(serializers.ModelSerializer):
         return "00:00:00"
 
 
-class AttendanceDaySummarySerializer(serializers.ModelSerializer):
+class AttendanceDaySummarySerializer(SparseFieldsMixin, serializers.ModelSerializer):
     employee_name = serializers.ReadOnlyField(source="employee.get_full_name")
     employee = serializers.PrimaryKeyRelatedField(read_only=True)
 
@@ -45,3 +71,96 @@ class AttendanceDaySummarySerializer(serializers.ModelSerializer):
             "total_work_duration",
             "total_earnings",
         ]
+
+
+class ClockEventSerializer(serializers.Serializer):
+    """
+    One event in a batch clock event upload.
+    """
+    idempotency_key = serializers.CharField(max_length=100)
+    employee_code = serializers.CharField(max_length=50)
+    action = serializers.ChoiceField(choices=ClockEvent.ACTION_CHOICES)
+    timestamp = serializers.DateTimeField()
+    source = serializers.ChoiceField(choices=WorkSession.SOURCE_CHOICES, default="KIOSK")
+
+
+class SessionEditRequestSerializer(serializers.ModelSerializer):
+    """
+    A correction submitted by the authenticated employee. Leave ``session``
+    empty to request a missing session.
+    """
+    session = serializers.PrimaryKeyRelatedField(
+        queryset=WorkSession.objects.all(),
+        required=False,
+        allow_null=True,
+    )
+
+    class Meta:
+        model = SessionEditRequest
+        fields = [
+            "id",
+            "employee",
+            "department",
+            "session",
+            "clock_in_at",
+            "clock_out_at",
+            "reason",
+            "status",
+            "reviewed_by",
+            "reviewed_at",
+            "review_note",
+            "created_at",
+        ]
+        read_only_fields = [
+            "employee",
+            "department",
+            "status",
+            "reviewed_by",
+            "reviewed_at",
+            "review_note",
+            "created_at",
+        ]
+
+    def validate_session(self, session):
+        if session is None:
+            return session
+        if session.employee_id != self.context["request"].user.pk:
+            raise serializers.ValidationError("You can only request edits to your own sessions.")
+        if session.clock_out_at is None:
+            raise serializers.ValidationError("Clock out before requesting an edit to this session.")
+        return session
+
+    def validate(self, attrs):
+        employee = self.context["request"].user
+        clock_in_at, clock_out_at = attrs["clock_in_at"], attrs["clock_out_at"]
+        if clock_out_at <= clock_in_at:
+            raise serializers.ValidationError({"clock_out_at": "Must be after clock_in_at."})
+
+        limit = services.max_session_duration(employee)
+        if clock_out_at - clock_in_at > limit:
+            raise serializers.ValidationError(
+                {"clock_out_at": f"Sessions cannot be longer than {limit}."}
+            )
+
+        clash = edits.overlapping(employee, clock_in_at, clock_out_at, exclude=attrs.get("session")).first()
+        if clash is not None:
+            raise serializers.ValidationError(
+                f"Overlaps session {clash.pk} ({clash.clock_in_at} - {clash.clock_out_at or 'open'})."
+            )
+        return attrs
+
+
+class SessionEditReviewSerializer(serializers.Serializer):
+    """
+    A manager's decision on a batch of edit requests.
+    """
+    APPROVE = "approve"
+    REJECT = "reject"
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=MAX_REVIEW_BATCH,
+    )
+    action = serializers.ChoiceField(choices=[APPROVE, REJECT])
+    note = serializers.CharField(required=False, allow_blank=True, default="")
@@ -1,7 +1,21 @@
-from datetime import datetime, timedelta
-from typing import Optional
+import itertools
+import time
+from datetime import date, datetime, timedelta
+from typing import Iterable, Iterator, Optional
 
-from django.db import transaction
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import (
+    Case,
+    DateTimeField,
+    DurationField,
+    ExpressionWrapper,
+    F,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.db.models.lookups import GreaterThan
 from django.utils import timezone
 
 from apps.attendance.exceptions import (
@@ -9,15 +23,46 @@ from apps.attendance.exceptions import (
     AlreadyClockedInError,
     NotClockedInError,
 )
-from apps.attendance.models import WorkSession, AttendanceDaySummary
+from apps.attendance import archive, bucketing, events, rollups
+from apps.attendance.models import WorkSession, AttendanceDaySummary, ClockEvent, OpenSession
+from apps.attendance.utils import (
+    insert_ignoring_conflicts,
+    returning_supported,
+    update_or_insert_returning,
+    update_returning,
+)
 from apps.users.models import Employee
 
+EXPECTED_WORK_DURATION = timedelta(hours=8)
+
+# Summary rows per INSERT ... ON CONFLICT statement during rebuilds.
+SUMMARY_BATCH_SIZE = 1000
+
+# Open sessions closed per transaction by close_stale_sessions.
+STALE_BATCH_SIZE = 500
+
+# WorkSession columns returned by clock_out.
+_SESSION_COLUMNS = [field.attname for field in WorkSession._meta.concrete_fields]
+
 
 def _now(when: Optional[datetime] = None) -> datetime:
     """Return an aware datetime in the current timezone."""
     return when if when is not None else timezone.now()
 
 
+def _send_on_commit(signal, session: WorkSession) -> None:
+    """Send a clock signal once the surrounding transaction commits."""
+    transaction.on_commit(lambda: signal.send(sender=WorkSession, session=session))
+
+
+def _summaries_changed_on_commit(keys: Iterable[tuple[int, date]]) -> None:
+    """Send summaries_changed for these keys once the transaction commits."""
+    keys = set(keys)
+    transaction.on_commit(
+        lambda: events.summaries_changed.send(sender=AttendanceDaySummary, keys=keys)
+    )
+
+
 @transaction.atomic
 def clock_in(
     employee: Employee,
@@ -31,29 +76,26 @@ def clock_in(
         AlreadyClockedInError: if there is an open session.
     """
     when = _now(when)
+    work_date = bucketing.local_work_date(when, employee.timezone)
 
-    # Lock rows to avoid race conditions with concurrent requests.
-    open_session = (
-        WorkSession.objects
-        .select_for_update()
-        .filter(employee=employee, clock_out_at__isnull=True)
-        .first()
-    )
-    if open_session:
+    # The post_save receiver inserts the OpenSession row, whose primary key
+    # is the employee, so a concurrent or repeated clock-in fails on insert
+    # instead of needing a locking pre-read.
+    try:
+        with transaction.atomic():
+            session = WorkSession.objects.create(
+                employee=employee,
+                clock_in_at=when,
+                clock_in_source=source,
+                work_date=work_date,
+                total_work_duration=timedelta(0),
+                is_overtime=False,
+            )
+    except IntegrityError:
         raise AlreadyClockedInError("Employee already has an open work session.")
 
-    work_date = when.date()
-
-    session = WorkSession.objects.create(
-        employee=employee,
-        clock_in_at=when,
-        clock_in_source=source,
-        work_date=work_date,
-        total_work_duration=timedelta(0),
-        is_overtime=False,
-    )
-
-    _update_daily_summary_for_session(session)
+    _ensure_daily_summary(employee.pk, work_date)
+    _send_on_commit(events.session_clocked_in, session)
 
     return session
 
@@ -65,86 +107,610 @@ def clock_out(
     when: Optional[datetime] = None,
 ) -> WorkSession:
     """
-    Close the employee's open work session.
+    Close the employee's open work session and return it as stored.
 
     Raises:
         NotClockedInError: if no open session exists.
     """
     when = _now(when)
 
-    session = (
-        WorkSession.objects
-        .select_for_update()
-        .filter(employee=employee, clock_out_at__isnull=True)
-        .first()
-    )
-    if not session:
+    open_session = _pop_open_session(employee.pk)
+    if open_session is None:
         raise NotClockedInError("Employee does not have an open work session.")
 
-    if when <= session.clock_in_at:
+    if when <= open_session.clock_in_at:
         # Defensive: ensure positive duration.
-        when = session.clock_in_at + timedelta(seconds=1)
-
-    session.clock_out_at = when
-    session.clock_out_source = source
-    session.total_work_duration = session.clock_out_at - session.clock_in_at
-    session.work_date = session.clock_in_at.date()
-    session.save(update_fields=[
-        "clock_out_at",
-        "clock_out_source",
-        "total_work_duration",
-        "work_date",
-        "updated_at",
-    ])
-
-    _update_daily_summary_for_session(session)
+        when = open_session.clock_in_at + timedelta(seconds=1)
+
+    # A queryset update skips post_save; the summary delta is applied below.
+    # The row comes back from the same statement where RETURNING is
+    # supported.
+    sessions = WorkSession.objects.filter(pk=open_session.session_id)
+    updates = {
+        "clock_out_at": when,
+        "clock_out_source": source,
+        "total_work_duration": when - open_session.clock_in_at,
+        "updated_at": timezone.now(),
+    }
+    if returning_supported(connection):
+        values = update_returning(sessions, updates, _SESSION_COLUMNS)
+    else:
+        sessions.update(**updates)
+        values = sessions.values_list(*_SESSION_COLUMNS).get()
+    session = WorkSession.from_db(connection.alias, _SESSION_COLUMNS, values)
+    session.employee = employee
+
+    _apply_session_to_summary(session)
+    _send_on_commit(events.session_clocked_out, session)
 
     return session
 
 
-def _update_daily_summary_for_session(session: WorkSession) -> None:
+_OPEN_SESSION_COLUMNS = ["session", "clock_in_at", "clock_in_source", "work_date"]
+
+
+def _pop_open_session(employee_id: int) -> Optional[OpenSession]:
     """
-    Rebuild the AttendanceDaySummary for the session's employee and date.
+    Delete the employee's OpenSession row and return it as it was, or None
+    if they are not clocked in.
+
+    Uses a single ``DELETE ... RETURNING`` where the database supports it,
+    otherwise a locked read followed by a delete.
     """
-    employee = session.employee
-    work_date = session.work_date
+    if not returning_supported(connection):
+        open_session = (
+            OpenSession.objects
+            .select_for_update()
+            .filter(employee_id=employee_id)
+            .first()
+        )
+        if open_session is not None:
+            OpenSession.objects.filter(employee_id=employee_id).delete()
+        return open_session
+
+    meta = OpenSession._meta
+    fields = [meta.get_field(name) for name in _OPEN_SESSION_COLUMNS]
+    quote = connection.ops.quote_name
+    sql = "DELETE FROM {table} WHERE {pk} = %s RETURNING {columns}".format(
+        table=quote(meta.db_table),
+        pk=quote(meta.pk.column),
+        columns=", ".join(quote(field.column) for field in fields),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [employee_id])
+        row = cursor.fetchone()
+    if row is None:
+        return None
+
+    values = {}
+    for field, value in zip(fields, row):
+        # Apply the same conversions the ORM would (e.g. SQLite datetimes).
+        column = field.get_col(meta.db_table)
+        for converter in connection.ops.get_db_converters(column) + field.get_db_converters(connection):
+            value = converter(value, column, connection)
+        values[field.attname] = value
+
+    return OpenSession(employee_id=employee_id, **values)
+
+
+@transaction.atomic
+def ingest_clock_events(batch: list[dict]) -> list[dict]:
+    """
+    Apply a batch of clock events for many employees.
+
+    Each event is a dict with ``idempotency_key``, ``employee_code``,
+    ``action`` (ClockEvent.CLOCK_IN / CLOCK_OUT), ``timestamp`` and
+    ``source``. The idempotency keys are claimed first by inserting their
+    ClockEvent rows; keys already recorded, or taken by a concurrent batch,
+    are duplicates. Events are then replayed per employee in timestamp
+    order against the open sessions, which are read and locked in one
+    query. Sessions are written with bulk_create/bulk_update and each
+    affected summary is rebuilt once.
+
+    Returns one result dict per event, in input order, with ``status`` set
+    to "applied", "duplicate" or "rejected".
+    """
+    results: list[Optional[dict]] = [None] * len(batch)
+
+    def _result(index, status, session=None, detail=""):
+        results[index] = {
+            "index": index,
+            "idempotency_key": batch[index]["idempotency_key"],
+            "status": status,
+            "session": session,
+            "detail": detail,
+        }
+
+    seen = dict(
+        ClockEvent.objects
+        .filter(idempotency_key__in={e["idempotency_key"] for e in batch})
+        .values_list("idempotency_key", "session_id")
+    )
+    employees = {
+        e.employee_code: e
+        for e in Employee.objects.filter(employee_code__in={e["employee_code"] for e in batch})
+    }
+    order = sorted(range(len(batch)), key=lambda i: (batch[i]["timestamp"], i))
+
+    # Claim the keys before anything else. A concurrent replay of the same
+    # events waits on the unique index here and then finds them taken.
+    claims = {}
+    for index in order:
+        event = batch[index]
+        key = event["idempotency_key"]
+        employee = employees.get(event["employee_code"])
+        if key in seen or key in claims or employee is None:
+            continue
+        claims[key] = ClockEvent(
+            idempotency_key=key,
+            employee=employee,
+            action=event["action"],
+            occurred_at=event["timestamp"],
+            source=event["source"],
+        )
+    claimed = insert_ignoring_conflicts(ClockEvent, list(claims.values()), "idempotency_key")
+    lost = claims.keys() - claimed.keys()
+    if lost:
+        seen.update(
+            ClockEvent.objects
+            .filter(idempotency_key__in=lost)
+            .values_list("idempotency_key", "session_id")
+        )
+
+    open_sessions = {
+        entry.employee_id: entry.session
+        for entry in (
+            OpenSession.objects
+            .select_for_update()
+            .select_related("session")
+            .filter(employee__in=employees.values())
+        )
+    }
+
+    new_sessions: list[WorkSession] = []
+    closed_sessions: list[WorkSession] = []
+    applied: list[tuple[int, WorkSession]] = []
+    duplicates: list[tuple[int, str]] = []
+    now = timezone.now()
+
+    for index in order:
+        event = batch[index]
+        key = event["idempotency_key"]
+
+        if key in seen or key in lost:
+            duplicates.append((index, key))
+            continue
+
+        employee = employees.get(event["employee_code"])
+        if employee is None:
+            _result(index, "rejected", detail="Unknown employee_code.")
+            continue
+
+        when = event["timestamp"]
+        source = event["source"]
+
+        if event["action"] == ClockEvent.CLOCK_IN:
+            if employee.pk in open_sessions:
+                _result(index, "rejected", detail="Employee already has an open work session.")
+                continue
+
+            session = WorkSession(
+                employee=employee,
+                clock_in_at=when,
+                clock_in_source=source,
+                work_date=bucketing.local_work_date(when, employee.timezone),
+                total_work_duration=timedelta(0),
+                is_overtime=False,
+            )
+            open_sessions[employee.pk] = session
+            new_sessions.append(session)
+        else:
+            session = open_sessions.pop(employee.pk, None)
+            if session is None:
+                _result(index, "rejected", detail="Employee does not have an open work session.")
+                continue
+            session.employee = employee
+
+            if when <= session.clock_in_at:
+                # Defensive: ensure positive duration.
+                when = session.clock_in_at + timedelta(seconds=1)
+
+            session.clock_out_at = when
+            session.clock_out_source = source
+            session.total_work_duration = session.clock_out_at - session.clock_in_at
+            if session.pk is not None:
+                session.updated_at = now
+                closed_sessions.append(session)
+
+        seen[key] = session
+        applied.append((index, session))
+        _send_on_commit(
+            events.session_clocked_in
+            if event["action"] == ClockEvent.CLOCK_IN
+            else events.session_clocked_out,
+            session,
+        )
+
+    # Close existing sessions first so new open sessions do not collide with
+    # uniq_open_session_per_employee or OpenSession's primary key.
+    WorkSession.objects.bulk_update(
+        closed_sessions,
+        ["clock_out_at", "clock_out_source", "total_work_duration", "updated_at"],
+        batch_size=SUMMARY_BATCH_SIZE,
+    )
+    if closed_sessions:
+        OpenSession.objects.filter(
+            session_id__in=[session.pk for session in closed_sessions]
+        ).delete()
+
+    WorkSession.objects.bulk_create(new_sessions, batch_size=SUMMARY_BATCH_SIZE)
+    OpenSession.objects.bulk_create(
+        [
+            OpenSession(
+                employee_id=session.employee_id,
+                session=session,
+                clock_in_at=session.clock_in_at,
+                clock_in_source=session.clock_in_source,
+                work_date=session.work_date,
+            )
+            for session in new_sessions
+            if session.clock_out_at is None
+        ],
+        batch_size=SUMMARY_BATCH_SIZE,
+    )
+
+    ClockEvent.objects.bulk_update(
+        [
+            ClockEvent(
+                pk=claimed[batch[index]["idempotency_key"]],
+                action=batch[index]["action"],
+                occurred_at=batch[index]["timestamp"],
+                source=batch[index]["source"],
+                session=session,
+            )
+            for index, session in applied
+        ],
+        ["action", "occurred_at", "source", "session"],
+        batch_size=SUMMARY_BATCH_SIZE,
+    )
+    # Rejected events give their key back, so a corrected retry applies.
+    applied_keys = {batch[index]["idempotency_key"] for index, _ in applied}
+    ClockEvent.objects.filter(
+        pk__in=[pk for key, pk in claimed.items() if key not in applied_keys]
+    ).delete()
+
+    rebuild_daily_summaries_for(
+        (session.employee_id, day)
+        for _, session in applied
+        for day in bucketing.session_days(session, session.employee.timezone)
+    )
+
+    for index, session in applied:
+        _result(index, "applied", session=session.pk)
+    for index, key in duplicates:
+        earlier = seen.get(key)
+        _result(index, "duplicate", session=getattr(earlier, "pk", earlier))
+
+    return results
+
+
+def max_session_duration(employee: Employee) -> timedelta:
+    """
+    Longest session allowed for ``employee``: the shorter of their role's
+    and department's max_session_duration, or the configured default when
+    neither is set. Matches ``_session_deadline``.
+    """
+    limits = [
+        group.max_session_duration
+        for group in (employee.role, employee.department)
+        if group is not None and group.max_session_duration is not None
+    ]
+    if limits:
+        return min(limits)
+    return getattr(settings, "ATTENDANCE_MAX_SESSION_DURATION", bucketing.DEFAULT_MAX_SESSION_DURATION)
+
 
-    sessions = WorkSession.objects.filter(
-        employee=employee,
-        work_date=work_date,
-        clock_out_at__isnull=False,
+def _session_deadline():
+    """
+    Expression for when an OpenSession times out: clock-in plus the
+    shorter of the role's and department's max_session_duration, or the
+    configured default when neither is set.
+    """
+    role = F("employee__role__max_session_duration")
+    department = F("employee__department__max_session_duration")
+    default = getattr(settings, "ATTENDANCE_MAX_SESSION_DURATION", bucketing.DEFAULT_MAX_SESSION_DURATION)
+    limit = Coalesce(
+        Least(Coalesce(role, department), Coalesce(department, role)),
+        Value(default, output_field=DurationField()),
+        output_field=DurationField(),
     )
+    return ExpressionWrapper(F("clock_in_at") + limit, output_field=DateTimeField())
+
+
+def _close_stale_batch(now: datetime, batch_size: int) -> list[WorkSession]:
+    with transaction.atomic():
+        # Rows locked by a concurrent clock-out are skipped, not waited on.
+        entries = list(
+            OpenSession.objects
+            .select_related("employee")
+            .annotate(deadline=_session_deadline())
+            .filter(deadline__lte=now)
+            .select_for_update(skip_locked=True, of=("self",))
+            .order_by("clock_in_at")[:batch_size]
+        )
+        if not entries:
+            return []
+
+        OpenSession.objects.filter(pk__in=[entry.pk for entry in entries]).delete()
+
+        sessions = []
+        for entry in entries:
+            session = WorkSession(
+                pk=entry.session_id,
+                employee=entry.employee,
+                clock_in_at=entry.clock_in_at,
+                clock_in_source=entry.clock_in_source,
+                clock_out_at=entry.deadline,
+                clock_out_source="AUTO_TIMEOUT",
+                total_work_duration=entry.deadline - entry.clock_in_at,
+                work_date=entry.work_date,
+                updated_at=now,
+            )
+            session._state.adding = False
+            sessions.append(session)
 
-    total_work = timedelta(0)
-    for s in sessions:
-        if s.total_work_duration:
-            total_work += s.total_work_duration
+        WorkSession.objects.bulk_update(
+            sessions,
+            ["clock_out_at", "clock_out_source", "total_work_duration", "updated_at"],
+            batch_size=SUMMARY_BATCH_SIZE,
+        )
+        rebuild_daily_summaries_for(
+            (s.employee_id, day)
+            for s in sessions
+            for day in bucketing.session_days(s, s.employee.timezone)
+        )
+
+        for session in sessions:
+            _send_on_commit(events.session_clocked_out, session)
+
+    return sessions
+
+
+def close_stale_sessions(
+    now: Optional[datetime] = None,
+    batch_size: int = STALE_BATCH_SIZE,
+) -> Iterator[dict]:
+    """
+    Close open sessions that have run past their maximum duration.
+
+    Each session is clocked out at its deadline with source AUTO_TIMEOUT.
+    Sessions are processed ``batch_size`` at a time, each batch in its own
+    transaction with one bulk update and one summary rebuild.
+
+    Yields ``{"closed": n, "seconds": t}`` per batch.
+    """
+    now = _now(now)
+    while True:
+        started = time.monotonic()
+        closed = _close_stale_batch(now, batch_size)
+        if closed:
+            yield {"closed": len(closed), "seconds": time.monotonic() - started}
+        if len(closed) < batch_size:
+            return
 
-    expected = timedelta(hours=8)
 
-    summary, created = AttendanceDaySummary.objects.get_or_create(
-        employee=employee,
-        work_date=work_date,
+def _ensure_daily_summary(employee_id: int, work_date: date) -> None:
+    """
+    Create an empty AttendanceDaySummary for the day if none exists yet.
+    """
+    AttendanceDaySummary.objects.bulk_create(
+        [
+            AttendanceDaySummary(
+                employee_id=employee_id,
+                work_date=work_date,
+                expected_work_duration=EXPECTED_WORK_DURATION,
+                total_work_duration=timedelta(0),
+                total_overtime_duration=timedelta(0),
+                status=_compute_status(timedelta(0), EXPECTED_WORK_DURATION),
+            )
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def _apply_session_to_summary(session: WorkSession) -> None:
+    """
+    Add a closed session's time to the AttendanceDaySummary of each local
+    day it covers.
+    """
+    employee = session.employee
+    for work_date, delta in bucketing.split_by_local_day(
+        session.clock_in_at, session.clock_out_at, employee.timezone
+    ):
+        _apply_duration_to_summary(employee, work_date, delta)
+
+
+def _apply_duration_to_summary(employee: Employee, work_date: date, delta: timedelta) -> None:
+    """
+    Add ``delta`` to one AttendanceDaySummary.
+
+    Runs as a single ``UPDATE ... RETURNING`` with F() expressions, which
+    also yields the new total, falling back to an INSERT when the summary
+    row does not exist yet. The resulting change is then applied to the
+    week, month and department-day rollups. Earnings are left to
+    ``earnings.recompute_stale``.
+    """
+    new_total = F("total_work_duration") + Value(delta, output_field=DurationField())
+    lookup = {"employee_id": employee.pk, "work_date": work_date}
+
+    total, expected = update_or_insert_returning(
+        AttendanceDaySummary,
+        lookup=lookup,
+        updates={
+            "total_work_duration": new_total,
+            "total_overtime_duration": Greatest(
+                new_total - F("expected_work_duration"),
+                Value(timedelta(0), output_field=DurationField()),
+                output_field=DurationField(),
+            ),
+            "status": Case(
+                When(
+                    GreaterThan(new_total, Value(timedelta(0), output_field=DurationField())),
+                    then=Value("PRESENT"),
+                ),
+                default=Value("ABSENT"),
+            ),
+            "earnings_stale": True,
+            "updated_at": timezone.now(),
+        },
         defaults={
-            "expected_work_duration": expected,
-            "total_work_duration": total_work,
-            "total_overtime_duration": max(total_work - expected, timedelta(0)),
-            "status": _compute_status(total_work, expected),
+            "expected_work_duration": EXPECTED_WORK_DURATION,
+            "earnings_stale": True,
+            "total_work_duration": delta,
+            "total_overtime_duration": max(delta - EXPECTED_WORK_DURATION, timedelta(0)),
+            "status": _compute_status(delta, EXPECTED_WORK_DURATION),
         },
+        returning=["total_work_duration", "expected_work_duration"],
     )
+    previous = total - delta
+    _summaries_changed_on_commit([(employee.pk, work_date)])
+    rollups.apply_day_change(
+        employee.pk,
+        employee.department_id,
+        work_date,
+        work_delta=delta,
+        overtime_delta=max(total - expected, timedelta(0)) - max(previous - expected, timedelta(0)),
+        present_delta=int(total > timedelta(0)) - int(previous > timedelta(0)),
+    )
+
+
+def _write_summaries(totals: dict[tuple[int, date], timedelta]) -> int:
+    """
+    Upsert AttendanceDaySummary rows from (employee_id, work_date) -> total
+    and refresh the rollups they belong to.
+    """
+    summaries = [
+        AttendanceDaySummary(
+            employee_id=employee_id,
+            work_date=work_date,
+            expected_work_duration=EXPECTED_WORK_DURATION,
+            total_work_duration=total_work,
+            total_overtime_duration=max(total_work - EXPECTED_WORK_DURATION, timedelta(0)),
+            status=_compute_status(total_work, EXPECTED_WORK_DURATION),
+            earnings_stale=True,
+        )
+        for (employee_id, work_date), total_work in totals.items()
+    ]
 
-    if not created:
-        summary.total_work_duration = total_work
-        summary.expected_work_duration = expected
-        summary.total_overtime_duration = max(total_work - expected, timedelta(0))
-        summary.status = _compute_status(total_work, expected)
-        summary.save(update_fields=[
+    AttendanceDaySummary.objects.bulk_create(
+        summaries,
+        batch_size=SUMMARY_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=["employee", "work_date"],
+        update_fields=[
             "total_work_duration",
             "expected_work_duration",
             "total_overtime_duration",
             "status",
+            "earnings_stale",
             "updated_at",
-        ])
+        ],
+    )
+    rollups.refresh(totals)
+    _summaries_changed_on_commit(totals)
+    return len(summaries)
+
+
+def _closed_session_totals(
+    filters: dict,
+    first_day: Optional[date] = None,
+    last_day: Optional[date] = None,
+) -> dict[tuple[int, date], timedelta]:
+    """
+    Closed session time per (employee_id, local day), split at the
+    employee's local midnights, for the sessions matching ``filters``.
+    Archived sessions are included when ``work_date__gte`` reaches back
+    before the hot window.
+    """
+    rows = itertools.chain.from_iterable(
+        source
+        .filter(clock_out_at__isnull=False, **filters)
+        .order_by()
+        .values_list("employee_id", "employee__timezone", "clock_in_at", "clock_out_at")
+        .iterator(chunk_size=SUMMARY_BATCH_SIZE)
+        for source in archive.session_sources(filters.get("work_date__gte"))
+    )
+    return bucketing.bucket_sessions(rows, first_day, last_day)
+
+
+def rebuild_daily_summaries_for(keys: Iterable[tuple[int, date]]) -> int:
+    """
+    Recompute the summaries for the given (employee_id, work_date) pairs
+    from their closed sessions in one grouped query and one bulk upsert.
+    """
+    keys = set(keys)
+    if not keys:
+        return 0
+
+    first_day = min(work_date for _, work_date in keys)
+    last_day = max(work_date for _, work_date in keys)
+
+    # Sessions that started up to lookback_days() earlier can run into these days.
+    found = _closed_session_totals(
+        {
+            "employee_id__in": {employee_id for employee_id, _ in keys},
+            "work_date__gte": bucketing.lookback_start(first_day),
+            "work_date__lte": last_day,
+        },
+        first_day,
+        last_day,
+    )
+
+    totals = {key: found.get(key, timedelta(0)) for key in keys}
+    return _write_summaries(totals)
+
+
+def rebuild_daily_summaries(
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    employee_ids: Optional[Iterable[int]] = None,
+    batch_size: int = 500,
+) -> int:
+    """
+    Recompute every summary in the (inclusive) date range from sessions,
+    ``batch_size`` employees at a time. Summaries whose sessions have all
+    gone are reset to zero.
+
+    Used for full repair; the clock in/out paths maintain summaries
+    incrementally.
+    """
+    employees = Employee.objects.order_by("pk")
+    if employee_ids is not None:
+        employees = employees.filter(pk__in=list(employee_ids))
+    all_ids = list(employees.values_list("pk", flat=True))
+
+    written = 0
+    for i in range(0, len(all_ids), batch_size):
+        batch = all_ids[i:i + batch_size]
+
+        sessions = {"employee_id__in": batch}
+        summaries = AttendanceDaySummary.objects.filter(employee_id__in=batch)
+        if start is not None:
+            sessions["work_date__gte"] = bucketing.lookback_start(start)
+            summaries = summaries.filter(work_date__gte=start)
+        if end is not None:
+            sessions["work_date__lte"] = end
+            summaries = summaries.filter(work_date__lte=end)
+
+        totals = dict.fromkeys(
+            summaries.values_list("employee_id", "work_date"), timedelta(0)
+        )
+        totals.update(_closed_session_totals(sessions, start, end))
+
+        with transaction.atomic():
+            written += _write_summaries(totals)
+
+    return written
 
 
 def _compute_status(total_work: timedelta, expected: timedelta) -> str:
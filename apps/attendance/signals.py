@@ -1,12 +1,50 @@
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 
-from .models import WorkSession
-from . import services
+from apps.users.signals import pay_changed
+from .models import OpenSession, WorkSession
+from . import bucketing, earnings, services
+
+
+@receiver(post_save, sender=WorkSession)
+def track_open_session(sender, instance, created, raw=False, **kwargs):
+    # Every open WorkSession has its OpenSession row, whoever saves it; the
+    # row's primary key is the employee, so a second open session for the
+    # same employee fails with IntegrityError. Bulk writers (batch
+    # ingestion, edits) maintain the rows themselves.
+    if raw:
+        return
+    if instance.clock_out_at:
+        OpenSession.objects.filter(session=instance).delete()
+        return
+    fields = {
+        "clock_in_at": instance.clock_in_at,
+        "clock_in_source": instance.clock_in_source,
+        "work_date": instance.work_date,
+    }
+    if created:
+        OpenSession.objects.create(employee_id=instance.employee_id, session=instance, **fields)
+    else:
+        OpenSession.objects.update_or_create(
+            session=instance, defaults=fields, create_defaults={"employee_id": instance.employee_id, **fields}
+        )
 
 
 @receiver(post_save, sender=WorkSession)
 def recompute_summary_on_session_save(sender, instance, **kwargs):
+    # services.clock_in/clock_out write through queryset updates; this
+    # covers sessions edited or closed elsewhere (e.g. admin).
     if instance.clock_out_at and instance.total_work_duration:
-        # Reuse the tested logic in services
-        services._update_daily_summary_for_session(instance)
+        services.rebuild_daily_summaries_for(
+            (instance.employee_id, day)
+            for day in bucketing.session_days(instance, instance.employee.timezone)
+        )
+
+
+@receiver(pay_changed)
+def recompute_earnings_for_pay_change(sender, employee_ids, **kwargs):
+    # A new rate applies from the start of the current month; earlier
+    # months are closed. The summaries are recomputed by the next
+    # ``compute_earnings --stale`` run.
+    earnings.mark_stale(employee_ids, start=timezone.localdate().replace(day=1))
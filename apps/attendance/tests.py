@@ -0,0 +1,1127 @@
+import csv
+import io
+import json
+import struct
+from array import array
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from types import SimpleNamespace
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import Sum
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.response import Response
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from apps.tracker.occupancy import occupancy
+from apps.users.models import Department, Employee, Role
+from config import routers
+from . import anomalies, archive, bucketing, earnings, edits, events, exports, matrix, rollups, services
+from .exceptions import AlreadyClockedInError, NotClockedInError
+from .exports import SESSIONS
+from .models import (
+    AttendanceAnomaly,
+    AttendanceDaySummary,
+    ClockEvent,
+    DepartmentDayRollup,
+    EmployeeMonthRollup,
+    EmployeeWeekRollup,
+    OpenSession,
+    SessionEditRequest,
+    WorkSession,
+    WorkSessionArchive,
+)
+from .serializers import SessionEditRequestSerializer
+from .utils import insert_ignoring_conflicts, update_or_insert_returning
+
+
+def at(day, hour, minute=0, tz=dt_timezone.utc):
+    return datetime.combine(day, time(hour, minute), tzinfo=tz)
+
+
+def make_employee(code, **fields):
+    return Employee.objects.create(username=code, employee_code=code, **fields)
+
+
+def make_session(employee, clock_in_at, hours, **fields):
+    """A closed session saved the way admin or a script would save it."""
+    return WorkSession.objects.create(
+        employee=employee,
+        clock_in_at=clock_in_at,
+        clock_out_at=clock_in_at + timedelta(hours=hours),
+        total_work_duration=timedelta(hours=hours),
+        work_date=bucketing.local_work_date(clock_in_at, employee.timezone),
+        **fields,
+    )
+
+
+def summary(employee, work_date):
+    return AttendanceDaySummary.objects.get(employee=employee, work_date=work_date)
+
+
+class ClockTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.employee = make_employee("E1", department=self.department)
+        self.day = timezone.localdate() - timedelta(days=7)
+
+    def test_clock_in_opens_session(self):
+        session = services.clock_in(self.employee, when=at(self.day, 9))
+
+        open_session = OpenSession.objects.get(employee=self.employee)
+        self.assertEqual(open_session.session_id, session.pk)
+        self.assertEqual(summary(self.employee, self.day).total_work_duration, timedelta(0))
+
+        with self.assertRaises(AlreadyClockedInError):
+            services.clock_in(self.employee, when=at(self.day, 10))
+
+    def test_clock_out_returns_stored_session(self):
+        services.clock_in(self.employee, source="KIOSK", when=at(self.day, 9))
+        session = services.clock_out(self.employee, source="WEB", when=at(self.day, 17, 30))
+
+        stored = WorkSession.objects.get(pk=session.pk)
+        for field in WorkSession._meta.concrete_fields:
+            self.assertEqual(getattr(session, field.attname), getattr(stored, field.attname), field.name)
+        self.assertEqual(session.total_work_duration, timedelta(hours=8, minutes=30))
+        self.assertFalse(OpenSession.objects.filter(employee=self.employee).exists())
+
+        day = summary(self.employee, self.day)
+        self.assertEqual(day.total_work_duration, timedelta(hours=8, minutes=30))
+        self.assertEqual(day.total_overtime_duration, timedelta(minutes=30))
+        self.assertEqual(day.status, "PRESENT")
+        self.assertTrue(day.earnings_stale)
+
+        with self.assertRaises(NotClockedInError):
+            services.clock_out(self.employee, when=at(self.day, 18))
+
+    def test_clock_out_before_clock_in_is_clamped(self):
+        services.clock_in(self.employee, when=at(self.day, 9))
+        session = services.clock_out(self.employee, when=at(self.day, 8))
+
+        self.assertEqual(session.total_work_duration, timedelta(seconds=1))
+
+    def test_session_opened_outside_services_can_be_closed(self):
+        session = WorkSession.objects.create(
+            employee=self.employee,
+            clock_in_at=at(self.day, 9),
+            clock_in_source="KIOSK",
+            work_date=self.day,
+        )
+        self.assertEqual(OpenSession.objects.get(employee=self.employee).session_id, session.pk)
+
+        closed = services.clock_out(self.employee, when=at(self.day, 12))
+
+        self.assertEqual(closed.pk, session.pk)
+        self.assertEqual(summary(self.employee, self.day).total_work_duration, timedelta(hours=3))
+
+    def test_closing_a_session_by_save_drops_open_session(self):
+        session = services.clock_in(self.employee, when=at(self.day, 9))
+        session.clock_out_at = at(self.day, 11)
+        session.total_work_duration = timedelta(hours=2)
+        session.save()
+
+        self.assertFalse(OpenSession.objects.filter(employee=self.employee).exists())
+        self.assertEqual(summary(self.employee, self.day).total_work_duration, timedelta(hours=2))
+
+
+class DaySummaryTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.employee = make_employee("E1", department=self.department)
+        self.day = timezone.localdate() - timedelta(days=7)
+
+    def test_clock_outs_add_up(self):
+        for start, end in ((8, 12), (13, 17)):
+            services.clock_in(self.employee, when=at(self.day, start))
+            services.clock_out(self.employee, when=at(self.day, end))
+
+        self.assertEqual(summary(self.employee, self.day).total_work_duration, timedelta(hours=8))
+
+    def test_rebuild_matches_incremental_totals(self):
+        services.clock_in(self.employee, when=at(self.day, 20))
+        services.clock_out(self.employee, when=at(self.day + timedelta(days=1), 3))
+        expected = list(
+            AttendanceDaySummary.objects.filter(employee=self.employee)
+            .order_by("work_date")
+            .values_list("work_date", "total_work_duration")
+        )
+
+        AttendanceDaySummary.objects.filter(employee=self.employee).update(total_work_duration=timedelta(0))
+        services.rebuild_daily_summaries(start=self.day, end=self.day + timedelta(days=1))
+
+        self.assertEqual(
+            list(
+                AttendanceDaySummary.objects.filter(employee=self.employee)
+                .order_by("work_date")
+                .values_list("work_date", "total_work_duration")
+            ),
+            expected,
+        )
+
+    def test_update_or_insert_returning(self):
+        lookup = {"employee_id": self.employee.pk, "work_date": self.day}
+        returning = ["total_work_duration", "status"]
+
+        inserted = update_or_insert_returning(
+            AttendanceDaySummary,
+            lookup=lookup,
+            updates={"total_work_duration": timedelta(hours=1)},
+            defaults={"total_work_duration": timedelta(hours=2), "status": "ABSENT"},
+            returning=returning,
+        )
+        updated = update_or_insert_returning(
+            AttendanceDaySummary,
+            lookup=lookup,
+            updates={"total_work_duration": timedelta(hours=1)},
+            defaults={"total_work_duration": timedelta(hours=2), "status": "ABSENT"},
+            returning=returning,
+        )
+
+        self.assertEqual(inserted, (timedelta(hours=2), "ABSENT"))
+        self.assertEqual(updated, (timedelta(hours=1), "ABSENT"))
+
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.employee = make_employee("E1", department=self.department)
+        self.other = make_employee("E2", department=self.department)
+        self.day = timezone.localdate() - timedelta(days=7)
+
+    def shift(self, employee, start, end, day=None):
+        services.clock_in(employee, when=at(day or self.day, start))
+        services.clock_out(employee, when=at(day or self.day, end))
+
+    def assertConsistent(self):
+        self.assertEqual(rollups.check(), {model.__name__: [] for model, *_ in rollups.ROLLUPS})
+
+    def test_clock_outs_apply_deltas(self):
+        self.shift(self.employee, 8, 12)
+        self.shift(self.employee, 13, 19)
+        self.shift(self.other, 9, 13)
+
+        week = EmployeeWeekRollup.objects.get(employee=self.employee, week_start=rollups.week_start(self.day))
+        self.assertEqual(
+            (week.total_work_duration, week.total_overtime_duration, week.days_present),
+            (timedelta(hours=10), timedelta(hours=2), 1),
+        )
+        month = EmployeeMonthRollup.objects.get(employee=self.employee, month_start=rollups.month_start(self.day))
+        self.assertEqual(month.total_work_duration, timedelta(hours=10))
+        department = DepartmentDayRollup.objects.get(department=self.department, work_date=self.day)
+        self.assertEqual(
+            (department.total_work_duration, department.total_overtime_duration, department.employees_present),
+            (timedelta(hours=14), timedelta(hours=2), 2),
+        )
+        self.assertConsistent()
+
+    def test_summary_rebuild_refreshes_rollups(self):
+        self.shift(self.employee, 8, 16)
+        # An admin edit goes through the bulk rebuild, not the delta path.
+        session = WorkSession.objects.get(employee=self.employee)
+        session.clock_out_at = at(self.day, 12)
+        session.total_work_duration = timedelta(hours=4)
+        session.save()
+
+        week = EmployeeWeekRollup.objects.get(employee=self.employee)
+        self.assertEqual(week.total_work_duration, timedelta(hours=4))
+        self.assertConsistent()
+
+    def test_check_reports_drift_and_fix_repairs_it(self):
+        self.shift(self.employee, 8, 16)
+        EmployeeWeekRollup.objects.update(total_work_duration=timedelta(hours=1))
+        DepartmentDayRollup.objects.all().delete()
+
+        mismatches = rollups.check(self.day, self.day)
+        self.assertEqual(len(mismatches["EmployeeWeekRollup"]), 1)
+        key, stored, expected = mismatches["DepartmentDayRollup"][0]
+        self.assertEqual(key, (self.department.pk, self.day))
+        self.assertEqual(stored, (timedelta(0), timedelta(0), 0))
+        self.assertEqual(expected, (timedelta(hours=8), timedelta(0), 1))
+
+        with self.assertRaisesMessage(CommandError, "2 rollup rows are inconsistent"):
+            call_command("check_rollups", stdout=io.StringIO())
+
+        out = io.StringIO()
+        call_command("check_rollups", "--fix", stdout=out)
+        self.assertIn("Repaired 2 rollup rows.", out.getvalue())
+        self.assertConsistent()
+
+    def test_backfill_resets_rows_without_summaries(self):
+        self.shift(self.employee, 8, 16)
+        AttendanceDaySummary.objects.all().delete()
+
+        out = io.StringIO()
+        call_command("backfill_rollups", "--start", self.day.isoformat(), "--end", self.day.isoformat(), stdout=out)
+
+        self.assertIn("EmployeeWeekRollup: 1 rows", out.getvalue())
+        week = EmployeeWeekRollup.objects.get(employee=self.employee)
+        self.assertEqual((week.total_work_duration, week.days_present), (timedelta(0), 0))
+        self.assertConsistent()
+
+    def test_date_range_arguments(self):
+        with self.assertRaisesMessage(CommandError, "--start must be before or equal to --end."):
+            call_command("backfill_rollups", "--start", "2024-02-01", "--end", "2024-01-01", stdout=io.StringIO())
+
+    def test_weekly_endpoint(self):
+        self.shift(self.employee, 8, 18)
+        self.shift(self.other, 8, 12)
+        client = APIClient()
+        client.force_authenticate(self.employee)
+
+        response = client.get("/api/v1/tracker/my-summary/weekly/", {"end": self.day.isoformat()})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {
+            "employee_code": "E1",
+            "weeks": [{
+                "week_start": rollups.week_start(self.day).isoformat(),
+                "total_seconds": 36000,
+                "overtime_seconds": 7200,
+                "days_present": 1,
+            }],
+        })
+        self.assertEqual(client.get("/api/v1/tracker/my-summary/weekly/", {"end": "soon"}).status_code, 400)
+
+
+class IngestTests(TestCase):
+
+    def setUp(self):
+        self.first = make_employee("E1")
+        self.second = make_employee("E2")
+        self.day = timezone.localdate() - timedelta(days=7)
+
+    def event(self, key, code, action, hour):
+        return {
+            "idempotency_key": key,
+            "employee_code": code,
+            "action": action,
+            "timestamp": at(self.day, hour),
+            "source": "KIOSK",
+        }
+
+    def batch(self):
+        return [
+            self.event("e1-out", "E1", ClockEvent.CLOCK_OUT, 17),
+            self.event("e1-in", "E1", ClockEvent.CLOCK_IN, 9),
+            self.event("e2-in", "E2", ClockEvent.CLOCK_IN, 8),
+        ]
+
+    def test_batch_is_applied_in_timestamp_order(self):
+        results = services.ingest_clock_events(self.batch())
+
+        self.assertEqual([r["status"] for r in results], ["applied"] * 3)
+        self.assertEqual(results[0]["session"], results[1]["session"])
+        self.assertEqual(summary(self.first, self.day).total_work_duration, timedelta(hours=8))
+        self.assertEqual(OpenSession.objects.get(employee=self.second).session_id, results[2]["session"])
+        self.assertEqual(
+            dict(ClockEvent.objects.values_list("idempotency_key", "session_id")),
+            {r["idempotency_key"]: r["session"] for r in results},
+        )
+
+    def test_replayed_batch_is_reported_as_duplicates(self):
+        first = services.ingest_clock_events(self.batch())
+        replay = services.ingest_clock_events(self.batch())
+
+        self.assertEqual([r["status"] for r in replay], ["duplicate"] * 3)
+        self.assertEqual([r["session"] for r in replay], [r["session"] for r in first])
+        self.assertEqual(WorkSession.objects.count(), 2)
+        self.assertEqual(ClockEvent.objects.count(), 3)
+
+    def test_repeated_key_within_a_batch_is_applied_once(self):
+        events = [
+            self.event("e1-in", "E1", ClockEvent.CLOCK_IN, 9),
+            self.event("e1-in", "E1", ClockEvent.CLOCK_IN, 9),
+        ]
+        results = services.ingest_clock_events(events)
+
+        self.assertEqual([r["status"] for r in results], ["applied", "duplicate"])
+        self.assertEqual(results[1]["session"], results[0]["session"])
+
+    def test_rejected_events_can_be_retried(self):
+        events = [
+            self.event("x-in", "NOPE", ClockEvent.CLOCK_IN, 9),
+            self.event("e2-out", "E2", ClockEvent.CLOCK_OUT, 17),
+        ]
+        results = services.ingest_clock_events(events)
+
+        self.assertEqual([r["status"] for r in results], ["rejected"] * 2)
+        self.assertFalse(ClockEvent.objects.exists())
+
+        services.clock_in(self.second, when=at(self.day, 8))
+        retry = services.ingest_clock_events(events[1:])
+        self.assertEqual(retry[0]["status"], "applied")
+
+    def test_key_claimed_by_a_concurrent_batch_is_a_duplicate(self):
+        winner = services.clock_in(self.first, when=at(self.day, 9))
+
+        def racing(model, objs, unique_field):
+            # The other batch commits its claim between our read and insert.
+            ClockEvent.objects.create(
+                idempotency_key="e1-in",
+                employee=self.first,
+                action=ClockEvent.CLOCK_IN,
+                occurred_at=at(self.day, 9),
+                source="KIOSK",
+                session=winner,
+            )
+            return insert_ignoring_conflicts(model, objs, unique_field)
+
+        with mock.patch.object(services, "insert_ignoring_conflicts", racing):
+            results = services.ingest_clock_events(self.batch()[1:])
+
+        self.assertEqual([r["status"] for r in results], ["duplicate", "applied"])
+        self.assertEqual(results[0]["session"], winner.pk)
+        self.assertEqual(WorkSession.objects.filter(employee=self.first).count(), 1)
+
+    def test_insert_ignoring_conflicts_skips_taken_keys(self):
+        taken = ClockEvent(
+            idempotency_key="taken", employee=self.first, action=ClockEvent.CLOCK_IN,
+            occurred_at=at(self.day, 9), source="KIOSK",
+        )
+        taken.save()
+        objs = [
+            ClockEvent(
+                idempotency_key=key, employee=self.first, action=ClockEvent.CLOCK_IN,
+                occurred_at=at(self.day, 9), source="KIOSK",
+            )
+            for key in ("taken", "free")
+        ]
+
+        for supported in (True, False):
+            ClockEvent.objects.filter(idempotency_key="free").delete()
+            for obj in objs:
+                obj.pk = None
+            with mock.patch("apps.attendance.utils.returning_supported", return_value=supported):
+                inserted = insert_ignoring_conflicts(ClockEvent, objs, "idempotency_key")
+            self.assertEqual(
+                inserted,
+                {"free": ClockEvent.objects.get(idempotency_key="free").pk},
+            )
+
+
+class StaleSessionTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.now = timezone.now().replace(microsecond=0)
+        self.addCleanup(occupancy.invalidate)
+
+    def open_session(self, code, hours_ago, **fields):
+        employee = make_employee(code, **fields)
+        services.clock_in(employee, when=self.now - timedelta(hours=hours_ago))
+        return employee
+
+    def sweep(self, **kwargs):
+        return list(services.close_stale_sessions(now=self.now, **kwargs))
+
+    def test_closes_at_the_deadline(self):
+        stale = self.open_session("E1", 20)
+        fresh = self.open_session("E2", 2)
+
+        closed = []
+
+        def receiver(sender, session, **kwargs):
+            closed.append(session.pk)
+
+        events.session_clocked_out.connect(receiver)
+        self.addCleanup(events.session_clocked_out.disconnect, receiver)
+        with self.captureOnCommitCallbacks(execute=True):
+            batches = self.sweep()
+
+        self.assertEqual([batch["closed"] for batch in batches], [1])
+        session = WorkSession.objects.get(employee=stale)
+        self.assertEqual(session.clock_out_at, session.clock_in_at + bucketing.DEFAULT_MAX_SESSION_DURATION)
+        self.assertEqual(session.clock_out_source, "AUTO_TIMEOUT")
+        self.assertEqual(session.total_work_duration, timedelta(hours=16))
+        self.assertEqual(closed, [session.pk])
+        self.assertEqual(list(OpenSession.objects.values_list("employee", flat=True)), [fresh.pk])
+
+        work = AttendanceDaySummary.objects.filter(employee=stale).aggregate(total=Sum("total_work_duration"))
+        self.assertEqual(work["total"], timedelta(hours=16))
+
+    def test_shortest_group_limit_wins(self):
+        self.department.max_session_duration = timedelta(hours=10)
+        self.department.save()
+        short_role = Role.objects.create(name="GUARD", max_session_duration=timedelta(hours=6))
+        long_role = Role.objects.create(name="DRIVER", max_session_duration=timedelta(hours=30))
+
+        by_role = self.open_session("E1", 8, department=self.department, role=short_role)
+        by_department = self.open_session("E2", 12, department=self.department, role=long_role)
+        by_default = self.open_session("E3", 20, role=long_role)
+        still_open = self.open_session("E4", 9, department=self.department)
+
+        self.sweep()
+
+        for employee, limit in ((by_role, 6), (by_department, 10), (by_default, 30)):
+            self.assertEqual(services.max_session_duration(employee), timedelta(hours=limit))
+        self.assertEqual(
+            {s.employee_id: s.total_work_duration for s in WorkSession.objects.filter(clock_out_source="AUTO_TIMEOUT")},
+            {by_role.pk: timedelta(hours=6), by_department.pk: timedelta(hours=10)},
+        )
+        self.assertEqual(
+            set(OpenSession.objects.values_list("employee", flat=True)),
+            {by_default.pk, still_open.pk},
+        )
+
+    @override_settings(ATTENDANCE_MAX_SESSION_DURATION=timedelta(hours=4))
+    def test_configured_default(self):
+        employee = self.open_session("E1", 5)
+
+        self.sweep()
+
+        self.assertEqual(WorkSession.objects.get(employee=employee).total_work_duration, timedelta(hours=4))
+
+    def test_batches(self):
+        for number in range(5):
+            self.open_session(f"E{number}", 20 + number)
+
+        self.assertEqual([batch["closed"] for batch in self.sweep(batch_size=2)], [2, 2, 1])
+        self.assertFalse(OpenSession.objects.exists())
+        self.assertEqual(self.sweep(), [])
+
+    def test_command(self):
+        self.open_session("E1", 20)
+        self.open_session("E2", 18)
+
+        out = io.StringIO()
+        with mock.patch.object(services, "_now", return_value=self.now):
+            call_command("close_stale_sessions", "--batch-size", "1", stdout=out)
+
+        output = out.getvalue()
+        self.assertIn("Batch 2: closed 1 sessions", output)
+        self.assertIn("Closed 2 stale sessions", output)
+
+
+def read_columnar(data: bytes) -> tuple[list[str], list[list]]:
+    """Decode a columnar export into its column names and rows."""
+    assert data[:6] == b"OTCOL1"
+    (length,) = struct.unpack(">I", data[6:10])
+    columns = json.loads(data[10:10 + length])["columns"]
+    offset, rows = 10 + length, []
+    while True:
+        (count,) = struct.unpack(">I", data[offset:offset + 4])
+        offset += 4
+        if not count:
+            return [name for name, _ in columns], rows
+        values = []
+        for _, kind in columns:
+            if kind == exports.INT:
+                column = array("q")
+                column.frombytes(data[offset:offset + 8 * count])
+                offset += 8 * count
+                values.append([None if value == exports.NULL_INT else value for value in column])
+            else:
+                (size,) = struct.unpack(">I", data[offset:offset + 4])
+                values.append(data[offset + 4:offset + 4 + size].decode().split("\n"))
+                offset += 4 + size
+        rows.extend(zip(*values))
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.first = make_employee("E1", department=self.department)
+        self.second = make_employee("E2")
+        self.day = timezone.localdate() - timedelta(days=7)
+        self.sessions = [
+            make_session(self.first, at(self.day, 8), 8),
+            make_session(self.second, at(self.day, 9), 4),
+            make_session(self.first, at(self.day + timedelta(days=1), 8), 7),
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(make_employee("ADMIN", is_staff=True))
+
+    def export(self, dataset, **params):
+        return self.client.get(f"/api/v1/attendance/export/{dataset}/", params)
+
+    def test_csv(self):
+        response = self.export("sessions", start=self.day.isoformat(), department=self.department.pk)
+
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="sessions.csv"')
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], SESSIONS.names)
+        self.assertEqual(
+            [(row[0], row[2], row[3], row[8]) for row in rows[1:]],
+            [
+                (str(self.sessions[0].pk), "E1", self.day.isoformat(), "28800"),
+                (str(self.sessions[2].pk), "E1", (self.day + timedelta(days=1)).isoformat(), "25200"),
+            ],
+        )
+
+    def test_columnar(self):
+        response = self.export("sessions", output="columnar", employee=self.first.pk, end=self.day.isoformat())
+
+        names, rows = read_columnar(b"".join(response.streaming_content))
+        self.assertEqual(names, SESSIONS.names)
+        session = self.sessions[0]
+        self.assertEqual(rows, [(
+            session.pk,
+            self.first.pk,
+            "E1",
+            self.day.toordinal(),
+            int(session.clock_in_at.timestamp()) * 1_000_000,
+            int(session.clock_out_at.timestamp()) * 1_000_000,
+            "WEB",
+            "",
+            8 * 3600,
+        )])
+
+    def test_summaries(self):
+        response = self.export("summaries", output="columnar")
+
+        names, rows = read_columnar(b"".join(response.streaming_content))
+        self.assertEqual(names, exports.SUMMARIES.names)
+        self.assertEqual(
+            sorted((row[2], date.fromordinal(row[3]), row[4]) for row in rows),
+            [("E1", self.day, 8 * 3600), ("E1", self.day + timedelta(days=1), 7 * 3600), ("E2", self.day, 4 * 3600)],
+        )
+
+    def test_invalid_requests(self):
+        self.assertEqual(self.export("payroll").status_code, 404)
+        self.assertEqual(self.export("sessions", output="xlsx").status_code, 400)
+        self.assertEqual(self.export("sessions", start="07/01/2025").status_code, 400)
+        self.assertEqual(self.export("sessions", employee="E1").status_code, 400)
+
+    async def test_blocks_stream_asynchronously(self):
+        rows = [(1, 2, "E1", self.day, None, None, "WEB", None, timedelta(hours=1))]
+
+        received = [block async for block in exports.aiter_blocks(exports.stream_csv(SESSIONS, rows))]
+
+        self.assertEqual(received, list(exports.stream_csv(SESSIONS, rows)))
+
+        blocks = exports.stream_csv(SESSIONS, rows)
+        stream = exports.aiter_blocks(blocks)
+        await anext(stream)
+        await stream.aclose()
+        # Leaving early closes the encoder and its cursor.
+        self.assertIsNone(blocks.gi_frame)
+
+
+class PaginationTests(TestCase):
+
+    def setUp(self):
+        self.employee = make_employee("E1", first_name="Ada", last_name="Lovelace")
+        self.start = timezone.localdate() - timedelta(days=10)
+        self.sessions = [
+            make_session(self.employee, at(self.start + timedelta(days=offset), hour), 2)
+            for offset, hour in [(0, 8), (1, 8), (1, 13), (2, 8), (3, 8)]
+        ]
+        make_session(make_employee("E2"), at(self.start, 8), 2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.employee)
+
+    def get(self, url="/api/v1/attendance/sessions/", **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def test_cursor_walks_every_row_once_newest_first(self):
+        page = self.get(page_size=2)
+        ids = [row["id"] for row in page["results"]]
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+            ids.extend(row["id"] for row in page["results"])
+
+        expected = sorted(self.sessions, key=lambda s: (s.work_date, s.pk), reverse=True)
+        self.assertEqual(ids, [s.pk for s in expected])
+
+    def test_page_size_is_clamped(self):
+        self.assertEqual(len(self.get(page_size=0)["results"]), 1)
+        self.assertEqual(len(self.get(page_size="many")["results"]), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/v1/attendance/sessions/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_date_range(self):
+        page = self.get(start=(self.start + timedelta(days=1)).isoformat(), end=(self.start + timedelta(days=2)).isoformat())
+        self.assertEqual(
+            {row["id"] for row in page["results"]},
+            {s.pk for s in self.sessions[1:4]},
+        )
+
+        response = self.client.get("/api/v1/attendance/sessions/", {"start": "yesterday"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as queries:
+            page = self.get(fields="id, work_date,unknown")
+
+        self.assertEqual(set(page["results"][0]), {"id", "work_date"})
+        listing = [q["sql"] for q in queries if "attendance_worksession" in q["sql"]]
+        self.assertTrue(listing)
+        self.assertFalse(any("JOIN" in sql for sql in listing))
+
+        full = self.get(fields="id,employee_name")["results"][0]
+        self.assertEqual(full, {"id": self.sessions[-1].pk, "employee_name": "Ada Lovelace"})
+
+    def test_summaries_share_the_history_behaviour(self):
+        page = self.get("/api/v1/attendance/summaries/", page_size=3, fields="work_date")
+        self.assertEqual(
+            [row["work_date"] for row in page["results"]],
+            [(self.start + timedelta(days=offset)).isoformat() for offset in (3, 2, 1)],
+        )
+        self.assertIsNotNone(page["next"])
+
+
+class LocalDayTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.employee = make_employee("E1", department=self.department)
+        self.day = timezone.localdate() - timedelta(days=7)
+
+    def test_night_shift_splits_at_local_midnight(self):
+        tz = ZoneInfo("America/New_York")
+        self.employee.timezone = "America/New_York"
+        self.employee.save()
+
+        services.clock_in(self.employee, when=at(self.day, 22, tz=tz))
+        services.clock_out(self.employee, when=at(self.day + timedelta(days=1), 6, tz=tz))
+
+        self.assertEqual(summary(self.employee, self.day).total_work_duration, timedelta(hours=2))
+        self.assertEqual(summary(self.employee, self.day + timedelta(days=1)).total_work_duration, timedelta(hours=6))
+
+    def test_bucket_sessions_matches_per_session_split(self):
+        day = datetime(2025, 3, 8).date()
+        rows = [
+            (1, "America/New_York", at(day, 3), at(day, 11)),
+            (2, "Asia/Tokyo", at(day, 14), at(day, 20)),
+            # Earlier and later than the first New York row, across the DST change.
+            (1, "America/New_York", at(day - timedelta(days=3), 23), at(day - timedelta(days=2), 7)),
+            (1, "America/New_York", at(day + timedelta(days=1), 4), at(day + timedelta(days=1), 9)),
+            (3, None, at(day, 22), at(day + timedelta(days=1), 2)),
+            (3, None, at(day, 9), None),
+        ]
+        expected = {}
+        for employee_id, tz_name, start, end in rows:
+            if end is not None:
+                for local_day, duration in bucketing.split_by_local_day(start, end, tz_name):
+                    key = (employee_id, local_day)
+                    expected[key] = expected.get(key, timedelta(0)) + duration
+
+        self.assertEqual(bucketing.bucket_sessions(iter(rows)), expected)
+
+        first_day, last_day = day - timedelta(days=2), day
+        self.assertEqual(
+            bucketing.bucket_sessions(iter(rows), first_day, last_day),
+            {key: value for key, value in expected.items() if first_day <= key[1] <= last_day},
+        )
+
+
+class LookbackTests(TestCase):
+
+    def setUp(self):
+        bucketing._lookback = (0.0, 0)
+        self.addCleanup(setattr, bucketing, "_lookback", (0.0, 0))
+
+    @override_settings(ATTENDANCE_MAX_SESSION_DURATION=timedelta(hours=16))
+    def test_follows_longest_max_session_duration(self):
+        self.assertEqual(bucketing.lookback_days(), 2)
+
+        Role.objects.create(name="DRIVER", max_session_duration=timedelta(hours=60))
+        bucketing._lookback = (0.0, 0)
+
+        self.assertEqual(bucketing.lookback_days(), 4)
+        self.assertEqual(bucketing.lookback_start(datetime(2025, 3, 10).date()), datetime(2025, 3, 6).date())
+
+
+class ArchiveTests(TestCase):
+
+    def setUp(self):
+        self.employee = make_employee("E1")
+        self.old_day = archive.hot_start() - timedelta(days=40)
+        self.recent_day = timezone.localdate() - timedelta(days=3)
+        self.old = make_session(self.employee, at(self.old_day, 9), 6)
+        self.recent = make_session(self.employee, at(self.recent_day, 9), 4)
+
+    def test_archived_columns_match_work_session(self):
+        self.assertCountEqual(
+            archive.ARCHIVED_COLUMNS,
+            [field.column for field in WorkSession._meta.concrete_fields],
+        )
+
+    def test_moves_old_closed_sessions(self):
+        open_old = WorkSession.objects.create(
+            employee=make_employee("E2"), clock_in_at=at(self.old_day, 8), work_date=self.old_day
+        )
+
+        moved = sum(batch["archived"] for batch in archive.archive_sessions())
+
+        self.assertEqual(moved, 1)
+        self.assertCountEqual(WorkSession.objects.values_list("pk", flat=True), [self.recent.pk, open_old.pk])
+        archived = WorkSessionArchive.objects.get()
+        self.assertEqual(archived.pk, self.old.pk)
+        for column in archive.ARCHIVED_COLUMNS:
+            self.assertEqual(getattr(archived, column), getattr(self.old, column), column)
+
+    def test_reads_reaching_back_include_archive(self):
+        list(archive.archive_sessions())
+        AttendanceDaySummary.objects.filter(employee=self.employee).delete()
+
+        services.rebuild_daily_summaries_for([(self.employee.pk, self.old_day)])
+
+        self.assertEqual(summary(self.employee, self.old_day).total_work_duration, timedelta(hours=6))
+        exported = [row[0] for row in SESSIONS.rows(employee_id=self.employee.pk)]
+        self.assertCountEqual(exported, [self.old.pk, self.recent.pk])
+        exported = [row[0] for row in SESSIONS.rows(start=self.recent_day)]
+        self.assertEqual(exported, [self.recent.pk])
+
+    def test_drop_month(self):
+        list(archive.archive_sessions())
+        month = archive.month_start(self.old_day)
+
+        self.assertEqual(archive.archived_months(archive.hot_start()), [month])
+        archive.drop_month(month)
+        self.assertFalse(WorkSessionArchive.objects.exists())
+
+
+class EarningsTests(TestCase):
+
+    def setUp(self):
+        self.employee = make_employee("E1", pay_type="HOURLY", pay_rate=Decimal("20.00"))
+        self.day = timezone.localdate()
+
+    def work(self, hours):
+        services.clock_in(self.employee, when=at(self.day, 1))
+        services.clock_out(self.employee, when=at(self.day, 1) + timedelta(hours=hours))
+
+    def test_day_earnings(self):
+        day = datetime(2025, 2, 10).date()
+        eight = timedelta(hours=8)
+        self.assertEqual(earnings.day_earnings("HOURLY", Decimal("12.50"), day, eight, "PRESENT"), Decimal("100.00"))
+        self.assertEqual(earnings.day_earnings("DAILY", Decimal("90"), day, eight, "PRESENT"), Decimal("90"))
+        self.assertEqual(earnings.day_earnings("DAILY", Decimal("90"), day, timedelta(0), "ABSENT"), Decimal("0.00"))
+        self.assertEqual(earnings.day_earnings("MONTHLY", Decimal("2800"), day, timedelta(0), "HOLIDAY"), Decimal("100.00"))
+        self.assertEqual(earnings.day_earnings("MONTHLY", Decimal("2800"), day, timedelta(0), "ABSENT"), Decimal("0.00"))
+
+    def test_clock_out_leaves_earnings_to_recompute_stale(self):
+        self.work(3)
+        self.assertEqual(summary(self.employee, self.day).total_earnings, Decimal("0.00"))
+
+        self.assertEqual(earnings.recompute_stale(), 1)
+
+        day = summary(self.employee, self.day)
+        self.assertEqual(day.total_earnings, Decimal("60.00"))
+        self.assertFalse(day.earnings_stale)
+        self.assertEqual(earnings.recompute_stale(), 0)
+
+    def test_pay_change_marks_month_stale(self):
+        self.work(3)
+        earnings.recompute_stale()
+
+        self.employee.pay_rate = Decimal("30.00")
+        self.employee.save()
+
+        self.assertTrue(summary(self.employee, self.day).earnings_stale)
+        earnings.recompute_stale()
+        self.assertEqual(summary(self.employee, self.day).total_earnings, Decimal("90.00"))
+
+    def test_saves_without_pay_change(self):
+        self.work(3)
+        earnings.recompute_stale()
+        employee = Employee.objects.get(pk=self.employee.pk)
+
+        # The previous pay is kept from load time, not read back.
+        employee.first_name = "Ann"
+        with self.assertNumQueries(1):
+            employee.save()
+        employee.pay_rate = Decimal("40.00")
+        employee.save(update_fields=["first_name"])
+
+        self.assertFalse(summary(self.employee, self.day).earnings_stale)
+
+    def test_totals(self):
+        self.work(3)
+        earnings.recompute_stale()
+
+        (row,) = earnings.totals(self.day, self.day)
+        self.assertEqual(row["employees"], 1)
+        self.assertEqual(row["total_earnings"], Decimal("60.00"))
+
+
+@override_settings(ATTENDANCE_ANOMALIES={"LAG_SECONDS": 0, "EXPECTED_SOURCES": {"ASM": ["KIOSK"]}})
+class AnomalyTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.employee = make_employee("E1", department=self.department)
+        self.day = timezone.localdate() - timedelta(days=10)
+
+    def scan(self):
+        return sum(chunk["found"] for chunk in anomalies.scan())
+
+    def findings(self, kind):
+        return list(AttendanceAnomaly.objects.filter(kind=kind).order_by("session_id"))
+
+    def test_long_session(self):
+        long = make_session(self.employee, at(self.day, 2), 21, clock_in_source="KIOSK")
+        make_session(self.employee, at(self.day + timedelta(days=2), 8), 8, clock_in_source="KIOSK")
+
+        self.assertEqual(self.scan(), 1)
+        (finding,) = self.findings("long_session")
+        self.assertEqual(finding.session_id, long.pk)
+        self.assertEqual(finding.details["hours"], 21)
+
+    def test_repeated_clamped_sessions(self):
+        clamped = [
+            make_session(self.employee, at(self.day + timedelta(days=offset), 9), 1 / 3600, clock_in_source="KIOSK")
+            for offset in (0, 2, 4)
+        ]
+
+        self.scan()
+
+        self.assertEqual([f.session_id for f in self.findings("repeated_clamped_session")], [s.pk for s in clamped])
+
+    def test_overlap_reported_once(self):
+        first = make_session(self.employee, at(self.day, 8), 4, clock_in_source="KIOSK")
+        second = make_session(self.employee, at(self.day, 11), 4, clock_in_source="KIOSK", is_manual_edit=True)
+
+        self.scan()
+
+        (finding,) = self.findings("overlap")
+        self.assertEqual((finding.session_id, finding.related_session_id), (second.pk, first.pk))
+        self.assertEqual(finding.details, {"overlap_seconds": 3600, "manual_edit": True})
+
+    def test_unexpected_source(self):
+        web = make_session(self.employee, at(self.day, 8), 4, clock_in_source="WEB")
+        make_session(make_employee("E2"), at(self.day, 8), 4, clock_in_source="WEB")
+
+        self.scan()
+
+        (finding,) = self.findings("unexpected_source")
+        self.assertEqual(finding.session_id, web.pk)
+
+    def test_scans_only_new_sessions(self):
+        make_session(self.employee, at(self.day, 2), 21, clock_in_source="KIOSK")
+        self.scan()
+        self.assertEqual(self.scan(), 0)
+
+        anomalies.reset()
+        self.scan()
+        self.assertEqual(AttendanceAnomaly.objects.count(), 1)
+        self.assertEqual(anomalies.counts_by_kind(), {"long_session": 1})
+
+
+class EditReviewTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.manager = make_employee("M1", department=self.department, role=Role.objects.create(name="MANAGER"))
+        self.employee = make_employee("E1", department=self.department)
+        self.day = timezone.localdate() - timedelta(days=5)
+        self.session = make_session(self.employee, at(self.day, 9), 6)
+
+    def test_approve_applies_edits(self):
+        edit = edits.submit(self.employee, at(self.day, 8), at(self.day, 18), "Forgot to clock in", session=self.session)
+        added = edits.submit(self.employee, at(self.day, 19), at(self.day, 21), "Evening shift")
+
+        result = edits.review(self.manager, [edit.pk, added.pk], approve=True, note="ok")
+
+        self.assertEqual(result["reviewed"], sorted([edit.pk, added.pk]))
+        self.assertEqual(result["skipped"], [])
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.total_work_duration, timedelta(hours=10))
+        self.assertEqual(self.session.approved_by, self.manager)
+        self.assertTrue(WorkSession.objects.filter(employee=self.employee, clock_in_at=at(self.day, 19)).exists())
+        self.assertEqual(summary(self.employee, self.day).total_work_duration, timedelta(hours=12))
+        self.assertEqual(
+            set(SessionEditRequest.objects.values_list("status", flat=True)), {SessionEditRequest.APPROVED}
+        )
+
+    def test_reject_leaves_session(self):
+        edit = edits.submit(self.employee, at(self.day, 8), at(self.day, 18), "Forgot", session=self.session)
+
+        result = edits.review(self.manager, [edit.pk], approve=False)
+
+        self.assertEqual(result["status"], SessionEditRequest.REJECTED)
+        self.session.refresh_from_db()
+        self.assertEqual(self.session.total_work_duration, timedelta(hours=6))
+
+    def test_skips_requests_outside_reviewers_department(self):
+        other = make_employee("E2", department=Department.objects.create(name="Shipping", code="SHP"))
+        edit = edits.submit(other, at(self.day, 8), at(self.day, 18), "Forgot")
+
+        result = edits.review(self.manager, [edit.pk], approve=True)
+
+        self.assertEqual(result["skipped"], [edit.pk])
+        self.assertEqual(SessionEditRequest.objects.get().status, SessionEditRequest.PENDING)
+
+    def test_managers_cannot_review_their_own_requests(self):
+        session = make_session(self.manager, at(self.day, 9), 6)
+        edit = edits.submit(self.manager, at(self.day, 6), at(self.day, 22), "Long day", session=session)
+
+        self.assertFalse(edits.pending(self.manager).exists())
+        result = edits.review(self.manager, [edit.pk], approve=True)
+
+        self.assertEqual(result["skipped"], [edit.pk])
+        session.refresh_from_db()
+        self.assertEqual(session.total_work_duration, timedelta(hours=6))
+
+    def validate(self, **data):
+        serializer = SessionEditRequestSerializer(
+            data={"reason": "Forgot", **data}, context={"request": SimpleNamespace(user=self.employee)}
+        )
+        serializer.is_valid()
+        return serializer.errors
+
+    def test_submitted_times_are_validated(self):
+        self.assertEqual(self.validate(clock_in_at=at(self.day, 19), clock_out_at=at(self.day, 21)), {})
+        self.assertEqual(
+            self.validate(clock_in_at=at(self.day, 8), clock_out_at=at(self.day, 18), session=self.session.pk), {}
+        )
+        self.assertIn("clock_out_at", self.validate(clock_in_at=at(self.day, 19), clock_out_at=at(self.day, 18)))
+
+        # Longer than the default 16h limit, or the department's own.
+        self.assertIn("clock_out_at", self.validate(clock_in_at=at(self.day, 1), clock_out_at=at(self.day, 18)))
+        self.department.max_session_duration = timedelta(hours=4)
+        self.department.save()
+        self.employee.refresh_from_db()
+        self.assertIn("clock_out_at", self.validate(clock_in_at=at(self.day, 16), clock_out_at=at(self.day, 21)))
+
+    def test_new_sessions_cannot_overlap(self):
+        errors = self.validate(clock_in_at=at(self.day, 14), clock_out_at=at(self.day, 16))
+
+        self.assertIn(f"Overlaps session {self.session.pk}", errors["non_field_errors"][0])
+
+    def test_skips_edits_of_deleted_sessions(self):
+        edit = edits.submit(self.employee, at(self.day, 8), at(self.day, 18), "Forgot", session=self.session)
+        self.session.delete()
+
+        result = edits.review(self.manager, [edit.pk], approve=True)
+
+        self.assertEqual(result["skipped"], [edit.pk])
+
+
+class MatrixTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.first = make_employee("E1", department=self.department, pay_rate=Decimal("12.50"))
+        self.second = make_employee("E2")
+        # Monday to Sunday, with a night shift crossing into the next week.
+        self.start = timezone.localdate() - timedelta(days=timezone.localdate().weekday() + 14)
+        self.end = self.start + timedelta(days=6)
+        make_session(self.first, at(self.start, 8), 9)
+        make_session(self.first, at(self.end, 20), 6)
+        make_session(self.second, at(self.start + timedelta(days=2), 9), 4)
+        directory = TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def hours(self, values):
+        return [round(float(value) / 3600, 2) for value in values]
+
+    def test_build(self):
+        built = matrix.HoursMatrix.build(self.start, self.end)
+
+        self.assertEqual(built.days, 7)
+        row = built.row(self.first.pk)
+        self.assertEqual(built.groups(row), (self.department.pk, None))
+        self.assertEqual(self.hours(built.totals([row, built.row(self.second.pk)])), [13.0, 4.0])
+        self.assertEqual(list(built.daily_overages(8, [row])), [1.0])
+        self.assertEqual(built.department_totals(), {self.department.pk: 13 * 3600.0, None: 4 * 3600.0})
+
+    def test_saved_matrix_loads_unchanged(self):
+        built = matrix.HoursMatrix.build(self.start, self.end)
+        path = self.directory / matrix.file_name(self.start, self.end)
+        built.save(path)
+
+        loaded = matrix.HoursMatrix.load(path)
+
+        self.assertEqual((loaded.start, loaded.days), (built.start, built.days))
+        self.assertEqual(list(loaded.employee_ids), list(built.employee_ids))
+        self.assertEqual(list(loaded.pay_rates), list(built.pay_rates))
+        self.assertEqual(loaded.groups(0), built.groups(0))
+        self.assertEqual([list(week) for week in loaded.weekly_totals()], [list(week) for week in built.weekly_totals()])
+
+    def test_loaded_matrix_updates_stay_in_memory(self):
+        path = self.directory / "hours.matrix"
+        matrix.HoursMatrix.build(self.start, self.end).save(path)
+        loaded = matrix.HoursMatrix.load(path)
+
+        self.assertTrue(loaded.add_session(self.second, at(self.start, 8), at(self.start, 10)))
+        self.assertFalse(loaded.add_session(make_employee("E3"), at(self.start, 8), at(self.start, 10)))
+
+        self.assertEqual(self.hours(loaded.totals([loaded.row(self.second.pk)])), [6.0])
+        reloaded = matrix.HoursMatrix.load(path)
+        self.assertEqual(self.hours(reloaded.totals([reloaded.row(self.second.pk)])), [4.0])
+
+    def test_load_shared(self):
+        matrix.HoursMatrix.build(self.start, self.end).save(self.directory / matrix.file_name(self.start, self.end))
+        (self.directory / "other.matrix").write_bytes(b"not a matrix")
+
+        with override_settings(ATTENDANCE_MATRIX_DIR=str(self.directory)):
+            self.assertEqual(len(matrix.load_shared(self.start, self.end, max_age=60)), 2)
+            self.assertIsNone(matrix.load_shared(self.start, self.end, max_age=0))
+            self.assertIsNone(matrix.load_shared(self.start, self.end + timedelta(days=1), max_age=60))
+        with self.assertRaises(ValueError):
+            matrix.HoursMatrix.load(self.directory / "other.matrix")
+
+
+class ReadDatabaseView(routers.ReplicaReadMixin, APIView):
+
+    def get(self, request):
+        return Response({"db": routers._read_db.get()})
+
+
+@override_settings(DATABASE_REPLICAS=["replica1"], REPLICA_STICKY_SECONDS=10)
+class ReplicaRoutingTests(TestCase):
+
+    def setUp(self):
+        self.employee = make_employee("E1")
+        patcher = mock.patch.object(routers, "choose_replica", return_value="replica1")
+        self.choose_replica = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def read(self, **cookies):
+        request = APIRequestFactory().get("/")
+        request.COOKIES.update(cookies)
+        force_authenticate(request, user=self.employee)
+        return ReadDatabaseView.as_view()(request).data["db"]
+
+    def test_reads_go_to_a_replica(self):
+        self.assertEqual(self.read(), "replica1")
+        self.assertEqual(routers._read_db.get(), "default")
+
+    def test_recent_writers_read_from_the_primary(self):
+        self.assertEqual(self.read(**{routers.STICKY_COOKIE: "1"}), "default")
+        self.choose_replica.assert_not_called()
+
+    def test_successful_writes_set_the_sticky_cookie(self):
+        def respond(status):
+            return routers.ReplicaStickyMiddleware(lambda request: HttpResponse(status=status))
+
+        factory = RequestFactory()
+        response = respond(201)(factory.post("/"))
+        self.assertEqual(response.cookies[routers.STICKY_COOKIE]["max-age"], 10)
+
+        self.assertNotIn(routers.STICKY_COOKIE, respond(400)(factory.post("/")).cookies)
+        self.assertNotIn(routers.STICKY_COOKIE, respond(200)(factory.get("/")).cookies)
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertNotIn(routers.STICKY_COOKIE, respond(201)(factory.post("/")).cookies)
+
+    def test_cache_entries_and_migrations_use_the_primary(self):
+        router = routers.ReplicaRouter()
+        cache_entry = SimpleNamespace(_meta=SimpleNamespace(app_label=routers.CACHE_APP_LABEL))
+
+        token = routers._read_db.set("replica1")
+        self.addCleanup(routers._read_db.reset, token)
+        self.assertEqual(router.db_for_read(WorkSession), "replica1")
+        self.assertEqual(router.db_for_read(cache_entry), "default")
+        self.assertEqual(router.db_for_write(WorkSession), "default")
+        self.assertFalse(router.allow_migrate("replica1", "attendance"))
+        self.assertTrue(router.allow_migrate("default", "attendance"))
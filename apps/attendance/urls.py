@@ -4,7 +4,11 @@ from .views import (
     WorkSessionViewSet, 
     AttendanceDaySummaryViewSet, 
     ClockInView, 
-    ClockOutView
+    ClockOutView,
+    ClockEventBatchView,
+    AttendanceExportView,
+    EarningsView,
+    SessionEditRequestViewSet,
 )
 
 app_name = 'attendance'
@@ -13,9 +17,11 @@ app_name = 'attendance'
 router = DefaultRouter()
 router.register(r'sessions', WorkSessionViewSet, basename='worksession')
 router.register(r'summaries', AttendanceDaySummaryViewSet, basename='summary')
+router.register(r'edit-requests', SessionEditRequestViewSet, basename='edit-request')
 
 urlpatterns = [
-    # Paths: /api/v1/attendance/sessions/ and /api/v1/attendance/summaries/
+    # Paths: /api/v1/attendance/sessions/, /api/v1/attendance/summaries/ and
+    # /api/v1/attendance/edit-requests/
     path('', include(router.urls)),
     
     # Path: /api/v1/attendance/clock-in/
@@ -23,4 +29,13 @@ urlpatterns = [
     
     # Path: /api/v1/attendance/clock-out/
     path('clock-out/', ClockOutView.as_view(), name='clock-out'),
-]
\ No newline at end of file
+
+    # Path: /api/v1/attendance/clock-events/batch/
+    path('clock-events/batch/', ClockEventBatchView.as_view(), name='clock-events-batch'),
+
+    # Path: /api/v1/attendance/export/sessions/ and /api/v1/attendance/export/summaries/
+    path('export/<str:dataset>/', AttendanceExportView.as_view(), name='export'),
+
+    # Path: /api/v1/attendance/earnings/
+    path('earnings/', EarningsView.as_view(), name='earnings'),
+]
@@ -0,0 +1,141 @@
+from typing import Optional
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models.sql import UpdateQuery
+
+
+def update_or_insert(model, lookup: dict, updates: dict, defaults: dict) -> bool:
+    """
+    Apply ``updates`` (typically F() expressions) to the row matching
+    ``lookup``, inserting ``lookup`` + ``defaults`` when no row exists.
+
+    The common case is a single UPDATE. A concurrent insert of the same key
+    is resolved by retrying the UPDATE. Returns True if a row was created.
+    """
+    if model.objects.filter(**lookup).update(**updates):
+        return False
+
+    try:
+        with transaction.atomic():
+            model.objects.create(**lookup, **defaults)
+    except IntegrityError:
+        model.objects.filter(**lookup).update(**updates)
+        return False
+
+    return True
+
+
+def returning_supported(connection) -> bool:
+    """
+    Whether the database accepts UPDATE/DELETE ... RETURNING and
+    INSERT ... ON CONFLICT DO NOTHING RETURNING.
+    """
+    if connection.vendor == "postgresql":
+        return True
+    if connection.vendor == "sqlite":
+        return connection.Database.sqlite_version_info >= (3, 35)
+    return False
+
+
+def update_returning(queryset, updates: dict, returning: list[str]) -> Optional[tuple]:
+    """
+    Apply ``updates`` to the row matching ``queryset`` with one
+    ``UPDATE ... RETURNING`` and return its ``returning`` fields as
+    written, converted as the ORM would; None when no row matched.
+    """
+    query = queryset.query.chain(UpdateQuery)
+    query.add_update_values(updates)
+    connection = connections[queryset.db]
+    update_sql, params = query.get_compiler(queryset.db).as_sql()
+
+    meta = queryset.model._meta
+    fields = [meta.get_field(name) for name in returning]
+    quote = connection.ops.quote_name
+    update_sql += " RETURNING " + ", ".join(quote(field.column) for field in fields)
+    with connection.cursor() as cursor:
+        cursor.execute(update_sql, params)
+        row = cursor.fetchone()
+    if row is None:
+        return None
+
+    values = []
+    for field, value in zip(fields, row):
+        column = field.get_col(meta.db_table)
+        for converter in connection.ops.get_db_converters(column) + field.get_db_converters(connection):
+            value = converter(value, column, connection)
+        values.append(value)
+    return tuple(values)
+
+
+def update_or_insert_returning(model, lookup: dict, updates: dict, defaults: dict, returning: list[str]) -> tuple:
+    """
+    ``update_or_insert`` that also returns the ``returning`` fields of the
+    row as written. Where the database supports ``RETURNING`` the common
+    case stays a single statement; elsewhere the row is read back.
+    """
+    rows = model.objects.filter(**lookup)
+    if returning_supported(connections[rows.db]):
+        values = update_returning(rows, updates, returning)
+        if values is not None:
+            return values
+        try:
+            with transaction.atomic():
+                created = model.objects.create(**lookup, **defaults)
+        except IntegrityError:
+            return update_returning(rows, updates, returning)
+        return tuple(getattr(created, name) for name in returning)
+
+    update_or_insert(model, lookup, updates, defaults)
+    return rows.values_list(*returning).get()
+
+
+def insert_ignoring_conflicts(model, objs: list, unique_field: str) -> dict:
+    """
+    Insert ``objs``, skipping those whose ``unique_field`` value is already
+    taken, including by a concurrent transaction (which is waited for).
+    Returns ``{unique value: pk}`` for the rows inserted by this call.
+
+    Runs as ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` in batches where
+    supported, with one savepoint per row elsewhere.
+    """
+    if not objs:
+        return {}
+    connection = connections[router.db_for_write(model)]
+    meta = model._meta
+
+    if not returning_supported(connection):
+        inserted = {}
+        for obj in objs:
+            try:
+                with transaction.atomic(using=connection.alias):
+                    obj.save(force_insert=True, using=connection.alias)
+            except IntegrityError:
+                continue
+            inserted[getattr(obj, unique_field)] = obj.pk
+        return inserted
+
+    fields = [field for field in meta.local_concrete_fields if field is not meta.auto_field]
+    unique = meta.get_field(unique_field)
+    quote = connection.ops.quote_name
+    batch_size = connection.ops.bulk_batch_size(fields, objs)
+    row = "({})".format(", ".join(["%s"] * len(fields)))
+
+    inserted = {}
+    for start in range(0, len(objs), batch_size):
+        batch = objs[start:start + batch_size]
+        sql = "INSERT INTO {table} ({columns}) VALUES {rows} ON CONFLICT ({unique}) DO NOTHING RETURNING {unique}, {pk}".format(
+            table=quote(meta.db_table),
+            columns=", ".join(quote(field.column) for field in fields),
+            rows=", ".join([row] * len(batch)),
+            unique=quote(unique.column),
+            pk=quote(meta.pk.column),
+        )
+        params = [
+            field.get_db_prep_save(field.pre_save(obj, True), connection)
+            for obj in batch
+            for field in fields
+        ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            inserted.update(cursor.fetchall())
+    return inserted
@@ -1,18 +1,36 @@
+from datetime import datetime
+from decimal import Decimal
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from django.db.models import Sum
 
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status, viewsets
-from rest_framework.permissions import IsAuthenticated
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import BasePermission, IsAuthenticated, IsAdminUser
 
-from apps.attendance.models import WorkSession, AttendanceDaySummary
-from apps.attendance import services
+from apps.attendance.models import WorkSession, AttendanceDaySummary, SessionEditRequest
+from apps.attendance import bucketing, earnings, edits, exports, services
 from apps.attendance.exceptions import (
     AlreadyClockedInError,
     NotClockedInError,
 )
-from .serializers import WorkSessionSerializer, AttendanceDaySummarySerializer
+from config.routers import ReplicaReadMixin
+from .pagination import CreatedAtCursorPagination, OldestFirstCursorPagination, WorkDateCursorPagination
+from .serializers import (
+    WorkSessionSerializer,
+    AttendanceDaySummarySerializer,
+    ClockEventSerializer,
+    SessionEditRequestSerializer,
+    SessionEditReviewSerializer,
+)
+
+# Upper bound on events accepted in one batch upload.
+MAX_BATCH_EVENTS = 10000
 
 class ClockInView(APIView):
     """
@@ -54,37 +72,112 @@ class ClockOutView(APIView):
         serializer = WorkSessionSerializer(session)
         return Response(serializer.data, status=status.HTTP_200_OK)
         
-class WorkSessionViewSet(viewsets.ReadOnlyModelViewSet):
+class ClockEventBatchView(APIView):
+    """
+    Admin-only: apply clock-in/clock-out events for many employees at once.
+
+    Used by kiosks and offline mobile clients to replay queued punches.
+    Body: {"events": [{"idempotency_key": "...", "employee_code": "E001",
+    "action": "CLOCK_IN", "timestamp": "2025-01-01T08:00:00Z",
+    "source": "KIOSK"}, ...]}
+    """
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        events = request.data.get("events")
+
+        if not isinstance(events, list):
+            return Response(
+                {"detail": "events must be a list."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if len(events) > MAX_BATCH_EVENTS:
+            return Response(
+                {"detail": f"At most {MAX_BATCH_EVENTS} events per request."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = [None] * len(events)
+        valid, positions = [], []
+
+        for index, data in enumerate(events):
+            serializer = ClockEventSerializer(data=data)
+            if serializer.is_valid():
+                valid.append(serializer.validated_data)
+                positions.append(index)
+            else:
+                results[index] = {
+                    "index": index,
+                    "idempotency_key": data.get("idempotency_key") if isinstance(data, dict) else None,
+                    "status": "rejected",
+                    "session": None,
+                    "detail": serializer.errors,
+                }
+
+        if valid:
+            for position, result in zip(positions, services.ingest_clock_events(valid)):
+                result["index"] = position
+                results[position] = result
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+class WorkDateHistoryMixin:
+    """
+    Shared list behaviour for per-employee history endpoints:
+
+    - keyset pagination on (work_date, id), newest first
+    - ``?start=`` / ``?end=`` (YYYY-MM-DD) filter work_date in SQL
+    - ``?fields=`` trims the response and skips the employee join when
+      ``employee_name`` is not requested
+    """
+    pagination_class = WorkDateCursorPagination
+
+    def get_queryset(self):
+        qs = self.queryset.filter(employee=self.request.user) # for security
+
+        params = self.request.query_params
+        try:
+            if params.get("start"):
+                qs = qs.filter(work_date__gte=datetime.strptime(params["start"], "%Y-%m-%d").date())
+            if params.get("end"):
+                qs = qs.filter(work_date__lte=datetime.strptime(params["end"], "%Y-%m-%d").date())
+        except ValueError:
+            raise ValidationError({"detail": "Invalid date format. Use YYYY-MM-DD."})
+
+        requested = self.get_serializer_class().requested_fields(self.request)
+        if requested is None or "employee_name" in requested:
+            qs = qs.select_related("employee")
+        return qs
+
+class WorkSessionViewSet(ReplicaReadMixin, WorkDateHistoryMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only access to work sessions.
+
+    Only the hot window is served: sessions moved to WorkSessionArchive
+    (apps.attendance.archive) are not listed; the sessions export
+    includes them.
     """
-    queryset = WorkSession.objects.all().select_related("employee")
+    queryset = WorkSession.objects.all()
     serializer_class = WorkSessionSerializer
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        return self.queryset.filter(employee=self.request.user) # for security
-
-class AttendanceDaySummaryViewSet(viewsets.ReadOnlyModelViewSet):
+class AttendanceDaySummaryViewSet(ReplicaReadMixin, WorkDateHistoryMixin, viewsets.ReadOnlyModelViewSet):
     """
     Read-only access to daily attendance summaries.
     """
-    queryset = AttendanceDaySummary.objects.all().select_related("employee")
+    queryset = AttendanceDaySummary.objects.all()
     serializer_class = AttendanceDaySummarySerializer
     permission_classes = [IsAuthenticated]
 
-    def get_queryset(self):
-        return self.queryset.filter(employee=self.request.user)
-
-class DailyReportView(APIView):
+class DailyReportView(ReplicaReadMixin, APIView):
     """
     Simple daily report for the authenticated employee.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        today = timezone.now().date()
         employee = request.user
+        today = bucketing.local_work_date(timezone.now(), employee.timezone)
 
         sessions = WorkSession.objects.filter(
             employee=employee,
@@ -105,3 +198,168 @@ class DailyReportView(APIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+class AttendanceExportView(ReplicaReadMixin, APIView):
+    """
+    Admin-only: stream sessions or summaries for payroll.
+
+    GET /api/v1/attendance/export/<dataset>/?output=csv|columnar
+        &start=YYYY-MM-DD&end=YYYY-MM-DD&department=<id>&employee=<id>
+
+    <dataset> is "sessions" or "summaries". Rows are streamed from a
+    database cursor, so the response size does not affect memory use,
+    under WSGI and ASGI alike.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, dataset):
+        spec = exports.DATASETS.get(dataset)
+        if spec is None:
+            return Response(
+                {"detail": f"Unknown dataset. Choose from: {', '.join(exports.DATASETS)}."},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        output = request.query_params.get("output", "csv")
+        if output not in exports.FORMATS:
+            return Response(
+                {"detail": f"Unknown output. Choose from: {', '.join(exports.FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        filters = {}
+        try:
+            for param in ("start", "end"):
+                value = request.query_params.get(param)
+                if value:
+                    filters[param] = datetime.strptime(value, "%Y-%m-%d").date()
+            for param, key in (("department", "department_id"), ("employee", "employee_id")):
+                value = request.query_params.get(param)
+                if value:
+                    filters[key] = int(value)
+        except ValueError:
+            return Response(
+                {"detail": "Invalid filter. Dates use YYYY-MM-DD and ids are integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        encoder, content_type, extension = exports.FORMATS[output]
+        # Rows are read after the view returns; pin the request's database.
+        blocks = encoder(spec, spec.rows(using=self.read_db, **filters))
+        if isinstance(request._request, ASGIRequest):
+            blocks = exports.aiter_blocks(blocks)
+        response = StreamingHttpResponse(blocks, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{dataset}.{extension}"'
+        return response
+
+
+class EarningsView(ReplicaReadMixin, APIView):
+    """
+    Admin-only: base earnings per department and day.
+
+    GET /api/v1/attendance/earnings/?start=YYYY-MM-DD&end=YYYY-MM-DD
+        &department=<id>
+
+    Defaults to the current month. Totals come from
+    AttendanceDaySummary.total_earnings (see apps.attendance.earnings).
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        today = timezone.localdate()
+        try:
+            start = request.query_params.get("start")
+            end = request.query_params.get("end")
+            start = datetime.strptime(start, "%Y-%m-%d").date() if start else today.replace(day=1)
+            end = datetime.strptime(end, "%Y-%m-%d").date() if end else today
+            department = request.query_params.get("department")
+            department = int(department) if department else None
+        except ValueError:
+            return Response(
+                {"detail": "Invalid filter. Dates use YYYY-MM-DD and ids are integers."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if start > end:
+            return Response(
+                {"detail": "start must be before or equal to end."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        rows = [
+            {
+                "department_id": row["employee__department_id"],
+                "department": row["employee__department__name"],
+                "work_date": row["work_date"],
+                "employees": row["employees"],
+                "total_earnings": row["total_earnings"],
+            }
+            for row in earnings.totals(start, end, department_id=department, using=self.read_db)
+        ]
+        return Response(
+            {
+                "start": start,
+                "end": end,
+                "total_earnings": sum((row["total_earnings"] for row in rows), Decimal("0.00")),
+                "rows": rows,
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class IsManager(BasePermission):
+    """
+    Staff, or employees whose role reviews their department's edit requests
+    (see apps.attendance.edits.MANAGER_ROLES).
+    """
+
+    def has_permission(self, request, view):
+        return bool(request.user and request.user.is_authenticated and edits.is_manager(request.user))
+
+
+class SessionEditRequestViewSet(mixins.CreateModelMixin, mixins.ListModelMixin, viewsets.GenericViewSet):
+    """
+    Session corrections.
+
+    POST /api/v1/attendance/edit-requests/          submit one for yourself
+    GET  /api/v1/attendance/edit-requests/          your requests, newest first
+    GET  /api/v1/attendance/edit-requests/pending/  managers: pending requests
+         for their department (staff: all, or ?department=<id>), oldest
+         first; never their own
+    POST /api/v1/attendance/edit-requests/review/   managers: approve or reject
+         a batch. Body: {"ids": [1, 2], "action": "approve", "note": ""}
+    """
+    serializer_class = SessionEditRequestSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
+
+    def get_queryset(self):
+        return SessionEditRequest.objects.filter(employee=self.request.user)
+
+    def perform_create(self, serializer):
+        serializer.instance = edits.submit(self.request.user, **serializer.validated_data)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsManager], pagination_class=OldestFirstCursorPagination)
+    def pending(self, request):
+        department = request.query_params.get("department")
+        try:
+            department = int(department) if department else None
+        except ValueError:
+            raise ValidationError({"detail": "department must be an integer id."})
+
+        page = self.paginate_queryset(edits.pending(request.user, department))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    @action(detail=False, methods=["post"], permission_classes=[IsManager])
+    def review(self, request):
+        serializer = SessionEditReviewSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        result = edits.review(
+            request.user,
+            data["ids"],
+            approve=data["action"] == SessionEditReviewSerializer.APPROVE,
+            note=data["note"],
+        )
+        return Response(result, status=status.HTTP_200_OK)
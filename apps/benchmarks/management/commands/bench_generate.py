@@ -0,0 +1,39 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.benchmarks import workload
+
+
+class Command(BaseCommand):
+    help = "Generate (or remove) a synthetic organisation for benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--departments", type=int, default=10)
+        parser.add_argument("--employees", type=int, default=500)
+        parser.add_argument("--days", type=int, default=30)
+        parser.add_argument("--sessions-per-day", type=int, default=2)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Only remove previously generated data.",
+        )
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        workload.clear()
+        if options["clear"]:
+            self.stdout.write(self.style.SUCCESS("Removed benchmark data."))
+            return
+
+        stats = workload.generate(
+            departments=options["departments"],
+            employees=options["employees"],
+            days=options["days"],
+            sessions_per_day=options["sessions_per_day"],
+            seed=options["seed"],
+        )
+        stats["seconds"] = round(time.monotonic() - started, 2)
+        self.stdout.write(json.dumps(stats, indent=2))
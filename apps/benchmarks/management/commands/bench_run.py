@@ -0,0 +1,53 @@
+import json
+import platform
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from apps.benchmarks import scenarios, workload
+
+
+class Command(BaseCommand):
+    help = (
+        "Run timed scenarios against data from bench_generate and print "
+        "latency percentiles and query counts as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            choices=sorted(scenarios.SCENARIOS),
+            help="Scenario to run. May be repeated; defaults to all.",
+        )
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--output", help="Also write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        names = options["scenarios"] or list(scenarios.SCENARIOS)
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1.")
+
+        results = []
+        for name in names:
+            self.stderr.write(f"Running {name}...")
+            try:
+                results.append(scenarios.run(name, options["iterations"], options["warmup"]))
+            except workload.MissingWorkload as exc:
+                raise CommandError(str(exc))
+
+        report = {
+            "started_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "results": results,
+        }
+        payload = json.dumps(report, indent=2)
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(payload)
+        self.stdout.write(payload)
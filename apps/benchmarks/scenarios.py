@@ -0,0 +1,220 @@
+"""
+Timed benchmark scenarios over the hot paths.
+
+Each scenario is a callable taking the run context and returning a
+``step`` function; ``run`` times every call to ``step`` and counts its
+queries. Scenarios that write append a function undoing their writes to
+``context["cleanup"]``; ``run`` calls it afterwards, even if a step fails.
+Results are plain dicts so runs can be saved as JSON and diffed.
+"""
+import statistics
+import time
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+from typing import Callable
+
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.attendance import bucketing, services as attendance_services
+from apps.attendance.models import AttendanceDaySummary, WorkSession
+from apps.attendance.views import AttendanceDaySummaryViewSet, WorkSessionViewSet
+from apps.overtime.models import OvertimeEntry
+from apps.overtime.services import calculate_overtime_for_period
+from apps.tracker.views import DashboardLiveView, DepartmentStatsView, EmployeeDailySummaryView
+from . import workload
+
+SCENARIOS: dict[str, Callable] = {}
+
+
+def scenario(name: str):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100.0 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def _summarise(name: str, latencies: list[float], queries: list[int]) -> dict:
+    ordered = sorted(latencies)
+    return {
+        "scenario": name,
+        "iterations": len(latencies),
+        "latency_ms": {
+            "mean": round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+            "p50": round(_percentile(ordered, 50) * 1000, 3),
+            "p90": round(_percentile(ordered, 90) * 1000, 3),
+            "p99": round(_percentile(ordered, 99) * 1000, 3),
+            "max": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        },
+        "queries": {
+            "mean": round(statistics.fmean(queries), 2) if queries else 0.0,
+            "max": max(queries) if queries else 0,
+        },
+    }
+
+
+def run(name: str, iterations: int, warmup: int = 1) -> dict:
+    context = {"iterations": iterations + warmup, "cleanup": []}
+    step = SCENARIOS[name](context)
+
+    latencies, queries = [], []
+    try:
+        for _ in range(warmup):
+            step()
+
+        for _ in range(iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                step()
+                latencies.append(time.perf_counter() - started)
+            queries.append(len(captured.captured_queries))
+    finally:
+        for cleanup in context["cleanup"]:
+            cleanup()
+
+    return _summarise(name, latencies, queries)
+
+
+def _api_step(view, path: str, user, **params):
+    factory = APIRequestFactory()
+
+    def step():
+        request = factory.get(path, params)
+        force_authenticate(request, user=user)
+        response = view(request)
+        response.render()
+
+    return step
+
+
+@scenario("clock_in_out")
+def clock_in_out(context):
+    """
+    One clock-in plus clock-out through attendance.services. Each pass over
+    the employees starts two hours after the previous one, so an employee's
+    sessions never overlap; the sessions and the summaries they created are
+    removed afterwards.
+    """
+    employees = workload.employees(limit=context["iterations"])
+    started = timezone.now()
+    summaries_before = set(
+        AttendanceDaySummary.objects
+        .filter(employee__in=employees, work_date__gte=(started - timedelta(days=1)).date())
+        .values_list("employee_id", "work_date")
+    )
+    created = []
+    state = {"i": 0}
+
+    def step():
+        lap, index = divmod(state["i"], len(employees))
+        employee = employees[index]
+        state["i"] += 1
+        when = started + timedelta(hours=2 * lap)
+        session = attendance_services.clock_in(employee, source="KIOSK", when=when)
+        created.append(session.pk)
+        attendance_services.clock_out(employee, source="WEB", when=when + timedelta(hours=1))
+
+    def cleanup():
+        sessions = WorkSession.objects.filter(pk__in=created).select_related("employee")
+        keys = {
+            (session.employee_id, day)
+            for session in sessions
+            for day in bucketing.session_days(session, session.employee.timezone)
+        }
+        sessions.delete()
+        attendance_services.rebuild_daily_summaries_for(keys)
+        added = keys - summaries_before
+        if added:
+            AttendanceDaySummary.objects.filter(
+                reduce(or_, (Q(employee_id=employee_id, work_date=work_date) for employee_id, work_date in added))
+            ).delete()
+
+    context["cleanup"].append(cleanup)
+    return step
+
+
+@scenario("overtime_recalculation")
+def overtime_recalculation(context):
+    """
+    calculate_overtime_for_period over the generated period and employees.
+    The period's entries are put back as they were afterwards.
+    """
+    start, end = workload.period()
+    employee_ids = [employee.pk for employee in workload.employees()]
+    entries = OvertimeEntry.objects.filter(employee_id__in=employee_ids, period_start=start, period_end=end)
+    before = list(entries)
+
+    def step():
+        calculate_overtime_for_period(start, end, employee_ids=employee_ids)
+
+    @transaction.atomic
+    def cleanup():
+        entries.delete()
+        OvertimeEntry.objects.bulk_create(before)
+
+    context["cleanup"].append(cleanup)
+    return step
+
+
+@scenario("tracker_live")
+def tracker_live(context):
+    return _api_step(DashboardLiveView.as_view(), "/api/v1/tracker/live/", workload.employees(limit=1)[0])
+
+
+@scenario("tracker_departments")
+def tracker_departments(context):
+    return _api_step(DepartmentStatsView.as_view(), "/api/v1/tracker/stats/departments/", workload.employees(limit=1)[0])
+
+
+@scenario("sessions_list")
+def sessions_list(context):
+    return _api_step(
+        WorkSessionViewSet.as_view({"get": "list"}),
+        "/api/v1/attendance/sessions/",
+        workload.employees(limit=1)[0],
+    )
+
+
+@scenario("summaries_list")
+def summaries_list(context):
+    return _api_step(
+        AttendanceDaySummaryViewSet.as_view({"get": "list"}),
+        "/api/v1/attendance/summaries/",
+        workload.employees(limit=1)[0],
+    )
+
+
+@scenario("my_summary_revalidate")
+def my_summary_revalidate(context):
+    """
+    A conditional GET of the personal summary whose ETag still matches, so
+    only the summary cache is read; its queries are the cache's round trip.
+    """
+    view = EmployeeDailySummaryView.as_view()
+    employee = workload.employees(limit=1)[0]
+    factory = APIRequestFactory()
+
+    def get(**headers):
+        request = factory.get("/api/v1/tracker/my-summary/", **headers)
+        force_authenticate(request, user=employee)
+        return view(request)
+
+    etag = get()["ETag"]
+
+    def step():
+        response = get(HTTP_IF_NONE_MATCH=etag)
+        if response.status_code != 304:
+            raise RuntimeError(f"Expected 304, got {response.status_code}.")
+
+    return step
@@ -0,0 +1,45 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from apps.attendance import archive
+from apps.attendance.models import AttendanceDaySummary, WorkSession, WorkSessionArchive
+from apps.overtime.models import OvertimeEntry
+from apps.users.models import Employee
+from . import scenarios, workload
+
+
+class ScenarioTests(TestCase):
+
+    def test_runs_without_data_fail_clearly(self):
+        with self.assertRaisesMessage(CommandError, "Run `manage.py bench_generate` first."):
+            call_command("bench_run", "--scenario", "tracker_live", "--iterations", "1", stdout=StringIO(), stderr=StringIO())
+
+    def test_scenarios_leave_the_data_as_they_found_it(self):
+        workload.generate(departments=2, employees=3, days=7)
+
+        def state():
+            return (
+                sorted(WorkSession.objects.values_list("pk", "clock_in_at", "clock_out_at")),
+                sorted(AttendanceDaySummary.objects.values_list("employee_id", "work_date", "total_work_duration")),
+                OvertimeEntry.objects.count(),
+            )
+
+        before = state()
+        for name in scenarios.SCENARIOS:
+            with self.subTest(name):
+                result = scenarios.run(name, iterations=2, warmup=1)
+                self.assertEqual(result["iterations"], 2)
+                self.assertEqual(state(), before)
+
+    def test_clear_removes_archived_sessions(self):
+        workload.generate(departments=1, employees=2, days=3, end=archive.hot_start() - timedelta(days=40))
+        list(archive.archive_sessions())
+        self.assertTrue(WorkSessionArchive.objects.exists())
+
+        workload.clear()
+
+        self.assertFalse(WorkSessionArchive.objects.exists())
+        self.assertFalse(Employee.objects.exists())
@@ -0,0 +1,198 @@
+"""
+Synthetic organisations for benchmarking.
+
+Everything generated here uses codes starting with ``PREFIX`` so it can be
+removed again with ``clear()`` without touching real data.
+"""
+import random
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from typing import Optional
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from apps.attendance.models import (
+    AttendanceDaySummary,
+    ClockEvent,
+    DepartmentDayRollup,
+    EmployeeMonthRollup,
+    EmployeeWeekRollup,
+    WorkSession,
+    WorkSessionArchive,
+)
+from apps.attendance.services import rebuild_daily_summaries
+from apps.overtime.models import OvertimeEntry, OvertimeRule
+from apps.users.models import Department, Employee, Role
+
+PREFIX = "bench"
+
+INSERT_BATCH_SIZE = 2000
+
+ROLE_NAMES = ["EMPLOYEE", "MANAGER", "HR_ADMIN"]
+
+
+class MissingWorkload(Exception):
+    """Raised when a scenario needs generated data and there is none."""
+
+    def __init__(self):
+        super().__init__("No benchmark data found. Run `manage.py bench_generate` first.")
+
+
+def _employees():
+    return Employee.objects.filter(employee_code__startswith=f"{PREFIX}-")
+
+
+@transaction.atomic
+def clear() -> None:
+    """Delete every generated object."""
+    employees = _employees()
+    OvertimeEntry.objects.filter(employee__in=employees).delete()
+    OvertimeRule.objects.filter(name__startswith=f"{PREFIX}-").delete()
+    ClockEvent.objects.filter(employee__in=employees).delete()
+    WorkSession.objects.filter(employee__in=employees).delete()
+    WorkSessionArchive.objects.filter(employee__in=employees).delete()
+    AttendanceDaySummary.objects.filter(employee__in=employees).delete()
+    EmployeeWeekRollup.objects.filter(employee__in=employees).delete()
+    EmployeeMonthRollup.objects.filter(employee__in=employees).delete()
+    departments = Department.objects.filter(code__startswith=f"{PREFIX}-")
+    DepartmentDayRollup.objects.filter(department__in=departments).delete()
+    employees.delete()
+    departments.delete()
+    Role.objects.filter(name__startswith=f"{PREFIX}-").delete()
+
+
+def _shift(rng: random.Random, day: date, sessions: int) -> list[tuple[datetime, datetime]]:
+    """
+    A day's shift split into ``sessions`` sessions with breaks, starting
+    between 06:00 and 10:00 UTC and lasting roughly 6-11 hours in total.
+    """
+    start = datetime.combine(day, time(6), tzinfo=dt_timezone.utc) + timedelta(
+        minutes=rng.randint(0, 240)
+    )
+    worked = timedelta(minutes=rng.randint(360, 660))
+    per_session = worked / sessions
+
+    spans = []
+    for _ in range(sessions):
+        end = start + per_session
+        spans.append((start, end))
+        start = end + timedelta(minutes=rng.randint(15, 60))
+    return spans
+
+
+@transaction.atomic
+def generate(
+    departments: int = 10,
+    employees: int = 500,
+    days: int = 30,
+    sessions_per_day: int = 2,
+    end: Optional[date] = None,
+    seed: int = 42,
+) -> dict:
+    """
+    Create departments, roles, employees, ``days`` of closed multi-session
+    shifts ending on ``end`` (default yesterday), their summaries and a set
+    of daily/weekly overtime rules scoped by department and role.
+    """
+    rng = random.Random(seed)
+    end = end or date.today() - timedelta(days=1)
+    first_day = end - timedelta(days=days - 1)
+
+    dept_objs = Department.objects.bulk_create([
+        Department(name=f"{PREFIX}-dept-{i}", code=f"{PREFIX}-{i}")
+        for i in range(departments)
+    ])
+    role_objs = Role.objects.bulk_create([
+        Role(name=f"{PREFIX}-{name}") for name in ROLE_NAMES
+    ])
+
+    # Generated accounts cannot log in; skip per-account hashing.
+    password = make_password(None)
+    emp_objs = Employee.objects.bulk_create(
+        [
+            Employee(
+                username=f"{PREFIX}-{i}",
+                employee_code=f"{PREFIX}-{i}",
+                first_name="Bench",
+                last_name=str(i),
+                password=password,
+                department=dept_objs[i % departments],
+                role=role_objs[0] if i % 10 else role_objs[1],
+                pay_type=rng.choice(["HOURLY", "DAILY", "MONTHLY"]),
+                pay_rate=Decimal(rng.randint(12, 45)),
+            )
+            for i in range(employees)
+        ],
+        batch_size=INSERT_BATCH_SIZE,
+    )
+
+    sessions = []
+    total_sessions = 0
+    for employee in emp_objs:
+        for offset in range(days):
+            day = first_day + timedelta(days=offset)
+            if day.weekday() >= 5 and rng.random() < 0.8:
+                continue
+            for clock_in_at, clock_out_at in _shift(rng, day, sessions_per_day):
+                sessions.append(WorkSession(
+                    employee=employee,
+                    clock_in_at=clock_in_at,
+                    clock_out_at=clock_out_at,
+                    clock_in_source=rng.choice(["WEB", "MOBILE", "KIOSK"]),
+                    clock_out_source="WEB",
+                    total_work_duration=clock_out_at - clock_in_at,
+                    work_date=day,
+                ))
+        if len(sessions) >= INSERT_BATCH_SIZE:
+            WorkSession.objects.bulk_create(sessions, batch_size=INSERT_BATCH_SIZE)
+            total_sessions += len(sessions)
+            sessions = []
+    WorkSession.objects.bulk_create(sessions, batch_size=INSERT_BATCH_SIZE)
+    total_sessions += len(sessions)
+
+    summaries = rebuild_daily_summaries(
+        start=first_day, end=end, employee_ids=[e.pk for e in emp_objs]
+    )
+
+    rules = [
+        OvertimeRule(name=f"{PREFIX}-daily", scope=OvertimeRule.DAILY, threshold_hours=8, multiplier=Decimal("1.5")),
+        OvertimeRule(name=f"{PREFIX}-weekly", scope=OvertimeRule.WEEKLY, threshold_hours=40, multiplier=Decimal("1.5")),
+        OvertimeRule(name=f"{PREFIX}-managers", scope=OvertimeRule.WEEKLY, threshold_hours=45,
+                     multiplier=Decimal("1.25"), role=role_objs[1]),
+    ]
+    rules += [
+        OvertimeRule(name=f"{PREFIX}-dept-{d.pk}", scope=OvertimeRule.DAILY,
+                     threshold_hours=Decimal(rng.choice([7, 9, 10])), multiplier=Decimal("2.0"), department=d)
+        for d in dept_objs[: max(departments // 2, 1)]
+    ]
+    OvertimeRule.objects.bulk_create(rules)
+
+    return {
+        "departments": len(dept_objs),
+        "employees": len(emp_objs),
+        "sessions": total_sessions,
+        "summaries": summaries,
+        "rules": len(rules),
+        "start": first_day.isoformat(),
+        "end": end.isoformat(),
+    }
+
+
+def period() -> tuple[date, date]:
+    """First and last work_date of the generated sessions."""
+    sessions = WorkSession.objects.filter(employee__in=_employees())
+    first = sessions.order_by("work_date").values_list("work_date", flat=True).first()
+    last = sessions.order_by("-work_date").values_list("work_date", flat=True).first()
+    if first is None:
+        raise MissingWorkload()
+    return first, last
+
+
+def employees(limit: Optional[int] = None) -> list[Employee]:
+    """Generated employees in creation order; raises MissingWorkload if none."""
+    qs = _employees().order_by("pk").select_related("department", "role")
+    found = list(qs[:limit] if limit else qs)
+    if not found:
+        raise MissingWorkload()
+    return found
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.monitoring"
+
+    def ready(self):
+        from .connections import connect_signals
+
+        connect_signals()
@@ -0,0 +1,98 @@
+"""
+Database connection instrumentation: connection churn, connect (or pool
+checkout) time per request and connection pool statistics.
+
+- ``optitrack_db_connections_opened_total`` counts every connection
+  Django opens (with a pool, every checkout), per alias.
+- ``ConnectTimer`` times the first time a request actually needs the
+  primary connection, so ``optitrack_request_db_connect_duration_seconds``
+  is the time a request spent connecting or waiting for a pooled
+  connection, and ``optitrack_db_connections_reused_total`` counts requests
+  served by a persistent connection. Requests that run no query never
+  check a connection out.
+- Pool gauges (``optitrack_db_pool_*``) are read from psycopg's pool
+  statistics each time the metrics endpoint is scraped.
+"""
+import time
+from typing import Optional
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+
+from .metrics import registry
+
+
+def _pooled(connection) -> bool:
+    return bool(connection.settings_dict.get("OPTIONS", {}).get("pool"))
+
+
+def record_connection_created(sender, connection, **kwargs) -> None:
+    registry.inc(
+        "optitrack_db_connections_opened_total",
+        "Database connections opened (pool checkouts when pooled).",
+        {"alias": connection.alias, "pooled": "true" if _pooled(connection) else "false"},
+    )
+
+
+class ConnectTimer:
+    """
+    Context manager timing the first connection use of ``alias`` in the
+    current request, without opening a connection itself.
+
+    ``seconds`` is the time spent connecting, 0.0 if an open connection was
+    reused, or None if no query ran (or connecting failed).
+    """
+
+    def __init__(self, alias: str = DEFAULT_DB_ALIAS):
+        self.alias = alias
+        self.seconds: Optional[float] = None
+
+    def __enter__(self):
+        # Connections are per thread (and per async context), so replacing
+        # ensure_connection on the instance only affects this request.
+        self.connection = connections[self.alias]
+        self._ensure_connection = self.connection.ensure_connection
+        self.connection.ensure_connection = self._timed_ensure_connection
+        return self
+
+    def __exit__(self, *exc_info):
+        self.connection.__dict__.pop("ensure_connection", None)
+
+    def _timed_ensure_connection(self):
+        if self.seconds is not None:
+            return self._ensure_connection()
+
+        if self.connection.connection is not None:
+            self.seconds = 0.0
+            registry.inc(
+                "optitrack_db_connections_reused_total",
+                "Requests that reused an open database connection.",
+                {"alias": self.alias},
+            )
+            return self._ensure_connection()
+
+        started = time.perf_counter()
+        self._ensure_connection()
+        self.seconds = time.perf_counter() - started
+
+
+def record_pool_stats() -> None:
+    """Copy psycopg pool statistics into ``optitrack_db_pool_*`` gauges."""
+    for alias in connections:
+        connection = connections[alias]
+        if not _pooled(connection):
+            continue
+        pool = getattr(connection, "pool", None)
+        if pool is None:
+            continue
+        for key, value in pool.get_stats().items():
+            registry.set(
+                f"optitrack_db_pool_{key}",
+                f"psycopg pool statistic {key}.",
+                {"alias": alias},
+                value,
+            )
+
+
+def connect_signals() -> None:
+    connection_created.connect(record_connection_created, dispatch_uid="monitoring.connection_created")
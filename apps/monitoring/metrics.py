@@ -0,0 +1,192 @@
+"""
+In-memory metrics registry with Prometheus text exposition.
+
+Histograms are cumulative, as Prometheus expects, so rates and percentiles
+over any range can be computed on the Prometheus side. Each histogram also
+keeps a rolling window of the last ``WINDOW_SECONDS``, exposed as a
+``<name>_recent`` summary (quantiles estimated from the buckets, sum and
+count), for a quick look without a Prometheus server. Values live in the
+worker process, so each worker exposes its own series.
+"""
+import math
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterable
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Rolling window of each histogram, kept as WINDOW_SLOTS slots that expire
+# one at a time.
+WINDOW_SECONDS = 60
+WINDOW_SLOTS = 6
+QUANTILES = (0.5, 0.9, 0.99)
+
+
+class Histogram:
+    def __init__(self, buckets: Iterable[float], clock: Callable[[], float] = time.monotonic):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._clock = clock
+        # [slot number, bucket counts, sum, count], oldest first.
+        self._slots: deque[list] = deque()
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+        slot = self._slot()
+        slot[1][i] += 1
+        slot[2] += value
+        slot[3] += 1
+
+    def _slot(self) -> list:
+        number = int(self._clock() // (WINDOW_SECONDS / WINDOW_SLOTS))
+        while self._slots and self._slots[0][0] <= number - WINDOW_SLOTS:
+            self._slots.popleft()
+        if not self._slots or self._slots[-1][0] != number:
+            self._slots.append([number, [0] * len(self.counts), 0.0, 0])
+        return self._slots[-1]
+
+    def recent(self) -> tuple[list[int], float, int]:
+        """Bucket counts, sum and count over the rolling window."""
+        self._slot()
+        counts = [0] * len(self.counts)
+        total, count = 0.0, 0
+        for _, slot_counts, slot_sum, slot_count in self._slots:
+            counts = [a + b for a, b in zip(counts, slot_counts)]
+            total += slot_sum
+            count += slot_count
+        return counts, total, count
+
+    def quantile(self, q: float, counts: list[int]) -> float:
+        """
+        Estimate of the ``q`` quantile of ``counts`` (as returned by
+        ``recent``), interpolating within a bucket like Prometheus'
+        histogram_quantile; NaN without observations.
+        """
+        rank = q * sum(counts)
+        if not rank:
+            return math.nan
+        seen = 0
+        for i, count in enumerate(counts):
+            if count and seen + count >= rank:
+                if i == len(self.buckets):
+                    return float(self.buckets[-1])
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return float(self.buckets[-1])
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        # name -> (type, help, {labels tuple: Histogram | float})
+        self._metrics: dict[str, tuple[str, str, dict]] = {}
+
+    def _series(self, name: str, kind: str, help_text: str) -> dict:
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = (kind, help_text, {})
+        return metric[2]
+
+    def observe(self, name: str, help_text: str, labels: dict, value: float,
+                buckets: Iterable[float] = LATENCY_BUCKETS) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series(name, "histogram", help_text)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, help_text: str, labels: dict, amount: float = 1) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series(name, "counter", help_text)
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name: str, help_text: str, labels: dict, value: float) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._series(name, "gauge", help_text)[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._metrics.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            for name in sorted(self._metrics):
+                kind, help_text, series = self._metrics[name]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                for key in sorted(series):
+                    value = series[key]
+                    if kind == "histogram":
+                        lines.extend(_render_histogram(name, key, value))
+                    else:
+                        lines.append(f"{name}{_labels(key)} {_number(value)}")
+                if kind == "histogram":
+                    lines.append(f"# HELP {name}_recent {help_text} Last {WINDOW_SECONDS}s.")
+                    lines.append(f"# TYPE {name}_recent summary")
+                    for key in sorted(series):
+                        lines.extend(_render_recent(f"{name}_recent", key, series[key]))
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if isinstance(value, float) and math.isnan(value):
+        return "NaN"
+    if isinstance(value, float) and math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render_histogram(name: str, key: tuple, histogram: Histogram) -> list[str]:
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(f"{name}_bucket{_labels(key, (('le', _number(float(bound))),))} {cumulative}")
+    cumulative += histogram.counts[-1]
+    lines.append(f"{name}_bucket{_labels(key, (('le', '+Inf'),))} {cumulative}")
+    lines.append(f"{name}_sum{_labels(key)} {_number(histogram.sum)}")
+    lines.append(f"{name}_count{_labels(key)} {histogram.count}")
+    return lines
+
+
+def _render_recent(name: str, key: tuple, histogram: Histogram) -> list[str]:
+    counts, total, count = histogram.recent()
+    lines = [
+        f"{name}{_labels(key, (('quantile', str(q)),))} {_number(histogram.quantile(q, counts))}"
+        for q in QUANTILES
+    ]
+    lines.append(f"{name}_sum{_labels(key)} {_number(total)}")
+    lines.append(f"{name}_count{_labels(key)} {count}")
+    return lines
+
+
+registry = Registry()
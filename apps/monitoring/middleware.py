@@ -0,0 +1,167 @@
+"""
+Per-request instrumentation: total latency, DB connect time, DB query
+count and time, response render (serialization) time, repeated-query
+(N+1) detection and slow request logging.
+
+Configure with::
+
+    MONITORING = {
+        "SAMPLE_RATE": 1.0,         # fraction of requests instrumented
+        "NPLUSONE_THRESHOLD": 10,   # same SQL shape repeated this often
+        "SLOW_REQUEST_MS": 1000,
+    }
+"""
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+from typing import Optional
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+from .connections import ConnectTimer
+from .metrics import QUERY_COUNT_BUCKETS, registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "SAMPLE_RATE": 1.0,
+    "NPLUSONE_THRESHOLD": 10,
+    "SLOW_REQUEST_MS": 1000,
+}
+
+# Collapses "IN (%s, %s, %s)" so the same statement with different list
+# lengths counts as one shape.
+_PLACEHOLDER_LIST = re.compile(r"\((?:\s*%s\s*,)+\s*%s\s*\)")
+
+
+def _config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "MONITORING", {})}
+
+
+class QueryRecorder:
+    """
+    Database execute wrapper that counts queries, DB time and repeated
+    statement shapes.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.shapes[_PLACEHOLDER_LIST.sub("(%s...)", sql)] += 1
+
+
+def view_label(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+
+    view_class = getattr(match.func, "cls", None) or getattr(match.func, "view_class", None)
+    if view_class is None:
+        return f"{match.func.__module__}.{match.func.__qualname__}"
+
+    label = f"{view_class.__module__}.{view_class.__name__}"
+    actions = getattr(match.func, "actions", None)
+    if actions and request.method.lower() in actions:
+        label = f"{label}.{actions[request.method.lower()]}"
+    return label
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = _config()
+        self.sample_rate = config["SAMPLE_RATE"]
+        self.nplusone_threshold = config["NPLUSONE_THRESHOLD"]
+        self.slow_seconds = config["SLOW_REQUEST_MS"] / 1000.0
+
+    def __call__(self, request):
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        request._metrics_render_seconds = 0.0
+        request._metrics_connect = None
+
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            request._metrics_stack = stack
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+
+        connect = request._metrics_connect.seconds if request._metrics_connect else None
+        self._record(request, response, recorder, total, connect)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Async views (the SSE stream) run outside this thread's connection
+        # and may hold the request open for a long time; leave them alone.
+        stack = getattr(request, "_metrics_stack", None)
+        if stack is not None and not iscoroutinefunction(view_func):
+            request._metrics_connect = stack.enter_context(ConnectTimer())
+        return None
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered after the view returns; time that step.
+        started = time.perf_counter()
+
+        def rendered(_response):
+            request._metrics_render_seconds = time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def _record(self, request, response, recorder: QueryRecorder, total: float,
+                connect: Optional[float]) -> None:
+        view = view_label(request)
+        labels = {"view": view, "method": request.method}
+
+        registry.inc("optitrack_requests_total", "Instrumented requests.",
+                     {**labels, "status": response.status_code})
+        registry.observe("optitrack_request_duration_seconds", "Total request latency.",
+                         labels, total)
+        if connect is not None:
+            registry.observe("optitrack_request_db_connect_duration_seconds",
+                             "Time spent opening (or waiting for a pooled) database connection.",
+                             labels, connect)
+        registry.observe("optitrack_request_db_duration_seconds", "Time spent in database queries.",
+                         labels, recorder.duration)
+        registry.observe("optitrack_request_db_queries", "Database queries per request.",
+                         labels, recorder.count, buckets=QUERY_COUNT_BUCKETS)
+        registry.observe("optitrack_request_render_duration_seconds", "Response serialization time.",
+                         labels, request._metrics_render_seconds)
+
+        repeated = [
+            (sql, count) for sql, count in recorder.shapes.most_common(3)
+            if count >= self.nplusone_threshold
+        ]
+        if repeated:
+            registry.inc("optitrack_nplusone_total", "Requests with a repeated query shape.", {"view": view})
+            logger.warning(
+                "Possible N+1 in %s %s: %s",
+                request.method, view,
+                "; ".join(f"{count}x {sql[:200]}" for sql, count in repeated),
+            )
+
+        if total >= self.slow_seconds:
+            registry.inc("optitrack_slow_requests_total", "Requests slower than SLOW_REQUEST_MS.", {"view": view})
+            logger.warning(
+                "Slow request %s %s: %.1fms total, connect %.1fms, %d queries in %.1fms, render %.1fms",
+                request.method, view, total * 1000, (connect or 0.0) * 1000, recorder.count,
+                recorder.duration * 1000, request._metrics_render_seconds * 1000,
+            )
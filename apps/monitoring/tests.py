@@ -0,0 +1,230 @@
+import math
+import os
+import runpy
+import sys
+from types import ModuleType
+from unittest import mock
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.urls import resolve
+from rest_framework.test import APIClient
+
+from apps.users.models import Employee
+from . import connections as connections_module
+from .connections import ConnectTimer, record_connection_created, record_pool_stats
+from .metrics import Histogram, Registry, WINDOW_SECONDS, registry
+from .middleware import view_label
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class HistogramTests(TestCase):
+
+    def test_window_forgets_old_observations(self):
+        clock = FakeClock()
+        histogram = Histogram((0.1, 1.0), clock=clock)
+        histogram.observe(0.05)
+        clock.now += WINDOW_SECONDS / 2
+        histogram.observe(0.5)
+        histogram.observe(5.0)
+
+        self.assertEqual(histogram.recent(), ([1, 1, 1], 5.55, 3))
+
+        clock.now += WINDOW_SECONDS / 2 + 1
+        self.assertEqual(histogram.recent(), ([0, 1, 1], 5.5, 2))
+        # The cumulative counts are kept.
+        self.assertEqual((histogram.counts, histogram.count), ([1, 1, 1], 3))
+
+        clock.now += WINDOW_SECONDS
+        counts, _, count = histogram.recent()
+        self.assertEqual(count, 0)
+        self.assertTrue(math.isnan(histogram.quantile(0.5, counts)))
+
+    def test_quantiles_interpolate_within_buckets(self):
+        histogram = Histogram((1.0, 2.0, 4.0))
+        for value in (0.5, 1.5, 1.5, 3.0):
+            histogram.observe(value)
+        counts, _, _ = histogram.recent()
+
+        self.assertEqual(histogram.quantile(0.5, counts), 1.5)
+        self.assertEqual(histogram.quantile(0.25, counts), 1.0)
+        self.assertEqual(histogram.quantile(1.0, counts), 4.0)
+
+    def test_render(self):
+        metrics = Registry()
+        metrics.observe("latency", "Latency.", {"view": "v"}, 0.3, buckets=(0.1, 1.0))
+        metrics.inc("requests", "Requests.", {"view": "v"})
+
+        text = metrics.render()
+
+        self.assertIn('latency_bucket{view="v",le="0.1"} 0\n', text)
+        self.assertIn('latency_bucket{view="v",le="+Inf"} 1\n', text)
+        self.assertIn("# TYPE latency_recent summary\n", text)
+        self.assertIn('latency_recent{view="v",quantile="0.5"} 0.55\n', text)
+        self.assertIn('latency_recent_count{view="v"} 1\n', text)
+        self.assertIn('requests{view="v"} 1\n', text)
+
+
+class RequestMetricsTests(TestCase):
+
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+
+    def label(self, path, method="get"):
+        request = getattr(RequestFactory(), method)(path)
+        request.resolver_match = resolve(path)
+        return view_label(request)
+
+    def test_view_labels(self):
+        self.assertEqual(self.label("/api/v1/monitoring/metrics/"), "apps.monitoring.views.MetricsView")
+        self.assertEqual(
+            self.label("/api/v1/attendance/sessions/"),
+            "apps.attendance.views.WorkSessionViewSet.list",
+        )
+        self.assertEqual(self.label("/api/v1/tracker/live/events/"), "apps.tracker.views.live_events")
+        self.assertEqual(view_label(RequestFactory().get("/nowhere/")), "unresolved")
+
+    def test_requests_are_recorded(self):
+        admin = Employee.objects.create(username="admin", employee_code="A1", is_staff=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+
+        client.get("/api/v1/monitoring/metrics/")
+        text = client.get("/api/v1/monitoring/metrics/").content.decode()
+
+        labels = 'method="GET",status="200",view="apps.monitoring.views.MetricsView"'
+        self.assertIn(f"optitrack_requests_total{{{labels}}} 1\n", text)
+        self.assertIn("# TYPE optitrack_request_db_queries_recent summary\n", text)
+
+
+class FakeConnection:
+    """Stands in for a backend connection in the instrumentation tests."""
+
+    def __init__(self, alias="default", pool=None, open=False):
+        self.alias = alias
+        self.settings_dict = {"OPTIONS": {"pool": {"max_size": 4}}} if pool else {}
+        self.pool = pool
+        self.connection = object() if open else None
+
+    def ensure_connection(self):
+        if self.connection is None:
+            self.connection = object()
+
+
+class FakePool:
+
+    def get_stats(self):
+        return {"pool_size": 4, "requests_waiting": 1}
+
+
+class ConnectionMetricsTests(TestCase):
+
+    def setUp(self):
+        registry.clear()
+        self.addCleanup(registry.clear)
+
+    def fake_connections(self, **aliases):
+        patcher = mock.patch.object(connections_module, "connections", aliases)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_timer_measures_a_new_connection(self):
+        connection = FakeConnection()
+        self.fake_connections(default=connection)
+
+        with ConnectTimer() as timer:
+            connection.ensure_connection()
+            connection.ensure_connection()
+
+        self.assertIsNotNone(connection.connection)
+        self.assertGreaterEqual(timer.seconds, 0.0)
+        self.assertNotIn("ensure_connection", connection.__dict__)
+        self.assertNotIn("optitrack_db_connections_reused_total", registry.render())
+
+    def test_timer_counts_a_reused_connection(self):
+        connection = FakeConnection(open=True)
+        self.fake_connections(default=connection)
+
+        with ConnectTimer() as timer:
+            connection.ensure_connection()
+
+        self.assertEqual(timer.seconds, 0.0)
+        self.assertIn('optitrack_db_connections_reused_total{alias="default"} 1\n', registry.render())
+
+    def test_timer_without_queries(self):
+        self.fake_connections(default=FakeConnection())
+
+        with ConnectTimer() as timer:
+            pass
+
+        self.assertIsNone(timer.seconds)
+
+    def test_connections_opened(self):
+        record_connection_created(None, FakeConnection())
+        record_connection_created(None, FakeConnection("replica1", pool=FakePool()))
+
+        text = registry.render()
+        self.assertIn('optitrack_db_connections_opened_total{alias="default",pooled="false"} 1\n', text)
+        self.assertIn('optitrack_db_connections_opened_total{alias="replica1",pooled="true"} 1\n', text)
+
+    def test_pool_stats(self):
+        self.fake_connections(default=FakeConnection(pool=FakePool()), replica1=FakeConnection("replica1"))
+
+        record_pool_stats()
+
+        text = registry.render()
+        self.assertIn('optitrack_db_pool_pool_size{alias="default"} 4\n', text)
+        self.assertIn('optitrack_db_pool_requests_waiting{alias="default"} 1\n', text)
+        self.assertNotIn('alias="replica1"', text)
+
+    def test_requests_record_connect_time(self):
+        employee = Employee.objects.create(username="E1", employee_code="E1")
+        client = APIClient()
+        client.force_authenticate(employee)
+
+        client.get("/api/v1/attendance/sessions/")
+
+        text = registry.render()
+        # The test database connection is already open.
+        self.assertIn('optitrack_db_connections_reused_total{alias="default"} 1\n', text)
+        labels = 'method="GET",view="apps.attendance.views.WorkSessionViewSet.list"'
+        self.assertIn(f"optitrack_request_db_connect_duration_seconds_count{{{labels}}} 1\n", text)
+
+
+class PoolSettingsTests(SimpleTestCase):
+
+    def load_settings(self, modules, **environ):
+        with mock.patch.dict(os.environ, environ), mock.patch.dict(sys.modules, modules):
+            return runpy.run_path(str(settings.BASE_DIR / "config" / "settings.py"))
+
+    def test_persistent_connections_by_default(self):
+        database = self.load_settings({}, DB_POOL="False", DB_CONN_MAX_AGE="30", DB_CONN_HEALTH_CHECKS="True")["DATABASES"]["default"]
+
+        self.assertEqual(database["CONN_MAX_AGE"], 30)
+        self.assertTrue(database["CONN_HEALTH_CHECKS"])
+        self.assertNotIn("OPTIONS", database)
+
+    def test_pool(self):
+        databases = self.load_settings(
+            {"psycopg_pool": ModuleType("psycopg_pool")},
+            DB_POOL="True", DB_POOL_MAX_SIZE="20", DB_REPLICA_HOSTS="replica.internal",
+        )["DATABASES"]
+
+        database = databases["default"]
+        self.assertEqual(database["CONN_MAX_AGE"], 0)
+        self.assertEqual(database["OPTIONS"]["pool"], {"min_size": 2, "max_size": 20, "timeout": 10.0})
+        self.assertEqual(databases["replica1"]["OPTIONS"], database["OPTIONS"])
+
+    def test_pool_requires_psycopg_pool(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "DB_POOL=True requires psycopg 3"):
+            self.load_settings({"psycopg_pool": None}, DB_POOL="True")
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import MetricsView
+
+app_name = "monitoring"
+
+urlpatterns = [
+    # Path: /api/v1/monitoring/metrics/
+    path("metrics/", MetricsView.as_view(), name="metrics"),
+]
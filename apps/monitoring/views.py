@@ -0,0 +1,21 @@
+from django.http import HttpResponse
+from rest_framework.permissions import IsAdminUser
+from rest_framework.views import APIView
+
+from .connections import record_pool_stats
+from .metrics import registry
+
+
+class MetricsView(APIView):
+    """
+    Admin-only: request and database connection metrics in the
+    Prometheus text format.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        record_pool_stats()
+        return HttpResponse(
+            registry.render(),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import OvertimeRule, OvertimeEntry
+from .models import OvertimeRule, OvertimeEntry, RecalculationJob
 
 
 @admin.register(OvertimeRule)
@@ -23,3 +23,21 @@ class OvertimeEntryAdmin(admin.ModelAdmin):
     )
     list_filter = ("rule", "employee", "is_locked", "period_start", "period_end")
     search_fields = ("employee__username", "employee__employee_code")
+
+
+@admin.register(RecalculationJob)
+class RecalculationJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "id",
+        "period_start",
+        "period_end",
+        "status",
+        "employees_processed",
+        "employees_total",
+        "rows_written",
+        "created_at",
+        "heartbeat_at",
+        "finished_at",
+    )
+    list_filter = ("status",)
+    readonly_fields = ("created_at", "started_at", "finished_at")
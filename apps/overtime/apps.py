@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class OvertimeConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.overtime'
+
+    def ready(self):
+        import apps.overtime.signals  # noqa: F401
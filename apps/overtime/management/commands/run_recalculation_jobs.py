@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.overtime.services import claim_next_job, run_recalculation_job
+
+
+class Command(BaseCommand):
+    help = "Process queued overtime recalculation jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain the queue and exit instead of polling for new jobs.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Seconds to wait between polls when the queue is empty.",
+        )
+
+    def handle(self, *args, **options):
+        once = options["once"]
+        interval = options["interval"]
+
+        while True:
+            job = claim_next_job()
+
+            if job is None:
+                if once:
+                    return
+                time.sleep(interval)
+                continue
+
+            self.stdout.write(f"Running job {job.pk} ({job.period_start} to {job.period_end})")
+            job = run_recalculation_job(job)
+
+            style = self.style.SUCCESS if job.status == job.COMPLETED else self.style.ERROR
+            self.stdout.write(style(
+                f"Job {job.pk} {job.status.lower()}: "
+                f"{job.employees_processed}/{job.employees_total} employees, "
+                f"{job.rows_written} rows in {job.duration_seconds}s"
+            ))
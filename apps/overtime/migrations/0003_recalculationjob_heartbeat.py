@@ -0,0 +1,18 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('overtime', '0002_recalculationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recalculationjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
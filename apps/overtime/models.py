@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 class OvertimeRule(models.Model):
     DAILY = "daily"
@@ -75,3 +76,68 @@ class OvertimeEntry(models.Model):
 
     def __str__(self):
         return f"{self.employee} {self.period_start}–{self.period_end}"
+
+
+class RecalculationJob(models.Model):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+
+    STATUS_CHOICES = [
+        (QUEUED, "Queued"),
+        (RUNNING, "Running"),
+        (COMPLETED, "Completed"),
+        (FAILED, "Failed"),
+    ]
+
+    period_start = models.DateField()
+    period_end = models.DateField()
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    batch_size = models.PositiveIntegerField(default=500)
+
+    employees_total = models.PositiveIntegerField(default=0)
+    employees_processed = models.PositiveIntegerField(default=0)
+    batches_total = models.PositiveIntegerField(default=0)
+    batches_completed = models.PositiveIntegerField(default=0)
+    rows_written = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+
+    requested_by = models.ForeignKey(
+        "users.Employee",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="overtime_recalculation_jobs",
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    # Renewed by the worker after each batch; a RUNNING job whose heartbeat
+    # is older than the lease is claimed again (services.claim_next_job).
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Recalculation job"
+        verbose_name_plural = "Recalculation jobs"
+        indexes = [
+            models.Index(fields=["status", "created_at"]),
+        ]
+
+    def __str__(self):
+        return f"Recalculation {self.period_start}–{self.period_end} ({self.status})"
+
+    @property
+    def progress(self) -> float:
+        if not self.employees_total:
+            return 100.0 if self.status == self.COMPLETED else 0.0
+        return round(100.0 * self.employees_processed / self.employees_total, 1)
+
+    @property
+    def duration_seconds(self):
+        if not self.started_at:
+            return None
+        end = self.finished_at or timezone.now()
+        return round((end - self.started_at).total_seconds(), 3)
@@ -0,0 +1,106 @@
+"""
+Resolution of which overtime rules apply to an employee.
+
+A rule with a department and/or role only applies to employees in that
+department and/or role; a blank department or role is a wildcard. For each
+scope (daily, weekly) an employee gets the rules at the most specific
+level that matches them, in this order:
+
+1. department and role
+2. department only
+3. role only
+4. neither (organisation-wide)
+
+Rules at the same level all apply.
+
+The index is built from the active rules and cached in-process. It is
+dropped when a rule is saved or deleted (see apps.overtime.signals), and
+rebuilt whenever the rule table's fingerprint (row count and latest
+``updated_at``) differs, which catches changes made by other processes.
+"""
+import threading
+from typing import Optional
+
+from django.db.models import Count, Max
+
+from .models import OvertimeRule
+
+# (department matches, role matches) in order of precedence.
+_LEVELS = [(True, True), (True, False), (False, True), (False, False)]
+
+
+class RuleIndex:
+    """
+    Active rules keyed by ``(department_id, role_id)``, with None as the
+    wildcard.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        self._by_key: dict[tuple[Optional[int], Optional[int]], list[OvertimeRule]] = {}
+        for rule in self.rules:
+            self._by_key.setdefault((rule.department_id, rule.role_id), []).append(rule)
+        self._resolved: dict[tuple[Optional[int], Optional[int]], list[OvertimeRule]] = {}
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def rules_for(self, department_id: Optional[int], role_id: Optional[int]) -> list[OvertimeRule]:
+        """
+        Rules that apply to an employee in the given department and role.
+        """
+        key = (department_id, role_id)
+        resolved = self._resolved.get(key)
+        if resolved is not None:
+            return resolved
+
+        resolved = []
+        for scope, _ in OvertimeRule.SCOPE_CHOICES:
+            for match_department, match_role in _LEVELS:
+                if (match_department and department_id is None) or (match_role and role_id is None):
+                    continue
+                candidates = [
+                    rule
+                    for rule in self._by_key.get(
+                        (department_id if match_department else None, role_id if match_role else None), ()
+                    )
+                    if rule.scope == scope
+                ]
+                if candidates:
+                    resolved.extend(candidates)
+                    break
+
+        self._resolved[key] = resolved
+        return resolved
+
+
+def _fingerprint() -> tuple:
+    stats = OvertimeRule.objects.aggregate(count=Count("id"), latest=Max("updated_at"))
+    return stats["count"], stats["latest"]
+
+
+class RuleIndexCache:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index: Optional[RuleIndex] = None
+        self._fingerprint = None
+
+    def get(self) -> RuleIndex:
+        fingerprint = _fingerprint()
+        with self._lock:
+            if self._index is not None and self._fingerprint == fingerprint:
+                return self._index
+
+        index = RuleIndex(OvertimeRule.objects.filter(is_active=True).order_by("id"))
+        with self._lock:
+            self._index = index
+            self._fingerprint = fingerprint
+        return index
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._index = None
+            self._fingerprint = None
+
+
+rule_index = RuleIndexCache()
@@ -1,5 +1,8 @@
 from rest_framework import serializers
-from .models import OvertimeRule, OvertimeEntry
+from .models import OvertimeRule, OvertimeEntry, RecalculationJob
+
+# Longest period a simulation may cover, in days.
+MAX_SIMULATION_DAYS = 366
 
 
 class OvertimeRuleSerializer(serializers.ModelSerializer):
@@ -19,6 +22,39 @@ class OvertimeRuleSerializer(serializers.ModelSerializer):
         ]
 
 
+class CandidateRuleSerializer(serializers.ModelSerializer):
+    """A rule to simulate; never saved."""
+    name = serializers.CharField(max_length=100, required=False, default="candidate")
+
+    class Meta:
+        model = OvertimeRule
+        fields = [
+            "name",
+            "scope",
+            "threshold_hours",
+            "multiplier",
+            "department",
+            "role",
+        ]
+
+
+class SimulationSerializer(serializers.Serializer):
+    period_start = serializers.DateField()
+    period_end = serializers.DateField()
+    rules = CandidateRuleSerializer(many=True, allow_empty=False)
+    include_active = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if attrs["period_start"] > attrs["period_end"]:
+            raise serializers.ValidationError("period_start must be before or equal to period_end.")
+        if (attrs["period_end"] - attrs["period_start"]).days + 1 > MAX_SIMULATION_DAYS:
+            raise serializers.ValidationError(f"The period can span at most {MAX_SIMULATION_DAYS} days.")
+        return attrs
+
+    def candidates(self) -> list[OvertimeRule]:
+        return [OvertimeRule(is_active=True, **data) for data in self.validated_data["rules"]]
+
+
 class OvertimeEntrySerializer(serializers.ModelSerializer):
     employee_name = serializers.CharField(source="employee.get_full_name", read_only=True)
     employee_code = serializers.CharField(source="employee.employee_code", read_only=True)
@@ -49,3 +85,32 @@ class OvertimeEntrySerializer(serializers.ModelSerializer):
             "overtime_amount",
             "finalized_at",
         ]
+
+
+class RecalculationJobSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+    duration_seconds = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = RecalculationJob
+        fields = [
+            "id",
+            "period_start",
+            "period_end",
+            "status",
+            "batch_size",
+            "employees_total",
+            "employees_processed",
+            "batches_total",
+            "batches_completed",
+            "rows_written",
+            "progress",
+            "error",
+            "requested_by",
+            "created_at",
+            "started_at",
+            "heartbeat_at",
+            "finished_at",
+            "duration_seconds",
+        ]
+        read_only_fields = fields
@@ -1,121 +1,448 @@
 from __future__ import annotations
 
-from datetime import date
+import itertools
+import logging
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Iterable, Optional
 
+from django.conf import settings
 from django.db import transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
-from apps.attendance.models import WorkSession
-from apps.users.models import Employee
-from .models import OvertimeRule, OvertimeEntry
+from apps.attendance import archive, bucketing
+from .models import OvertimeRule, OvertimeEntry, RecalculationJob
+from .rules import rule_index
 
+logger = logging.getLogger(__name__)
 
-@transaction.atomic
-def calculate_overtime_for_period(period_start: date, period_end: date) -> None:
-    """
-    Recalculate overtime entries for all active employees and active rules
-    for the given date range (inclusive).
+# Rows per INSERT ... ON CONFLICT statement when writing entries.
+ENTRY_BATCH_SIZE = 1000
+
+# Session rows fetched per round trip when aggregating hours.
+SESSION_CHUNK_SIZE = 5000
 
-    - Aggregates WorkSession durations per employee per day using:
-        - work_date
-        - clock_in_at / clock_out_at
-    - Applies daily or weekly thresholds from OvertimeRule.
-    - Creates or updates OvertimeEntry unless it is locked.
+# Employees recalculated per transaction by background jobs.
+DEFAULT_JOB_BATCH_SIZE = 500
+
+# Used when settings.OVERTIME_JOB_LEASE_SECONDS is not set.
+DEFAULT_JOB_LEASE_SECONDS = 900
+
+_CENTS = Decimal("0.01")
+
+
+def _aggregate_daily_hours(
+    period_start: date,
+    period_end: date,
+    employee_ids: Optional[Iterable[int]] = None,
+) -> tuple[dict[int, dict[date, float]], dict[int, float], dict[int, tuple]]:
     """
-    # Load active rules once
-    rules = list(OvertimeRule.objects.filter(is_active=True))
+    Sum closed session time per active employee and local day in a single
+    streamed query. Sessions crossing the employee's local midnight are
+    split between the days they cover (see apps.attendance.bucketing).
 
-    if not rules:
-        return
+    The sum is done in Python rather than with a GROUP BY on work_date:
+    a session's time belongs to the local days it covers, which SQL can
+    only work out with per-vendor timezone arithmetic. The cost is one
+    streamed row per session instead of one per employee-day, read in
+    chunks so memory stays bounded by the employee-day totals; the
+    per-session work is a bisection against midnights computed once per
+    timezone.
 
-    # Consider only active employees
-    employees = Employee.objects.filter(is_active=True)
+    Returns ``(daily_hours, pay_rates, groups)`` where ``daily_hours`` maps
+    employee id -> {local date: hours}, ``pay_rates`` maps employee id ->
+    base pay rate and ``groups`` maps employee id -> (department id, role
+    id).
+    """
+    since = bucketing.lookback_start(period_start)
+    filters = {
+        "employee__is_active": True,
+        "work_date__gte": since,
+        "work_date__lte": period_end,
+        "clock_in_at__isnull": False,
+        "clock_out_at__isnull": False,
+    }
+    if employee_ids is not None:
+        filters["employee_id__in"] = list(employee_ids)
 
-    for employee in employees:
-        # Fetch sessions in the period for this employee
-        sessions = WorkSession.objects.filter(
-            employee=employee,
-            work_date__gte=period_start,
-            work_date__lte=period_end,
+    # Periods older than the hot window also read archived sessions.
+    rows = itertools.chain.from_iterable(
+        source
+        .filter(**filters)
+        .order_by()
+        .values_list(
+            "employee_id",
+            "employee__pay_rate",
+            "employee__department_id",
+            "employee__role_id",
+            "employee__timezone",
+            "clock_in_at",
+            "clock_out_at",
         )
+        .iterator(chunk_size=SESSION_CHUNK_SIZE)
+        for source in archive.session_sources(since)
+    )
 
-        if not sessions.exists():
-            continue
+    pay_rates: dict[int, float] = {}
+    groups: dict[int, tuple] = {}
 
-        # Aggregate total hours per day
-        daily_hours: dict[date, float] = {}
+    def intervals():
+        for employee_id, pay_rate, department_id, role_id, tz_name, clock_in_at, clock_out_at in rows:
+            pay_rates[employee_id] = float(pay_rate)
+            groups[employee_id] = (department_id, role_id)
+            yield employee_id, tz_name, clock_in_at, clock_out_at
 
-        for session in sessions:
-            # Skip incomplete sessions
-            if not session.clock_in_at or not session.clock_out_at:
-                continue
+    buckets = bucketing.bucket_sessions(intervals(), period_start, period_end)
 
-            duration_seconds = (session.clock_out_at - session.clock_in_at).total_seconds()
-            duration_hours = duration_seconds / 3600.0
+    daily_hours: dict[int, dict[date, float]] = defaultdict(dict)
+    for (employee_id, day), worked in buckets.items():
+        daily_hours[employee_id][day] = worked.total_seconds() / 3600.0
 
-            day = session.work_date
-            daily_hours[day] = daily_hours.get(day, 0.0) + duration_hours
+    return daily_hours, pay_rates, groups
 
-        if not daily_hours:
-            continue
 
-        base_rate = float(employee.pay_rate)
+def _evaluate_rule(
+    rule: OvertimeRule,
+    daily_hours: dict[date, float],
+) -> Optional[tuple[float, float]]:
+    """
+    Apply a rule's threshold to one employee's daily hours.
 
-        for rule in rules:
-            threshold = float(rule.threshold_hours)
-            multiplier = float(rule.multiplier)
+    Returns ``(regular_hours, overtime_hours)`` or ``None`` for an unknown
+    scope.
+    """
+    threshold = float(rule.threshold_hours)
+
+    if rule.scope == OvertimeRule.DAILY:
+        # Apply threshold independently per day, sum overtime
+        total_regular = 0.0
+        total_ot = 0.0
+        for hours in daily_hours.values():
+            total_regular += min(hours, threshold)
+            total_ot += max(hours - threshold, 0.0)
+        return total_regular, total_ot
 
-            total_regular = 0.0
-            total_ot = 0.0
+    if rule.scope == OvertimeRule.WEEKLY:
+        # Apply threshold per calendar week (Monday to Sunday) of the
+        # period, as apps.overtime.simulation does
+        weekly_hours: dict[date, float] = defaultdict(float)
+        for day, hours in daily_hours.items():
+            weekly_hours[day - timedelta(days=day.weekday())] += hours
+        total_regular = 0.0
+        total_ot = 0.0
+        for hours in weekly_hours.values():
+            total_regular += min(hours, threshold)
+            total_ot += max(hours - threshold, 0.0)
+        return total_regular, total_ot
 
-            if rule.scope == OvertimeRule.DAILY:
-                # Apply threshold independently per day, sum overtime
-                for _, hours in daily_hours.items():
-                    regular = min(hours, threshold)
-                    ot = max(hours - threshold, 0.0)
-                    total_regular += regular
-                    total_ot += ot
+    return None
 
-                entry_period_start = period_start
-                entry_period_end = period_end
 
-            elif rule.scope == OvertimeRule.WEEKLY:
-                total_hours = sum(daily_hours.values())
-                total_regular = min(total_hours, threshold)
-                total_ot = max(total_hours - threshold, 0.0)
+def _to_decimal(value: float) -> Decimal:
+    return Decimal(repr(value)).quantize(_CENTS, rounding=ROUND_HALF_UP)
 
-                entry_period_start = period_start
-                entry_period_end = period_end
 
-            else:
+def _unlocked_entries(period_start: date, period_end: date, employee_ids: Optional[list[int]] = None):
+    """Unlocked entries of a period for ``employee_ids`` or all active employees."""
+    entries = OvertimeEntry.objects.filter(period_start=period_start, period_end=period_end, is_locked=False)
+    if employee_ids is not None:
+        return entries.filter(employee_id__in=employee_ids)
+    return entries.filter(employee__is_active=True)
+
+
+@transaction.atomic
+def calculate_overtime_for_period(
+    period_start: date,
+    period_end: date,
+    employee_ids: Optional[Iterable[int]] = None,
+) -> int:
+    """
+    Recalculate overtime entries for all active employees and active rules
+    for the given date range (inclusive).
+
+    - Aggregates closed WorkSession time per employee per local day in one
+      streamed query, splitting sessions that cross midnight.
+    - Applies thresholds per day or per calendar week in memory, using only the rules
+      that resolve for the employee's department and role (see
+      apps.overtime.rules).
+    - Upserts OvertimeEntry rows in bulk, leaving locked entries untouched,
+      and removes the unlocked entries of the period that this run did not
+      write (no overtime left, no hours left, or the rule no longer
+      applies).
+
+    ``employee_ids`` restricts the run to a subset of employees; otherwise
+    it covers all active employees. The number of queries does not depend
+    on how many employees are processed.
+
+    Returns the number of entries written.
+    """
+    if employee_ids is not None:
+        employee_ids = list(employee_ids)
+
+    # Cached between runs; rebuilt when any rule changes
+    rules = rule_index.get()
+
+    daily_hours_by_employee, pay_rates, groups = (
+        _aggregate_daily_hours(period_start, period_end, employee_ids) if rules else ({}, {}, {})
+    )
+
+    locked = set(
+        OvertimeEntry.objects
+        .filter(
+            period_start=period_start,
+            period_end=period_end,
+            is_locked=True,
+            employee_id__in=list(daily_hours_by_employee),
+        )
+        .values_list("employee_id", "rule_id")
+    )
+
+    now = timezone.now()
+    entries = []
+
+    for employee_id, daily_hours in daily_hours_by_employee.items():
+        base_rate = pay_rates[employee_id]
+
+        for rule in rules.rules_for(*groups[employee_id]):
+            result = _evaluate_rule(rule, daily_hours)
+            if result is None:
                 # Unknown scope, skip
                 continue
 
+            total_regular, total_ot = result
             if total_ot <= 0:
                 # No overtime for this rule/employee/period
                 continue
 
+            if (employee_id, rule.pk) in locked:
+                continue
+
+            multiplier = float(rule.multiplier)
             overtime_amount = total_ot * base_rate * multiplier
 
-            entry, created = OvertimeEntry.objects.get_or_create(
-                employee=employee,
-                rule=rule,
-                period_start=entry_period_start,
-                period_end=entry_period_end,
-                defaults={
-                    "hours_regular": total_regular,
-                    "hours_overtime": total_ot,
-                    "base_rate": base_rate,
-                    "overtime_multiplier": multiplier,
-                    "overtime_amount": overtime_amount,
-                },
+            entries.append(
+                OvertimeEntry(
+                    employee_id=employee_id,
+                    rule=rule,
+                    period_start=period_start,
+                    period_end=period_end,
+                    hours_regular=_to_decimal(total_regular),
+                    hours_overtime=_to_decimal(total_ot),
+                    base_rate=_to_decimal(base_rate),
+                    overtime_multiplier=_to_decimal(multiplier),
+                    overtime_amount=_to_decimal(overtime_amount),
+                    finalized_at=now,
+                )
             )
 
-            if not created and not entry.is_locked:
-                entry.hours_regular = total_regular
-                entry.hours_overtime = total_ot
-                entry.base_rate = base_rate
-                entry.overtime_multiplier = multiplier
-                entry.overtime_amount = overtime_amount
-                entry.finalized_at = timezone.now()
-                entry.save()
+    written = {(entry.employee_id, entry.rule_id) for entry in entries}
+    stale = [
+        pk
+        for pk, employee_id, rule_id in _unlocked_entries(period_start, period_end, employee_ids)
+        .values_list("pk", "employee_id", "rule_id")
+        if (employee_id, rule_id) not in written
+    ]
+    if stale:
+        OvertimeEntry.objects.filter(pk__in=stale).delete()
+
+    if entries:
+        OvertimeEntry.objects.bulk_create(
+            entries,
+            batch_size=ENTRY_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=["employee", "rule", "period_start", "period_end"],
+            update_fields=[
+                "hours_regular",
+                "hours_overtime",
+                "base_rate",
+                "overtime_multiplier",
+                "overtime_amount",
+                "finalized_at",
+            ],
+        )
+
+    return len(entries)
+
+
+def queue_recalculation(
+    period_start: date,
+    period_end: date,
+    requested_by=None,
+    batch_size: Optional[int] = None,
+) -> RecalculationJob:
+    """
+    Record a recalculation request for a worker to pick up.
+    """
+    return RecalculationJob.objects.create(
+        period_start=period_start,
+        period_end=period_end,
+        requested_by=requested_by,
+        batch_size=batch_size or DEFAULT_JOB_BATCH_SIZE,
+    )
+
+
+def queue_recalculation_for_days(
+    keys: Iterable[tuple[int, date]],
+    requested_by=None,
+) -> list[RecalculationJob]:
+    """
+    Queue a recalculation of every overtime period containing one of the
+    given (employee_id, work_date) pairs.
+
+    Periods are those of existing entries or jobs, whoever they belong to,
+    so an employee who had no overtime in a period yet is picked up too.
+    Periods that already have a queued job are not queued again.
+    """
+    days = {work_date for _, work_date in keys}
+    if not days:
+        return []
+
+    overlapping = {"period_start__lte": max(days), "period_end__gte": min(days)}
+    periods = set()
+    for model in (OvertimeEntry, RecalculationJob):
+        periods.update(
+            model.objects
+            .filter(**overlapping)
+            .order_by()
+            .values_list("period_start", "period_end")
+            .distinct()
+        )
+    queued = set(
+        RecalculationJob.objects
+        .filter(status=RecalculationJob.QUEUED, **overlapping)
+        .values_list("period_start", "period_end")
+    )
+
+    return [
+        queue_recalculation(period_start, period_end, requested_by=requested_by)
+        for period_start, period_end in sorted(periods - queued)
+        if any(period_start <= day <= period_end for day in days)
+    ]
+
+
+def claim_next_job() -> Optional[RecalculationJob]:
+    """
+    Atomically move the oldest queued job to RUNNING and return it.
+
+    A RUNNING job whose worker stopped renewing ``heartbeat_at`` for
+    ``OVERTIME_JOB_LEASE_SECONDS`` (e.g. it was killed) is claimed again
+    and starts over; recalculating a batch twice writes the same entries.
+    Concurrent workers skip rows another worker has already locked.
+    """
+    lease = getattr(settings, "OVERTIME_JOB_LEASE_SECONDS", DEFAULT_JOB_LEASE_SECONDS)
+    now = timezone.now()
+    expired = now - timedelta(seconds=lease)
+    with transaction.atomic():
+        job = (
+            RecalculationJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(
+                Q(status=RecalculationJob.QUEUED)
+                | Q(status=RecalculationJob.RUNNING, heartbeat_at__lt=expired)
+                # Claimed before heartbeats were recorded.
+                | Q(status=RecalculationJob.RUNNING, heartbeat_at__isnull=True, started_at__lt=expired)
+            )
+            .order_by("created_at", "id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        if job.status == RecalculationJob.RUNNING:
+            logger.warning("Reclaiming recalculation job %s, last heartbeat %s", job.pk, job.heartbeat_at)
+        job.status = RecalculationJob.RUNNING
+        job.started_at = now
+        job.heartbeat_at = now
+        job.employees_processed = 0
+        job.batches_completed = 0
+        job.rows_written = 0
+        job.save(update_fields=[
+            "status", "started_at", "heartbeat_at", "employees_processed", "batches_completed", "rows_written",
+        ])
+
+    return job
+
+
+def _employee_ids_for_period(period_start: date, period_end: date) -> list[int]:
+    """
+    Employees with closed sessions that can count towards the period, plus
+    those holding unlocked entries for it (whose time may since be gone).
+    """
+    since = bucketing.lookback_start(period_start)
+    employee_ids = set(_unlocked_entries(period_start, period_end).values_list("employee_id", flat=True))
+    for source in archive.session_sources(since):
+        employee_ids.update(
+            source
+            .filter(
+                employee__is_active=True,
+                work_date__gte=since,
+                work_date__lte=period_end,
+                clock_out_at__isnull=False,
+            )
+            .order_by()
+            .values_list("employee_id", flat=True)
+            .distinct()
+        )
+    return sorted(employee_ids)
+
+
+def run_recalculation_job(job: RecalculationJob) -> RecalculationJob:
+    """
+    Recalculate a job's period in employee batches.
+
+    Each batch commits in its own transaction and progress is written after
+    every batch, together with the heartbeat, so a failure only loses the
+    batch in flight. Progress writes are tied to this claim (``started_at``):
+    once the job has been claimed again elsewhere, this run stops.
+    """
+    employee_ids = _employee_ids_for_period(job.period_start, job.period_end)
+    batch_size = max(job.batch_size, 1)
+    batches = [
+        employee_ids[i:i + batch_size]
+        for i in range(0, len(employee_ids), batch_size)
+    ]
+
+    claimed = RecalculationJob.objects.filter(pk=job.pk, started_at=job.started_at)
+    claimed.update(
+        employees_total=len(employee_ids),
+        batches_total=len(batches),
+        heartbeat_at=timezone.now(),
+    )
+
+    try:
+        for batch in batches:
+            started = time.monotonic()
+            written = calculate_overtime_for_period(
+                job.period_start, job.period_end, employee_ids=batch
+            )
+            if not claimed.update(
+                employees_processed=F("employees_processed") + len(batch),
+                batches_completed=F("batches_completed") + 1,
+                rows_written=F("rows_written") + written,
+                heartbeat_at=timezone.now(),
+            ):
+                logger.warning("Recalculation job %s was claimed by another worker; stopping", job.pk)
+                job.refresh_from_db()
+                return job
+            logger.info(
+                "Recalculation job %s: batch of %d employees wrote %d rows in %.3fs",
+                job.pk, len(batch), written, time.monotonic() - started,
+            )
+    except Exception as exc:
+        logger.exception("Recalculation job %s failed", job.pk)
+        claimed.update(
+            status=RecalculationJob.FAILED,
+            error=str(exc),
+            finished_at=timezone.now(),
+        )
+    else:
+        claimed.update(
+            status=RecalculationJob.COMPLETED,
+            finished_at=timezone.now(),
+        )
+
+    job.refresh_from_db()
+    return job
@@ -0,0 +1,35 @@
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.attendance.events import session_clocked_out, sessions_edited
+from . import services
+from .models import OvertimeRule
+from .rules import rule_index
+from .simulation import matrix_cache
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender=OvertimeRule)
+@receiver(post_delete, sender=OvertimeRule)
+def invalidate_rule_index(sender, **kwargs):
+    rule_index.invalidate()
+
+
+@receiver(session_clocked_out)
+def add_session_to_simulation_cache(sender, session, **kwargs):
+    # The cache is an optimisation: a failure here must not fail the
+    # clock-out, the matrices are rebuilt on the next simulation instead.
+    try:
+        matrix_cache.add_session(session)
+    except Exception:
+        logger.exception("Could not add session %s to the simulation cache", session.pk)
+        matrix_cache.clear()
+
+
+@receiver(sessions_edited)
+def queue_overtime_for_edits(sender, keys, reviewer=None, **kwargs):
+    # Runs inside the review transaction, so the jobs commit with the edits.
+    services.queue_recalculation_for_days(keys, requested_by=reviewer)
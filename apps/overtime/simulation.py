@@ -0,0 +1,209 @@
+"""
+What-if evaluation of candidate overtime rules. Nothing is written.
+
+Candidate rules are unsaved OvertimeRule instances. They are resolved per
+employee with the same precedence as real rules (apps.overtime.rules),
+optionally together with the active rules. Daily thresholds apply per day
+and weekly thresholds per calendar week of the period.
+
+Worked time per employee and day is held in an HoursMatrix
+(apps.attendance.matrix) per period, kept in-process for
+``OVERTIME_SIMULATION["CACHE_SECONDS"]`` and evaluated with vectorized
+overages, so trying several thresholds over the same period does not read
+sessions again. Clock-outs in this process are added to the cached
+matrices as they happen; other session changes show up once an entry
+expires. A matrix written by ``build_hours_matrix`` to
+``ATTENDANCE_MATRIX_DIR`` is mapped instead of built when it is fresh.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import date
+
+from django.conf import settings
+
+from apps.attendance import matrix as hours_matrix
+from apps.attendance.bucketing import lookback_start
+from apps.attendance.matrix import HoursMatrix
+from apps.users.models import Department
+from .models import OvertimeRule
+from .rules import RuleIndex, rule_index
+
+DEFAULTS = {
+    "CACHE_SECONDS": 300,
+    # Periods kept in the matrix cache.
+    "CACHE_PERIODS": 4,
+}
+
+
+def _config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "OVERTIME_SIMULATION", {})}
+
+
+class MatrixCache:
+    """
+    HoursMatrix per (period_start, period_end), least recently used first
+    out.
+
+    Cached matrices are only touched under the lock: clock-outs are added
+    to them in place and ``get`` hands out a copy, so an evaluation never
+    reads a buffer that is being resized.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[tuple[date, date], tuple[float, HoursMatrix]] = OrderedDict()
+
+    def get(self, period_start: date, period_end: date) -> HoursMatrix:
+        config = _config()
+        key = (period_start, period_end)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] < config["CACHE_SECONDS"]:
+                self._entries.move_to_end(key)
+                return entry[1].copy()
+
+        matrix = (
+            hours_matrix.load_shared(period_start, period_end, config["CACHE_SECONDS"])
+            or HoursMatrix.build(period_start, period_end)
+        )
+        with self._lock:
+            self._entries[key] = (now, matrix)
+            self._entries.move_to_end(key)
+            while len(self._entries) > config["CACHE_PERIODS"]:
+                self._entries.popitem(last=False)
+            return matrix.copy()
+
+    def add_session(self, session) -> None:
+        """
+        Credit a closed session to the cached matrices it falls in; a
+        matrix without a row for the employee is dropped instead.
+        """
+        employee = session.employee
+        if not employee.is_active or session.clock_out_at is None:
+            return
+        with self._lock:
+            for key, (_, matrix) in list(self._entries.items()):
+                if session.work_date > matrix.end or session.work_date < lookback_start(matrix.start):
+                    continue
+                if not matrix.add_session(employee, session.clock_in_at, session.clock_out_at):
+                    del self._entries[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+matrix_cache = MatrixCache()
+
+
+def _rule_label(rule: OvertimeRule, candidates: list[OvertimeRule]) -> str:
+    for index, candidate in enumerate(candidates):
+        if candidate is rule:
+            return f"candidate:{index}"
+    return f"rule:{rule.pk}"
+
+
+def _overtime_hours(matrix: HoursMatrix, rule: OvertimeRule, rows: list[int]):
+    """
+    Overtime hours of ``rule`` for each of ``rows``. Daily thresholds apply
+    per day and weekly ones per calendar week (Monday to Sunday), as in
+    services._evaluate_rule.
+    """
+    threshold = float(rule.threshold_hours)
+    if rule.scope == OvertimeRule.DAILY:
+        return matrix.daily_overages(threshold, rows)
+    if rule.scope == OvertimeRule.WEEKLY:
+        return matrix.weekly_overages(threshold, rows)
+    return None
+
+
+def simulate(
+    candidates: list[OvertimeRule],
+    period_start: date,
+    period_end: date,
+    include_active: bool = False,
+) -> dict:
+    """
+    Project overtime hours and cost of ``candidates`` over a period.
+
+    With ``include_active`` the active rules take part in resolution too,
+    so a candidate can shadow (or be shadowed by) an existing rule.
+
+    Returns totals per department and per rule.
+    """
+    started = time.monotonic()
+    matrix = matrix_cache.get(period_start, period_end)
+
+    rules = list(candidates)
+    if include_active:
+        rules += rule_index.get().rules
+    index = RuleIndex(rules)
+
+    # Resolve rules once per (department, role) and evaluate each rule over
+    # all the rows it applies to at once.
+    worked = matrix.totals()
+    by_group = defaultdict(list)
+    for row in range(len(matrix)):
+        if worked[row] > 0:
+            by_group[matrix.groups(row)].append(row)
+    rows_by_rule = defaultdict(list)
+    for group, rows in by_group.items():
+        for rule in index.rules_for(*group):
+            rows_by_rule[id(rule)].extend(rows)
+
+    departments = defaultdict(lambda: {"employees": set(), "hours_overtime": 0.0, "cost": 0.0})
+    by_rule = defaultdict(lambda: {"employees": 0, "hours_overtime": 0.0, "cost": 0.0})
+
+    for rule in rules:
+        rows = rows_by_rule.get(id(rule))
+        if not rows:
+            continue
+        overtime = _overtime_hours(matrix, rule, rows)
+        if overtime is None:
+            continue
+
+        multiplier = float(rule.multiplier)
+        rule_totals = by_rule[_rule_label(rule, candidates)]
+        for row, hours in zip(rows, overtime):
+            if hours <= 0:
+                continue
+            hours = float(hours)
+            cost = hours * matrix.pay_rates[row] * multiplier
+            department_totals = departments[matrix.groups(row)[0]]
+            for totals in (department_totals, rule_totals):
+                totals["hours_overtime"] += hours
+                totals["cost"] += cost
+            rule_totals["employees"] += 1
+            department_totals["employees"].add(row)
+
+    names = dict(Department.objects.filter(pk__in=[d for d in departments if d]).values_list("pk", "name"))
+
+    return {
+        "period_start": period_start,
+        "period_end": period_end,
+        "employees_evaluated": sum(len(rows) for rows in by_group.values()),
+        "departments": [
+            {
+                "department_id": department_id,
+                "department": names.get(department_id, "Unassigned"),
+                "employees": len(totals["employees"]),
+                "hours_overtime": round(totals["hours_overtime"], 2),
+                "cost": round(totals["cost"], 2),
+            }
+            for department_id, totals in sorted(departments.items(), key=lambda item: (item[0] is None, item[0] or 0))
+        ],
+        "rules": [
+            {
+                "rule": label,
+                "employees": totals["employees"],
+                "hours_overtime": round(totals["hours_overtime"], 2),
+                "cost": round(totals["cost"], 2),
+            }
+            for label, totals in sorted(by_rule.items())
+        ],
+        "total_hours_overtime": round(sum(t["hours_overtime"] for t in departments.values()), 2),
+        "total_cost": round(sum(t["cost"] for t in departments.values()), 2),
+        "seconds": round(time.monotonic() - started, 3),
+    }
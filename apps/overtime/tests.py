@@ -1,3 +1,373 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.attendance import edits
+from apps.attendance.models import WorkSession
+from apps.users.models import Department, Employee, Role
+from . import services
+from .models import OvertimeEntry, OvertimeRule, RecalculationJob
+from .serializers import SimulationSerializer
+from .simulation import matrix_cache, simulate
+
+
+def at(day, hour, minute=0):
+    return datetime.combine(day, time(hour, minute), tzinfo=dt_timezone.utc)
+
+
+def make_employee(code, **fields):
+    return Employee.objects.create(username=code, employee_code=code, pay_rate=Decimal("10.00"), **fields)
+
+
+def make_session(employee, clock_in_at, hours):
+    return WorkSession.objects.create(
+        employee=employee,
+        clock_in_at=clock_in_at,
+        clock_out_at=clock_in_at + timedelta(hours=hours),
+        total_work_duration=timedelta(hours=hours),
+        work_date=clock_in_at.date(),
+    )
+
+
+def week_of(day):
+    monday = day - timedelta(days=day.weekday())
+    return monday, monday + timedelta(days=6)
+
+
+def overtime_hours(employee):
+    return {
+        entry.rule.name: entry.hours_overtime
+        for entry in OvertimeEntry.objects.filter(employee=employee).select_related("rule")
+    }
+
+
+class CalculateOvertimeTests(TestCase):
+
+    def setUp(self):
+        self.start, self.end = week_of(timezone.localdate() - timedelta(days=14))
+        self.employee = make_employee("E1")
+
+    def test_daily_rule(self):
+        OvertimeRule.objects.create(name="daily", scope=OvertimeRule.DAILY, threshold_hours=8, multiplier=Decimal("1.5"))
+        make_session(self.employee, at(self.start, 8), 10)
+        make_session(self.employee, at(self.start + timedelta(days=1), 8), 7)
+
+        self.assertEqual(services.calculate_overtime_for_period(self.start, self.end), 1)
+
+        entry = OvertimeEntry.objects.get()
+        self.assertEqual(entry.hours_regular, Decimal("15.00"))
+        self.assertEqual(entry.hours_overtime, Decimal("2.00"))
+        self.assertEqual(entry.overtime_amount, Decimal("30.00"))
+
+    def test_weekly_rule(self):
+        OvertimeRule.objects.create(name="weekly", scope=OvertimeRule.WEEKLY, threshold_hours=40)
+        for offset in range(5):
+            make_session(self.employee, at(self.start + timedelta(days=offset), 8), 9)
+
+        services.calculate_overtime_for_period(self.start, self.end)
+
+        self.assertEqual(overtime_hours(self.employee), {"weekly": Decimal("5.00")})
+
+    def test_weekly_rule_applies_per_calendar_week(self):
+        OvertimeRule.objects.create(name="weekly", scope=OvertimeRule.WEEKLY, threshold_hours=40)
+        end = self.end + timedelta(weeks=1)
+        for offset in range(5):
+            make_session(self.employee, at(self.start + timedelta(days=offset), 8), 9)
+            make_session(self.employee, at(self.start + timedelta(days=offset + 7), 8), 6)
+
+        services.calculate_overtime_for_period(self.start, end)
+
+        entry = OvertimeEntry.objects.get()
+        self.assertEqual(entry.hours_overtime, Decimal("5.00"))
+        self.assertEqual(entry.hours_regular, Decimal("70.00"))
+
+    def test_locked_entries_are_kept_and_stale_ones_removed(self):
+        daily = OvertimeRule.objects.create(name="daily", scope=OvertimeRule.DAILY, threshold_hours=8)
+        weekly = OvertimeRule.objects.create(name="weekly", scope=OvertimeRule.WEEKLY, threshold_hours=5)
+        make_session(self.employee, at(self.start, 8), 10)
+        services.calculate_overtime_for_period(self.start, self.end)
+        OvertimeEntry.objects.filter(rule=daily).update(is_locked=True, hours_overtime=1)
+
+        make_session(self.employee, at(self.start + timedelta(days=1), 8), 10)
+        weekly.is_active = False
+        weekly.save()
+        services.calculate_overtime_for_period(self.start, self.end)
+
+        self.assertEqual(overtime_hours(self.employee), {"daily": Decimal("1.00")})
+
+    def test_entries_without_overtime_left_are_removed(self):
+        rule = OvertimeRule.objects.create(name="daily", scope=OvertimeRule.DAILY, threshold_hours=8)
+        other = make_employee("E2")
+        session = make_session(self.employee, at(self.start, 8), 10)
+        make_session(other, at(self.start, 8), 10)
+        services.calculate_overtime_for_period(self.start, self.end)
+
+        # Overtime falls to zero.
+        WorkSession.objects.filter(pk=session.pk).update(clock_out_at=at(self.start, 15))
+        services.calculate_overtime_for_period(self.start, self.end, employee_ids=[self.employee.pk])
+        self.assertEqual(overtime_hours(self.employee), {})
+        self.assertEqual(overtime_hours(other), {"daily": Decimal("2.00")})
+
+        # No hours left in the period.
+        services.calculate_overtime_for_period(self.start, self.end)
+        WorkSession.objects.filter(employee=other).delete()
+        services.calculate_overtime_for_period(self.start, self.end)
+        self.assertEqual(overtime_hours(other), {})
+
+        # No active rules.
+        make_session(other, at(self.start, 8), 10)
+        services.calculate_overtime_for_period(self.start, self.end)
+        rule.is_active = False
+        rule.save()
+        services.calculate_overtime_for_period(self.start, self.end)
+        self.assertFalse(OvertimeEntry.objects.exists())
+
+    def test_employee_ids_limit_the_run(self):
+        OvertimeRule.objects.create(name="daily", scope=OvertimeRule.DAILY, threshold_hours=8)
+        other = make_employee("E2")
+        for employee in (self.employee, other):
+            make_session(employee, at(self.start, 8), 10)
+
+        services.calculate_overtime_for_period(self.start, self.end, employee_ids=[other.pk])
+
+        self.assertEqual(list(OvertimeEntry.objects.values_list("employee_id", flat=True)), [other.pk])
+
+
+class RuleResolutionTests(TestCase):
+
+    def setUp(self):
+        self.start, self.end = week_of(timezone.localdate() - timedelta(days=14))
+        self.employee = make_employee("E1")
+
+    def test_most_specific_rule_applies(self):
+        department = Department.objects.create(name="Assembly", code="ASM")
+        OvertimeRule.objects.create(name="org", scope=OvertimeRule.DAILY, threshold_hours=8)
+        OvertimeRule.objects.create(name="assembly", scope=OvertimeRule.DAILY, threshold_hours=6, department=department)
+        other = make_employee("E2", department=department)
+        for employee in (self.employee, other):
+            make_session(employee, at(self.start, 8), 10)
+
+        services.calculate_overtime_for_period(self.start, self.end)
+
+        self.assertEqual(overtime_hours(self.employee), {"org": Decimal("2.00")})
+        self.assertEqual(overtime_hours(other), {"assembly": Decimal("4.00")})
+
+
+class LocalDayTests(TestCase):
+
+    def setUp(self):
+        self.start, self.end = week_of(timezone.localdate() - timedelta(days=14))
+        self.employee = make_employee("E1")
+
+    def test_night_shift_is_split_between_days(self):
+        OvertimeRule.objects.create(name="daily", scope=OvertimeRule.DAILY, threshold_hours=8)
+        # 22:00-08:00: two hours on the first day, eight on the second.
+        make_session(self.employee, at(self.start, 22), 10)
+
+        self.assertEqual(services.calculate_overtime_for_period(self.start, self.end), 0)
+
+    def test_session_started_before_period_counts_its_part(self):
+        OvertimeRule.objects.create(name="daily", scope=OvertimeRule.DAILY, threshold_hours=8)
+        # 20:00 on the Sunday before until 06:00 Monday, then ten more hours.
+        make_session(self.employee, at(self.start - timedelta(days=1), 20), 10)
+        make_session(self.employee, at(self.start, 8), 4)
+
+        services.calculate_overtime_for_period(self.start, self.end)
+
+        self.assertEqual(overtime_hours(self.employee), {"daily": Decimal("2.00")})
+
+
+class RecalculationJobTests(TestCase):
+
+    def setUp(self):
+        self.start, self.end = week_of(timezone.localdate() - timedelta(days=14))
+        OvertimeRule.objects.create(name="daily", scope=OvertimeRule.DAILY, threshold_hours=8)
+        self.employees = [make_employee(f"E{n}") for n in range(3)]
+        for employee in self.employees:
+            make_session(employee, at(self.start, 8), 9)
+
+    def test_job_runs_in_batches(self):
+        services.queue_recalculation(self.start, self.end, batch_size=2)
+
+        job = services.claim_next_job()
+        self.assertEqual(job.status, RecalculationJob.RUNNING)
+        self.assertIsNone(services.claim_next_job())
+
+        job = services.run_recalculation_job(job)
+
+        self.assertEqual(job.status, RecalculationJob.COMPLETED)
+        self.assertEqual((job.batches_completed, job.batches_total), (2, 2))
+        self.assertEqual((job.employees_processed, job.rows_written), (3, 3))
+        self.assertEqual(OvertimeEntry.objects.count(), 3)
+
+    @override_settings(OVERTIME_JOB_LEASE_SECONDS=60)
+    def test_abandoned_job_is_reclaimed(self):
+        services.queue_recalculation(self.start, self.end)
+        abandoned = services.claim_next_job()
+        self.assertIsNone(services.claim_next_job())
+
+        RecalculationJob.objects.update(heartbeat_at=timezone.now() - timedelta(seconds=61))
+        job = services.claim_next_job()
+        self.assertEqual(job.pk, abandoned.pk)
+        self.assertGreater(job.started_at, abandoned.started_at)
+
+        # The first worker finds its claim gone after its batch and stops
+        # without recording progress against the new claim.
+        stopped = services.run_recalculation_job(abandoned)
+        self.assertEqual((stopped.status, stopped.batches_completed), (RecalculationJob.RUNNING, 0))
+
+        job = services.run_recalculation_job(job)
+        self.assertEqual(job.status, RecalculationJob.COMPLETED)
+        self.assertEqual(OvertimeEntry.objects.count(), 3)
+
+    def test_job_covers_employees_whose_time_is_gone(self):
+        services.calculate_overtime_for_period(self.start, self.end)
+        # One employee's time is gone, the others' is no longer overtime.
+        rule = OvertimeRule.objects.get()
+        rule.threshold_hours = 10
+        rule.save()
+        WorkSession.objects.filter(employee=self.employees[0]).delete()
+        services.queue_recalculation(self.start, self.end)
+
+        services.run_recalculation_job(services.claim_next_job())
+
+        self.assertFalse(OvertimeEntry.objects.exists())
+
+    def test_queue_for_days_uses_existing_periods(self):
+        services.calculate_overtime_for_period(self.start, self.end)
+        RecalculationJob.objects.all().delete()
+        day = self.start + timedelta(days=2)
+
+        (job,) = services.queue_recalculation_for_days([(self.employees[0].pk, day)])
+        self.assertEqual((job.period_start, job.period_end), (self.start, self.end))
+
+        # Not queued twice, and days outside any known period queue nothing.
+        self.assertEqual(services.queue_recalculation_for_days([(self.employees[1].pk, day)]), [])
+        self.assertEqual(services.queue_recalculation_for_days([(self.employees[0].pk, self.end + timedelta(days=30))]), [])
+
+
+class EditedOvertimeTests(TestCase):
+
+    def test_approved_edit_into_overtime_is_recalculated(self):
+        start, end = week_of(timezone.localdate() - timedelta(days=14))
+        OvertimeRule.objects.create(name="daily", scope=OvertimeRule.DAILY, threshold_hours=8)
+        department = Department.objects.create(name="Assembly", code="ASM")
+        manager = make_employee("M1", department=department, role=Role.objects.create(name="MANAGER"))
+        a = make_employee("A", department=department)
+        b = make_employee("B", department=department)
+        make_session(a, at(start, 8), 10)
+        session = make_session(b, at(start, 8), 6)
+        services.calculate_overtime_for_period(start, end)
+        self.assertEqual(overtime_hours(b), {})
+
+        request = edits.submit(b, at(start, 6), at(start, 20), "Double shift", session=session)
+        edits.review(manager, [request.pk], approve=True)
+
+        job = services.claim_next_job()
+        self.assertEqual((job.period_start, job.period_end), (start, end))
+        services.run_recalculation_job(job)
+        self.assertEqual(overtime_hours(b), {"daily": Decimal("6.00")})
+        self.assertEqual(overtime_hours(a), {"daily": Decimal("2.00")})
+
+
+    def test_approved_edit_out_of_overtime_is_recalculated(self):
+        start, end = week_of(timezone.localdate() - timedelta(days=14))
+        OvertimeRule.objects.create(name="daily", scope=OvertimeRule.DAILY, threshold_hours=8)
+        department = Department.objects.create(name="Assembly", code="ASM")
+        manager = make_employee("M1", department=department, role=Role.objects.create(name="MANAGER"))
+        employee = make_employee("A", department=department)
+        session = make_session(employee, at(start, 8), 12)
+        services.calculate_overtime_for_period(start, end)
+        self.assertEqual(overtime_hours(employee), {"daily": Decimal("4.00")})
+
+        request = edits.submit(employee, at(start, 8), at(start, 15), "Left early", session=session)
+        edits.review(manager, [request.pk], approve=True)
+        services.run_recalculation_job(services.claim_next_job())
+
+        self.assertEqual(overtime_hours(employee), {})
+
+
+class SimulationTests(TestCase):
+
+    def setUp(self):
+        matrix_cache.clear()
+        self.addCleanup(matrix_cache.clear)
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.employee = make_employee("E1", department=self.department)
+        today = timezone.localdate()
+        self.end = today - timedelta(days=today.weekday() + 1)
+        self.start = self.end - timedelta(weeks=52) + timedelta(days=1)
+        # A year of 40-hour weeks.
+        WorkSession.objects.bulk_create(
+            WorkSession(
+                employee=self.employee,
+                clock_in_at=at(day, 8),
+                clock_out_at=at(day, 16),
+                total_work_duration=timedelta(hours=8),
+                work_date=day,
+            )
+            for day in (self.start + timedelta(days=n) for n in range(364))
+            if day.weekday() < 5
+        )
+
+    def candidate(self, scope, threshold):
+        return OvertimeRule(name="candidate", scope=scope, threshold_hours=Decimal(threshold), multiplier=Decimal("1.5"))
+
+    def test_weekly_rule_is_evaluated_per_week(self):
+        weekly = self.candidate(OvertimeRule.WEEKLY, 40)
+        result = simulate([weekly], self.start, self.end)
+        self.assertEqual(result["total_hours_overtime"], 0)
+
+        matrix_cache.clear()
+        make_session(self.employee, at(self.start + timedelta(days=5), 8), 5)
+        result = simulate([weekly], self.start, self.end)
+
+        self.assertEqual(result["total_hours_overtime"], 5)
+        self.assertEqual(result["total_cost"], 75)
+        self.assertEqual(result["departments"][0]["department"], "Assembly")
+
+        # Recalculation evaluates the saved rule the same way.
+        weekly.save()
+        services.calculate_overtime_for_period(self.start, self.end)
+        self.assertEqual(overtime_hours(self.employee), {"candidate": Decimal("5.00")})
+
+    def test_daily_rule(self):
+        result = simulate([self.candidate(OvertimeRule.DAILY, 7)], self.start, self.end)
+
+        self.assertEqual(result["total_hours_overtime"], 260)
+        self.assertEqual(result["rules"], [{"rule": "candidate:0", "employees": 1, "hours_overtime": 260, "cost": 3900}])
+
+    def test_active_rules_shadow_candidates(self):
+        OvertimeRule.objects.create(name="assembly", scope=OvertimeRule.DAILY, threshold_hours=6, department=self.department)
+        candidate = self.candidate(OvertimeRule.DAILY, 7)
+
+        result = simulate([candidate], self.start, self.end, include_active=True)
+
+        self.assertEqual([rule["rule"] for rule in result["rules"]], [f"rule:{OvertimeRule.objects.get().pk}"])
+        self.assertEqual(result["total_hours_overtime"], 520)
+
+    def test_clock_outs_reach_cached_matrices(self):
+        before = matrix_cache.get(self.start, self.end)
+        session = make_session(self.employee, at(self.end, 8), 3)
+
+        matrix_cache.add_session(session)
+        after = matrix_cache.get(self.start, self.end)
+
+        row = after.row(self.employee.pk)
+        self.assertEqual(after.totals([row])[0] - before.totals([row])[0], 3 * 3600)
+        self.assertEqual(simulate([self.candidate(OvertimeRule.WEEKLY, 40)], self.start, self.end)["total_hours_overtime"], 3)
+
+    def test_period_is_capped(self):
+        data = {
+            "period_start": self.start.isoformat(),
+            "rules": [{"scope": OvertimeRule.DAILY, "threshold_hours": "8", "multiplier": "1.5"}],
+        }
+
+        year = SimulationSerializer(data={**data, "period_end": (self.start + timedelta(days=365)).isoformat()})
+        self.assertTrue(year.is_valid(), year.errors)
+
+        longer = SimulationSerializer(data={**data, "period_end": (self.start + timedelta(days=366)).isoformat()})
+        self.assertFalse(longer.is_valid())
+        self.assertEqual(longer.errors["non_field_errors"], ["The period can span at most 366 days."])
@@ -1,12 +1,13 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import OvertimeRuleViewSet, OvertimeEntryViewSet
+from .views import OvertimeRuleViewSet, OvertimeEntryViewSet, RecalculationJobViewSet
 
 app_name = "overtime"
 
 router = DefaultRouter()
 router.register(r"rules", OvertimeRuleViewSet, basename="overtime-rule")
 router.register(r"entries", OvertimeEntryViewSet, basename="overtime-entry")
+router.register(r"jobs", RecalculationJobViewSet, basename="recalculation-job")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -3,9 +3,16 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from datetime import datetime
 
-from .services import calculate_overtime_for_period
-from .models import OvertimeRule, OvertimeEntry
-from .serializers import OvertimeRuleSerializer, OvertimeEntrySerializer
+from config.routers import ReplicaReadMixin
+from .services import queue_recalculation
+from .simulation import simulate
+from .models import OvertimeRule, OvertimeEntry, RecalculationJob
+from .serializers import (
+    OvertimeRuleSerializer,
+    OvertimeEntrySerializer,
+    RecalculationJobSerializer,
+    SimulationSerializer,
+)
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -15,15 +22,38 @@ class IsAdminOrReadOnly(permissions.BasePermission):
         return request.user and request.user.is_staff
 
 
+class IsAdminUser(permissions.IsAdminUser):
+    pass
+
+
 class OvertimeRuleViewSet(viewsets.ModelViewSet):
     queryset = OvertimeRule.objects.all()
     serializer_class = OvertimeRuleSerializer
     permission_classes = [IsAdminOrReadOnly]
 
-class IsAdminUser(permissions.IsAdminUser):
-    pass
+    @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
+    def simulate(self, request):
+        """
+        Admin-only: project the overtime hours and cost of candidate rules
+        over a period without writing anything.
+        Body: {"period_start": "2025-01-01", "period_end": "2025-12-31",
+               "rules": [{"scope": "weekly", "threshold_hours": "40",
+                          "multiplier": "1.5", "department": 3}],
+               "include_active": false}
+        """
+        serializer = SimulationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        result = simulate(
+            serializer.candidates(),
+            data["period_start"],
+            data["period_end"],
+            include_active=data["include_active"],
+        )
+        return Response(result, status=status.HTTP_200_OK)
 
-class OvertimeEntryViewSet(viewsets.ReadOnlyModelViewSet):
+class OvertimeEntryViewSet(ReplicaReadMixin, viewsets.ReadOnlyModelViewSet):
     serializer_class = OvertimeEntrySerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -38,8 +68,11 @@ class OvertimeEntryViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=["post"], permission_classes=[IsAdminUser])
     def recalculate(self, request):
         """
-        Admin-only: recalculate overtime entries for a given date range.
+        Admin-only: queue an overtime recalculation for a given date range.
         Body: {"period_start": "2025-01-01", "period_end": "2025-01-31"}
+
+        The work runs in the `run_recalculation_jobs` worker; poll
+        /api/v1/overtime/jobs/<id>/ for progress.
         """
         period_start = request.data.get("period_start")
         period_end = request.data.get("period_end")
@@ -65,9 +98,24 @@ class OvertimeEntryViewSet(viewsets.ReadOnlyModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        calculate_overtime_for_period(start, end)
+        job = queue_recalculation(start, end, requested_by=request.user)
 
         return Response(
-            {"detail": "Overtime recalculation completed.", "period_start": period_start, "period_end": period_end},
-            status=status.HTTP_200_OK,
-        )
\ No newline at end of file
+            {
+                "detail": "Overtime recalculation queued.",
+                "job_id": job.pk,
+                "status": job.status,
+                "period_start": period_start,
+                "period_end": period_end,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class RecalculationJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Admin-only: progress, rows written and timing of recalculation jobs.
+    """
+    queryset = RecalculationJob.objects.order_by("-created_at")
+    serializer_class = RecalculationJobSerializer
+    permission_classes = [IsAdminUser]
\ No newline at end of file
@@ -0,0 +1,121 @@
+"""
+In-process fan-out of clock-in/clock-out deltas to Server-Sent Events
+subscribers.
+
+Events are published from the attendance clock signals, which run in
+whichever thread committed the transaction. Each subscriber owns a bounded
+asyncio queue on its own event loop, so publishing never blocks on a
+client. A subscriber whose queue is full is dropped; the client is expected
+to reconnect and reload the board from /api/v1/tracker/live/.
+
+Configure with::
+
+    TRACKER_EVENT_STREAM = {
+        "QUEUE_SIZE": 100,  # pending events per client
+        "HEARTBEAT": 15,    # seconds between keep-alive comments
+    }
+"""
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+
+DEFAULTS = {
+    "QUEUE_SIZE": 100,
+    "HEARTBEAT": 15,
+}
+
+# Queued in place of events to tell a dropped subscriber's stream to end.
+CLOSE = object()
+
+
+def _config() -> dict:
+    return {**DEFAULTS, **getattr(settings, "TRACKER_EVENT_STREAM", {})}
+
+
+class Subscriber:
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue_size: int):
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.dropped = False
+
+    def offer(self, message) -> bool:
+        """
+        Queue a message; must run on the subscriber's loop. Returns False
+        if the subscriber was dropped for falling behind.
+        """
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+            # Make room for the sentinel so the stream ends promptly.
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(CLOSE)
+            return False
+        return True
+
+
+class Broadcaster:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: set[Subscriber] = set()
+        self._lock = threading.Lock()
+        self.published = 0
+        self.dropped = 0
+
+    def subscribe(self) -> Subscriber:
+        """Register a subscriber on the running event loop."""
+        subscriber = Subscriber(asyncio.get_running_loop(), self.queue_size)
+        with self._lock:
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _deliver(self, subscriber: Subscriber, message: str) -> None:
+        if subscriber.dropped:
+            return
+        if not subscriber.offer(message):
+            self.unsubscribe(subscriber)
+            self.dropped += 1
+
+    def publish(self, event: str, payload: dict) -> None:
+        """
+        Encode an event once and hand it to every subscriber's loop.
+        Safe to call from any thread.
+        """
+        message = f"event: {event}\ndata: {json.dumps(payload, separators=(',', ':'))}\n\n"
+
+        with self._lock:
+            subscribers = list(self._subscribers)
+
+        for subscriber in subscribers:
+            try:
+                subscriber.loop.call_soon_threadsafe(self._deliver, subscriber, message)
+            except RuntimeError:
+                # The subscriber's loop has shut down.
+                self.unsubscribe(subscriber)
+
+        self.published += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {
+            "subscribers": subscribers,
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+broadcaster = Broadcaster(queue_size=_config()["QUEUE_SIZE"])
+
+
+def heartbeat_interval() -> float:
+    return _config()["HEARTBEAT"]
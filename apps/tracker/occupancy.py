@@ -0,0 +1,217 @@
+"""
+In-process cache of who is currently clocked in, grouped by department.
+
+The board is loaded from the database on first use and then kept current
+by the attendance clock signals (see apps.tracker.signals). Events from
+other worker processes are not seen, so the board is also reloaded once it
+is older than the configured TTL. Clock events arriving during a load
+wait for it and are applied to the new board, so none is lost.
+
+Configure with::
+
+    TRACKER_OCCUPANCY_CACHE = {
+        "BACKEND": "apps.tracker.occupancy.LocalMemoryBackend",
+        "TTL": 30,  # seconds
+    }
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from apps.attendance.models import OpenSession
+from apps.users.models import Department
+
+UNASSIGNED = "Unassigned"
+
+DEFAULTS = {
+    "BACKEND": "apps.tracker.occupancy.LocalMemoryBackend",
+    "TTL": 30,
+}
+
+
+class Board:
+    """
+    Snapshot of open sessions: employee id -> department id, and department
+    id -> set of employee ids.
+    """
+
+    def __init__(self, rows=()):
+        self.employees: dict[int, Optional[int]] = {}
+        self.departments: dict[Optional[int], set[int]] = {}
+        for employee_id, department_id in rows:
+            self.add(employee_id, department_id)
+
+    def add(self, employee_id: int, department_id: Optional[int]) -> None:
+        self.remove(employee_id)
+        self.employees[employee_id] = department_id
+        self.departments.setdefault(department_id, set()).add(employee_id)
+
+    def remove(self, employee_id: int) -> None:
+        department_id = self.employees.pop(employee_id, None)
+        members = self.departments.get(department_id)
+        if members is not None:
+            members.discard(employee_id)
+            if not members:
+                del self.departments[department_id]
+
+    def snapshot(self) -> "Snapshot":
+        return Snapshot(
+            employee_ids=list(self.employees),
+            department_counts={d: len(members) for d, members in self.departments.items()},
+        )
+
+
+class Snapshot:
+    """
+    Immutable copy of a Board handed to readers.
+    """
+
+    def __init__(self, employee_ids: list[int], department_counts: dict[Optional[int], int]):
+        self.employee_ids = employee_ids
+        self.department_counts = department_counts
+
+
+class OccupancyBackend(ABC):
+    """
+    Storage for the occupancy board.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+
+    @abstractmethod
+    def get_or_load(self, load: Callable[[], Board]) -> tuple[Snapshot, bool]:
+        """
+        Snapshot of the board and whether it was loaded. The board is
+        replaced by ``load()`` when missing or older than ``ttl`` seconds;
+        ``add`` and ``remove`` wait for the load and apply to its result.
+        """
+
+    @abstractmethod
+    def add(self, employee_id: int, department_id: Optional[int]) -> None:
+        """Record a clock-in on a loaded board."""
+
+    @abstractmethod
+    def remove(self, employee_id: int) -> None:
+        """Record a clock-out on a loaded board."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        """Drop the board so the next read loads it."""
+
+
+class LocalMemoryBackend(OccupancyBackend):
+    """
+    Per-process board guarded by a lock, which is held while it loads.
+    """
+
+    def __init__(self, ttl: float):
+        super().__init__(ttl)
+        self._lock = threading.Lock()
+        self._board: Optional[Board] = None
+        self._loaded_at = 0.0
+
+    def get_or_load(self, load):
+        with self._lock:
+            loaded = self._board is None or time.monotonic() - self._loaded_at > self.ttl
+            if loaded:
+                self._board = load()
+                self._loaded_at = time.monotonic()
+            return self._board.snapshot(), loaded
+
+    def add(self, employee_id, department_id):
+        with self._lock:
+            # A cold board is loaded from the database on next read, which
+            # already includes this committed event.
+            if self._board is not None:
+                self._board.add(employee_id, department_id)
+
+    def remove(self, employee_id):
+        with self._lock:
+            if self._board is not None:
+                self._board.remove(employee_id)
+
+    def clear(self):
+        with self._lock:
+            self._board = None
+
+
+class OccupancyCache:
+    def __init__(self, backend: OccupancyBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        # Requests served by different threads update the counters.
+        self._stats_lock = threading.Lock()
+        self._department_names: dict[int, str] = {}
+
+    def _load(self) -> Board:
+        rows = OpenSession.objects.values_list("employee_id", "employee__department_id")
+        return Board(rows)
+
+    def snapshot(self) -> Snapshot:
+        snapshot, loaded = self.backend.get_or_load(self._load)
+        with self._stats_lock:
+            if loaded:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if loaded:
+            self._department_names = dict(Department.objects.values_list("id", "name"))
+        return snapshot
+
+    def employee_ids(self) -> list[int]:
+        return self.snapshot().employee_ids
+
+    def department_counts(self) -> dict[str, int]:
+        """
+        Mapping of department name -> clocked-in employee count, matching
+        utils.get_department_occupancy.
+        """
+        departments = self.snapshot().department_counts
+
+        missing = [d for d in departments if d is not None and d not in self._department_names]
+        if missing:
+            self._department_names.update(
+                Department.objects.filter(pk__in=missing).values_list("id", "name")
+            )
+
+        counts: dict[str, int] = {}
+        for department_id, count in departments.items():
+            name = self._department_names.get(department_id) or UNASSIGNED
+            counts[name] = counts.get(name, 0) + count
+        return counts
+
+    def record_clock_in(self, employee_id: int, department_id: Optional[int]) -> None:
+        self.backend.add(employee_id, department_id)
+
+    def record_clock_out(self, employee_id: int) -> None:
+        self.backend.remove(employee_id)
+
+    def invalidate(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            hits, misses = self.hits, self.misses
+        lookups = hits + misses
+        return {
+            "backend": f"{type(self.backend).__module__}.{type(self.backend).__name__}",
+            "ttl": self.backend.ttl,
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+        }
+
+
+def _build() -> OccupancyCache:
+    config = {**DEFAULTS, **getattr(settings, "TRACKER_OCCUPANCY_CACHE", {})}
+    backend_class = import_string(config["BACKEND"])
+    return OccupancyCache(backend_class(ttl=config["TTL"]))
+
+
+occupancy = _build()
@@ -0,0 +1,47 @@
+from django.dispatch import receiver
+
+from apps.attendance.events import session_clocked_in, session_clocked_out, summaries_changed
+from . import summary_cache
+from .broadcast import broadcaster
+from .occupancy import occupancy
+
+
+@receiver(session_clocked_in)
+def add_to_occupancy(sender, session, **kwargs):
+    occupancy.record_clock_in(session.employee_id, session.employee.department_id)
+
+
+@receiver(session_clocked_out)
+def remove_from_occupancy(sender, session, **kwargs):
+    occupancy.record_clock_out(session.employee_id)
+
+
+@receiver(session_clocked_in)
+def broadcast_clock_in(sender, session, **kwargs):
+    broadcaster.publish("clock_in", {
+        "employee": session.employee_id,
+        "department": session.employee.department_id,
+        "timestamp": session.clock_in_at.isoformat(),
+        "source": session.clock_in_source,
+    })
+
+
+@receiver(session_clocked_out)
+def broadcast_clock_out(sender, session, **kwargs):
+    broadcaster.publish("clock_out", {
+        "employee": session.employee_id,
+        "department": session.employee.department_id,
+        "timestamp": session.clock_out_at.isoformat(),
+        "source": session.clock_out_source,
+    })
+
+
+@receiver(session_clocked_in)
+@receiver(session_clocked_out)
+def drop_cached_summary(sender, session, **kwargs):
+    summary_cache.invalidate([(session.employee_id, session.work_date)])
+
+
+@receiver(summaries_changed)
+def drop_cached_summaries(sender, keys, **kwargs):
+    summary_cache.invalidate(keys)
@@ -0,0 +1,63 @@
+"""
+Per-employee, per-day cache of the personal summary (/tracker/my-summary/).
+
+Entries live in the ``settings.TRACKER_SUMMARY_CACHE_ALIAS`` cache of the Django
+cache framework, which must be shared by all workers (a database cache by
+default) so invalidations reach each of them. Each entry stores the summary with its ETag and
+Last-Modified validators, so a conditional refresh of an unchanged day is
+answered from the cache alone: one cache read, which for the database
+cache is a primary-key lookup on the primary (measured by the
+``my_summary_revalidate`` benchmark).
+
+Entries are dropped when the employee clocks in or out and when their
+day summaries are rewritten (see apps.tracker.signals). The view is not
+replica-routed, so misses are filled from the primary and an entry never
+captures replica lag.
+"""
+import hashlib
+import json
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .utils import calculate_daily_stats
+
+DEFAULT_CACHE_ALIAS = "default"
+
+
+def _cache():
+    return caches[getattr(settings, "TRACKER_SUMMARY_CACHE_ALIAS", DEFAULT_CACHE_ALIAS)]
+
+
+def _key(employee_id: int, day: date) -> str:
+    return f"my-summary:{employee_id}:{day.isoformat()}"
+
+
+def get(employee, day: date) -> dict:
+    """
+    ``{"stats": ..., "etag": ..., "last_modified": ...}`` for one employee
+    and local day, computed and stored on a miss.
+    """
+    cache = _cache()
+    key = _key(employee.pk, day)
+    entry = cache.get(key)
+    if entry is not None:
+        return entry
+
+    stats = calculate_daily_stats(employee, day)
+    body = json.dumps(stats, cls=DjangoJSONEncoder, sort_keys=True).encode()
+    updated_at = stats["updated_at"]
+    entry = {
+        "stats": stats,
+        "etag": '"%s"' % hashlib.md5(body, usedforsecurity=False).hexdigest(),
+        "last_modified": int(updated_at.timestamp()) if updated_at else None,
+    }
+    cache.set(key, entry)
+    return entry
+
+
+def invalidate(keys) -> None:
+    _cache().delete_many([_key(employee_id, day) for employee_id, day in keys])
+
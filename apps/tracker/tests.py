@@ -0,0 +1,170 @@
+import asyncio
+import json
+import threading
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.attendance import services
+from apps.users.models import Department, Employee
+from .broadcast import CLOSE, Broadcaster, broadcaster
+from .occupancy import Board, LocalMemoryBackend, OccupancyBackend, OccupancyCache, occupancy
+from .views import EmployeeDailySummaryView
+
+
+def make_employee(code, **fields):
+    return Employee.objects.create(username=code, employee_code=code, **fields)
+
+
+class SummaryCacheTests(TestCase):
+
+    def setUp(self):
+        self.employee = make_employee("E1")
+
+    def get(self, **headers):
+        request = APIRequestFactory().get("/api/v1/tracker/my-summary/", **headers)
+        force_authenticate(request, user=self.employee)
+        return EmployeeDailySummaryView.as_view()(request)
+
+    def test_unchanged_day_is_revalidated_from_the_cache(self):
+        first = self.get()
+        self.assertEqual(first.status_code, 200)
+
+        # The only query is the database cache's read of the entry.
+        with self.assertNumQueries(1):
+            again = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(again.status_code, 304)
+        self.assertEqual(again["ETag"], first["ETag"])
+
+    def test_clocking_out_drops_the_cached_summary(self):
+        now = timezone.now()
+        services.clock_in(self.employee, when=now - timedelta(minutes=1))
+        first = self.get()
+        self.assertEqual(first.data["session_count"], 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            services.clock_out(self.employee, when=now)
+
+        response = self.get(HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["session_count"], 1)
+        self.assertNotEqual(response["ETag"], first["ETag"])
+
+
+class OccupancyTests(TestCase):
+
+    def setUp(self):
+        occupancy.invalidate()
+        self.addCleanup(occupancy.invalidate)
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+        self.first = make_employee("E1", department=self.department)
+        self.second = make_employee("E2")
+
+    def test_board_follows_clock_events(self):
+        now = timezone.now()
+        services.clock_in(self.first, when=now - timedelta(hours=1))
+        cache = OccupancyCache(LocalMemoryBackend(ttl=30))
+
+        self.assertEqual(cache.department_counts(), {"Assembly": 1})
+        cache.record_clock_in(self.second.pk, None)
+        cache.record_clock_out(self.first.pk)
+
+        self.assertEqual(cache.department_counts(), {"Unassigned": 1})
+        self.assertEqual(cache.employee_ids(), [self.second.pk])
+        self.assertEqual((cache.stats()["hits"], cache.stats()["misses"]), (2, 1))
+
+    def test_clock_signals_reach_the_board(self):
+        occupancy.employee_ids()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            services.clock_in(self.first, when=timezone.now() - timedelta(hours=1))
+
+        self.assertEqual(occupancy.department_counts(), {"Assembly": 1})
+
+    def test_clock_out_during_a_load_is_applied(self):
+        cache = OccupancyCache(LocalMemoryBackend(ttl=30))
+        clock_out = threading.Thread(target=cache.record_clock_out, args=(self.first.pk,))
+
+        def load():
+            # The clock-out committed after the board was read.
+            clock_out.start()
+            clock_out.join(timeout=0.2)
+            self.assertTrue(clock_out.is_alive())
+            return Board([(self.first.pk, self.department.pk)])
+
+        cache._load = load
+        self.assertEqual(cache.employee_ids(), [self.first.pk])
+        clock_out.join()
+
+        self.assertEqual(cache.employee_ids(), [])
+
+    def test_backends_implement_every_operation(self):
+        class Incomplete(OccupancyBackend):
+            def get_or_load(self, load):
+                return load().snapshot(), True
+
+        with self.assertRaises(TypeError):
+            Incomplete(ttl=30)
+
+
+class BroadcastTests(TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+
+    def subscribe(self, source):
+        async def subscribe():
+            return source.subscribe()
+        return self.loop.run_until_complete(subscribe())
+
+    def receive(self, subscriber):
+        return self.loop.run_until_complete(asyncio.wait_for(subscriber.queue.get(), timeout=1))
+
+    def test_events_reach_every_subscriber(self):
+        source = Broadcaster(queue_size=10)
+        first, second = self.subscribe(source), self.subscribe(source)
+
+        publisher = threading.Thread(target=source.publish, args=("clock_in", {"employee": 1}))
+        publisher.start()
+        publisher.join()
+
+        for subscriber in (first, second):
+            self.assertEqual(self.receive(subscriber), 'event: clock_in\ndata: {"employee":1}\n\n')
+        self.assertEqual(source.stats(), {"subscribers": 2, "published": 1, "dropped": 0})
+
+    def test_slow_subscribers_are_dropped(self):
+        source = Broadcaster(queue_size=2)
+        subscriber = self.subscribe(source)
+
+        for employee in range(3):
+            source.publish("clock_in", {"employee": employee})
+        self.loop.run_until_complete(asyncio.sleep(0))
+
+        self.assertIs(self.receive(subscriber), CLOSE)
+        self.assertEqual(source.stats(), {"subscribers": 0, "published": 3, "dropped": 1})
+
+    def test_clock_events_are_published(self):
+        department = Department.objects.create(name="Assembly", code="ASM")
+        employee = make_employee("E1", department=department)
+        subscriber = self.subscribe(broadcaster)
+        self.addCleanup(broadcaster.unsubscribe, subscriber)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            session = services.clock_in(employee, source="KIOSK", when=timezone.now() - timedelta(hours=1))
+
+        event, data = self.receive(subscriber).strip().split("\n")
+        self.assertEqual(event, "event: clock_in")
+        self.assertEqual(json.loads(data.removeprefix("data: ")), {
+            "employee": employee.pk,
+            "department": department.pk,
+            "timestamp": session.clock_in_at.isoformat(),
+            "source": "KIOSK",
+        })
+
+    async def test_stream_requires_authentication(self):
+        response = await self.async_client.get("/api/v1/tracker/live/events/")
+
+        self.assertEqual(response.status_code, 401)
@@ -1,5 +1,12 @@
 from django.urls import path
-from .views import DashboardLiveView, DepartmentStatsView, EmployeeDailySummaryView
+from .views import (
+    DashboardLiveView,
+    DepartmentStatsView,
+    EmployeeDailySummaryView,
+    EmployeeWeeklySummaryView,
+    OccupancyCacheStatsView,
+    live_events,
+)
 
 # The app_name helps with 'namespacing' (e.g., tracker:live-dashboard)
 app_name = 'tracker'
@@ -11,10 +18,19 @@ urlpatterns = [
     
     # Path: /api/v1/tracker/live/
     path('live/', DashboardLiveView.as_view(), name='live-dashboard'),
+
+    # Path: /api/v1/tracker/live/cache-stats/
+    path('live/cache-stats/', OccupancyCacheStatsView.as_view(), name='occupancy-cache-stats'),
+
+    # Path: /api/v1/tracker/live/events/ (Server-Sent Events, ASGI only)
+    path('live/events/', live_events, name='live-events'),
     
     # Path: /api/v1/tracker/stats/departments/
     path('stats/departments/', DepartmentStatsView.as_view(), name='dept-stats'),
     
     # Path: /api/v1/tracker/my-summary/
     path('my-summary/', EmployeeDailySummaryView.as_view(), name='personal-summary'),
+
+    # Path: /api/v1/tracker/my-summary/weekly/
+    path('my-summary/weekly/', EmployeeWeeklySummaryView.as_view(), name='personal-weekly-summary'),
 ]
\ No newline at end of file
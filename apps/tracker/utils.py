@@ -1,6 +1,7 @@
 from django.utils import timezone
-from django.db.models import Sum, F, Count
-from apps.attendance.models import WorkSession
+from django.db.models import Count, Max, Q
+from apps.attendance import bucketing
+from apps.attendance.models import AttendanceDaySummary, OpenSession, WorkSession
 from apps.users.models import Employee
 from datetime import timedelta
 
@@ -10,31 +11,42 @@ def get_currently_clocked_in_employees():
     """
     return (
         Employee.objects
-        .filter(work_sessions__clock_out_at__isnull=True)
+        .filter(open_session__isnull=False)
         .select_related("department")
-        .distinct()
     )
 
 def calculate_daily_stats(employee, target_date=None):
+    """
+    Worked time and completed session count for one employee and local
+    day, read from the day's AttendanceDaySummary plus one aggregate over
+    its sessions. ``updated_at`` is the latest change to either.
+    """
     if target_date is None:
-        target_date = timezone.now().date()
+        target_date = bucketing.local_work_date(timezone.now(), employee.timezone)
 
-    sessions = WorkSession.objects.filter(
-        employee=employee,
-        work_date=target_date,
-        clock_out_at__isnull=False,
+    summary = (
+        AttendanceDaySummary.objects
+        .filter(employee=employee, work_date=target_date)
+        .values_list("total_work_duration", "updated_at")
+        .first()
     )
+    total_duration, summary_updated_at = summary or (timedelta(), None)
 
-    total_duration = sessions.aggregate(total=Sum("total_work_duration"))["total"] or timedelta()
+    sessions = WorkSession.objects.filter(employee=employee, work_date=target_date).aggregate(
+        count=Count("id", filter=Q(clock_out_at__isnull=False)),
+        updated_at=Max("updated_at"),
+    )
 
     total_seconds = int(total_duration.total_seconds())
+    updated = [t for t in (summary_updated_at, sessions["updated_at"]) if t is not None]
 
     return {
         "employee_code": employee.employee_code,
         "date": target_date,
         "total_seconds": total_seconds,
         "total_hours": round(total_seconds / 3600, 2),
-        "session_count": sessions.count(),
+        "session_count": sessions["count"],
+        "updated_at": max(updated) if updated else None,
     }
 
 def get_department_occupancy():
@@ -42,10 +54,10 @@ def get_department_occupancy():
     Returns a mapping of department name -> active employee count.
     """
     rows = (
-        WorkSession.objects
-        .filter(clock_out_at__isnull=True)
+        OpenSession.objects
         .values("employee__department__name")
-        .annotate(active_count=Count("employee", distinct=True))
+        .annotate(active_count=Count("employee"))
+        .order_by()
     )
 
     stats = {}
@@ -1,27 +1,45 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
 
+from apps.attendance import bucketing
+from apps.attendance.rollups import weekly_totals
+from config.routers import ReplicaReadMixin
+from apps.users.models import Employee
 from apps.users.serializers import EmployeeSerializer
-from .utils import (
-    get_currently_clocked_in_employees, 
-    get_department_occupancy, 
-    calculate_daily_stats
-)
+from .broadcast import CLOSE, broadcaster, heartbeat_interval
+from . import summary_cache
+from .occupancy import occupancy
 
-class DashboardLiveView(APIView):
+class DashboardLiveView(ReplicaReadMixin, APIView):
     """
     Returns a list of all employees currently clocked in.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        active_employees = get_currently_clocked_in_employees()
+        # Highlight: ids come from the in-memory occupancy board
+        employee_ids = occupancy.employee_ids()
+        active_employees = (
+            Employee.objects
+            .filter(pk__in=employee_ids)
+            .select_related("department", "role")
+        ) if employee_ids else Employee.objects.none()
         serializer = EmployeeSerializer(active_employees, many=True)
         return Response(
             {
-                "count": active_employees.count() if hasattr(active_employees, "count") else len(active_employees),
+                "count": len(employee_ids),
                 "employees": serializer.data,
             },
             status=status.HTTP_200_OK,
@@ -29,7 +47,7 @@ class DashboardLiveView(APIView):
 
 
 
-class DepartmentStatsView(APIView):
+class DepartmentStatsView(ReplicaReadMixin, APIView):
     """
     Returns the count of active employees grouped by department.
     """
@@ -37,17 +55,139 @@ class DepartmentStatsView(APIView):
 
     def get(self, request):
         # Highlight: Provides data for charts or heatmaps
-        occupancy_data = get_department_occupancy()
+        occupancy_data = occupancy.department_counts()
         return Response(occupancy_data, status=status.HTTP_200_OK)
 
 
+class EmployeeWeeklySummaryView(ReplicaReadMixin, APIView):
+    """
+    Returns weekly totals for the logged-in employee from the week rollups.
+
+    Query: ?start=YYYY-MM-DD&end=YYYY-MM-DD (defaults to the last 12 weeks).
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        today = timezone.now().date()
+        try:
+            start = request.query_params.get("start")
+            end = request.query_params.get("end")
+            end = datetime.strptime(end, "%Y-%m-%d").date() if end else today
+            start = datetime.strptime(start, "%Y-%m-%d").date() if start else end - timedelta(weeks=12)
+        except ValueError:
+            return Response(
+                {"detail": "Invalid date format. Use YYYY-MM-DD."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        weeks = [
+            {
+                "week_start": row["week_start"],
+                "total_seconds": int(row["total_work_duration"].total_seconds()),
+                "overtime_seconds": int(row["total_overtime_duration"].total_seconds()),
+                "days_present": row["days_present"],
+            }
+            for row in weekly_totals(request.user.pk, start, end)
+        ]
+        return Response(
+            {"employee_code": request.user.employee_code, "weeks": weeks},
+            status=status.HTTP_200_OK,
+        )
+
+
+class OccupancyCacheStatsView(APIView):
+    """
+    Admin-only: hit/miss counters of the occupancy cache for monitoring.
+    """
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(
+            {**occupancy.stats(), "stream": broadcaster.stats()},
+            status=status.HTTP_200_OK,
+        )
+
+
+async def _authenticate(request):
+    """
+    Resolve the user from a JWT Authorization header, falling back to the
+    Django session.
+    """
+    try:
+        result = await sync_to_async(JWTAuthentication().authenticate)(request)
+    except AuthenticationFailed:
+        return None
+    if result is not None:
+        return result[0]
+
+    user = await request.auser()
+    return user if user.is_authenticated else None
+
+
+async def live_events(request):
+    """
+    Server-Sent Events stream of clock-in/clock-out deltas.
+
+    Each event carries the employee id, department id, timestamp and
+    source. Clients should load /api/v1/tracker/live/ once and then apply
+    these deltas; a client that falls behind is disconnected and should
+    reconnect and reload. Serve under ASGI (config.asgi).
+    """
+    user = await _authenticate(request)
+    if user is None:
+        return JsonResponse(
+            {"detail": "Authentication credentials were not provided."},
+            status=status.HTTP_401_UNAUTHORIZED,
+        )
+
+    subscriber = broadcaster.subscribe()
+    heartbeat = heartbeat_interval()
+
+    async def stream():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscriber.queue.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is CLOSE:
+                    return
+                yield message
+        finally:
+            broadcaster.unsubscribe(subscriber)
+
+    response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
 class EmployeeDailySummaryView(APIView):
     """
-    Returns the total hours worked for the logged-in employee today.
+    Returns the total hours worked for the logged-in employee today (their
+    local day).
+
+    Served from the personal summary cache with ETag and Last-Modified; a
+    conditional request for an unchanged day gets 304 without touching
+    the attendance tables.
     """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        # Highlight: Uses the daily stats util for the current user
-        stats = calculate_daily_stats(request.user)
-        return Response(stats, status=status.HTTP_200_OK)
+        employee = request.user
+        today = bucketing.local_work_date(timezone.now(), employee.timezone)
+        entry = summary_cache.get(employee, today)
+
+        response = get_conditional_response(
+            request, etag=entry["etag"], last_modified=entry["last_modified"]
+        )
+        if response is None:
+            response = Response(entry["stats"], status=status.HTTP_200_OK)
+
+        response["ETag"] = entry["etag"]
+        if entry["last_modified"] is not None:
+            response["Last-Modified"] = http_date(entry["last_modified"])
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -6,14 +6,14 @@ from .models import Department, Role, Employee
 
 @admin.register(Department)
 class DepartmentAdmin(admin.ModelAdmin):
-    list_display = ("code", "name", "is_active")
+    list_display = ("code", "name", "is_active", "max_session_duration")
     search_fields = ("code", "name")
     list_filter = ("is_active",)
 
 
 @admin.register(Role)
 class RoleAdmin(admin.ModelAdmin):
-    list_display = ("name", "is_active")
+    list_display = ("name", "is_active", "max_session_duration")
     list_filter = ("is_active",)
 
 
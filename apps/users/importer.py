@@ -0,0 +1,379 @@
+"""
+Bulk employee import/sync from HRIS exports.
+
+Records are read from CSV (header row) or JSON Lines and applied in
+chunks. Per chunk, existing employees are loaded with one query, new ones
+are written with one bulk_create and changed ones with one bulk_update.
+Department codes and role names are resolved through maps loaded once per
+run, and all created accounts share one unusable password hash (imported
+employees sign in through SSO or a password reset).
+
+Recognised fields::
+
+    employee_code (required), username, first_name, last_name, email,
+    department (Department.code), role (Role.name), pay_type, pay_rate,
+    employment_status, hire_date, termination_date, timezone
+
+Blank or missing fields leave the employee's current value unchanged,
+except that a new employee gets the model default.
+"""
+import csv
+import json
+import time
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import IO, Iterable, Iterator, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Department, Employee, Role
+from .signals import PAY_FIELDS, pay_changed
+
+DEFAULT_CHUNK_SIZE = 1000
+
+TERMINATED = "TERMINATED"
+
+# Employee fields an import may set, in the order they are compared.
+IMPORT_FIELDS = [
+    "username",
+    "first_name",
+    "last_name",
+    "email",
+    "department_id",
+    "role_id",
+    "pay_type",
+    "pay_rate",
+    "employment_status",
+    "hire_date",
+    "termination_date",
+    "timezone",
+    "is_active",
+]
+
+_PAY_TYPES = {value for value, _ in Employee.PAY_TYPE_CHOICES}
+_STATUSES = {value for value, _ in Employee.EMPLOYMENT_STATUS_CHOICES}
+
+
+class RecordError(Exception):
+    """A record that cannot be applied; reported and skipped."""
+
+
+class ImportReport:
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.terminated = 0
+        self.unreadable = 0
+        self.errors: list[dict] = []
+        self.chunks: list[dict] = []
+        self.seconds = 0.0
+
+    def error(self, row: Optional[int], employee_code: Optional[str], message: str) -> None:
+        self.errors.append({"row": row, "employee_code": employee_code, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "rows": self.rows,
+            "created": self.created,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "terminated": self.terminated,
+            "unreadable": self.unreadable,
+            "errors": self.errors,
+            "chunks": self.chunks,
+            "seconds": round(self.seconds, 3),
+        }
+
+
+def read_records(stream: IO[str], fmt: str) -> Iterator:
+    """
+    Yield one dict per record from a text stream in "csv" or "jsonl"
+    format, without reading the whole file into memory.
+
+    A JSON Lines record that is not valid JSON or not an object is yielded
+    as a RecordError, so the import reports that row and carries on.
+    """
+    if fmt == "csv":
+        try:
+            yield from csv.DictReader(stream)
+        except csv.Error as exc:
+            raise ValueError(str(exc))
+    elif fmt == "jsonl":
+        for line in stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as exc:
+                yield RecordError(f"Invalid JSON: {exc.msg} at column {exc.colno}.")
+                continue
+            if not isinstance(record, dict):
+                yield RecordError("Record is not a JSON object.")
+                continue
+            yield record
+    else:
+        raise ValueError(f"Unsupported format: {fmt!r}. Use 'csv' or 'jsonl'.")
+
+
+def format_for(filename: str) -> str:
+    return "jsonl" if filename.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _chunks(records: Iterable[dict], size: int) -> Iterator[list[tuple[int, dict]]]:
+    chunk = []
+    for row, record in enumerate(records, start=1):
+        chunk.append((row, record))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _text(record: dict, key: str) -> Optional[str]:
+    value = record.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def _parse(record: dict, departments: dict, roles: dict) -> dict:
+    """
+    Convert one record into Employee field values, keeping only the fields
+    present in the record. Raises RecordError for invalid values.
+    """
+    values = {}
+
+    for field in ("username", "first_name", "last_name", "email", "timezone"):
+        value = _text(record, field)
+        if value is not None:
+            values[field] = value
+
+    if "timezone" in values:
+        try:
+            ZoneInfo(values["timezone"])
+        except (ZoneInfoNotFoundError, ValueError):
+            raise RecordError(f"Unknown timezone {values['timezone']!r}.")
+
+    department = _text(record, "department")
+    if department is not None:
+        if department not in departments:
+            raise RecordError(f"Unknown department code {department!r}.")
+        values["department_id"] = departments[department]
+
+    role = _text(record, "role")
+    if role is not None:
+        if role not in roles:
+            raise RecordError(f"Unknown role {role!r}.")
+        values["role_id"] = roles[role]
+
+    pay_type = _text(record, "pay_type")
+    if pay_type is not None:
+        pay_type = pay_type.upper()
+        if pay_type not in _PAY_TYPES:
+            raise RecordError(f"Invalid pay_type {pay_type!r}.")
+        values["pay_type"] = pay_type
+
+    pay_rate = _text(record, "pay_rate")
+    if pay_rate is not None:
+        try:
+            values["pay_rate"] = Decimal(pay_rate).quantize(Decimal("0.01"))
+        except InvalidOperation:
+            raise RecordError(f"Invalid pay_rate {pay_rate!r}.")
+
+    status = _text(record, "employment_status")
+    if status is not None:
+        status = status.upper()
+        if status not in _STATUSES:
+            raise RecordError(f"Invalid employment_status {status!r}.")
+        values["employment_status"] = status
+        values["is_active"] = status != TERMINATED
+
+    for field in ("hire_date", "termination_date"):
+        value = _text(record, field)
+        if value is not None:
+            try:
+                values[field] = date.fromisoformat(value)
+            except ValueError:
+                raise RecordError(f"Invalid {field} {value!r}. Use YYYY-MM-DD.")
+
+    if values.get("employment_status") == TERMINATED and "termination_date" not in values:
+        values["termination_date"] = timezone.localdate()
+
+    return values
+
+
+def _apply_chunk(
+    chunk, departments, roles, password, seen: set[str], claimed: set[str], report: ImportReport
+) -> None:
+    started = time.monotonic()
+    now = timezone.now()
+
+    codes = {_text(record, "employee_code") for _, record in chunk if isinstance(record, dict)} - {None}
+    existing = {
+        employee.employee_code: employee
+        for employee in Employee.objects.filter(employee_code__in=codes).only("pk", "employee_code", *IMPORT_FIELDS)
+    }
+
+    to_create: list[Employee] = []
+    to_update: list[Employee] = []
+    pay_changed_ids: set[int] = set()
+    # Usernames this chunk gives to new or existing employees.
+    usernames: dict[str, tuple[int, Employee]] = {}
+
+    for row, record in chunk:
+        if isinstance(record, RecordError):
+            report.unreadable += 1
+            report.error(row, None, str(record))
+            continue
+
+        code = _text(record, "employee_code")
+        if code is None:
+            report.error(row, None, "employee_code is required.")
+            continue
+        if code in seen:
+            report.error(row, code, "Duplicate employee_code in file.")
+            continue
+        seen.add(code)
+
+        try:
+            values = _parse(record, departments, roles)
+        except RecordError as exc:
+            report.error(row, code, str(exc))
+            continue
+
+        employee = existing.get(code)
+        if employee is None:
+            values.setdefault("username", code)
+        username = values.get("username")
+        if employee is not None and username == employee.username:
+            username = None
+        if username is not None and (username in usernames or username in claimed):
+            report.error(row, code, f"Duplicate username {username!r} in file.")
+            continue
+
+        if employee is None:
+            employee = Employee(employee_code=code, password=password, **values)
+            usernames[username] = (row, employee)
+            to_create.append(employee)
+            continue
+
+        changed = [f for f in IMPORT_FIELDS if f in values and getattr(employee, f) != values[f]]
+        if not changed:
+            report.unchanged += 1
+            continue
+        for field in changed:
+            setattr(employee, field, values[field])
+        if any(field in PAY_FIELDS for field in changed):
+            pay_changed_ids.add(employee.pk)
+        employee.updated_at = now
+        to_update.append(employee)
+        if username is not None:
+            usernames[username] = (row, employee)
+
+    # New and changed usernames must not collide with other accounts.
+    for username in Employee.objects.filter(username__in=usernames).values_list("username", flat=True):
+        row, employee = usernames.pop(username)
+        report.error(row, employee.employee_code, f"Username {username!r} is already in use.")
+        if employee.pk is None:
+            to_create.remove(employee)
+        else:
+            to_update.remove(employee)
+            pay_changed_ids.discard(employee.pk)
+    claimed.update(usernames)
+
+    if not report.dry_run:
+        with transaction.atomic():
+            Employee.objects.bulk_create(to_create, batch_size=DEFAULT_CHUNK_SIZE)
+            Employee.objects.bulk_update(
+                to_update, IMPORT_FIELDS + ["updated_at"], batch_size=DEFAULT_CHUNK_SIZE
+            )
+            if pay_changed_ids:
+                transaction.on_commit(
+                    lambda: pay_changed.send(sender=Employee, employee_ids=pay_changed_ids)
+                )
+
+    report.created += len(to_create)
+    report.updated += len(to_update)
+    report.chunks.append({
+        "rows": len(chunk),
+        "created": len(to_create),
+        "updated": len(to_update),
+        "seconds": round(time.monotonic() - started, 3),
+    })
+
+
+def _terminate_missing(seen: set[str], report: ImportReport) -> None:
+    """
+    Terminate non-staff employees whose codes were not in the import.
+    """
+    missing = [
+        pk
+        for pk, code in Employee.objects
+        .filter(is_staff=False)
+        .exclude(employment_status=TERMINATED)
+        .values_list("pk", "employee_code")
+        if code not in seen
+    ]
+    report.terminated = len(missing)
+    if report.dry_run or not missing:
+        return
+
+    now = timezone.now()
+    for i in range(0, len(missing), DEFAULT_CHUNK_SIZE):
+        Employee.objects.filter(pk__in=missing[i:i + DEFAULT_CHUNK_SIZE]).update(
+            employment_status=TERMINATED,
+            termination_date=timezone.localdate(),
+            is_active=False,
+            updated_at=now,
+        )
+
+
+def import_employees(
+    records: Iterable,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+    terminate_missing: bool = False,
+) -> ImportReport:
+    """
+    Create or update employees from HRIS records, ``chunk_size`` records
+    per transaction.
+
+    With ``terminate_missing``, active non-staff employees absent from the
+    records are marked TERMINATED (use only with a full export), unless
+    some records could not be read. With ``dry_run`` nothing is written;
+    the report shows what would change.
+    """
+    started = time.monotonic()
+    report = ImportReport(dry_run=dry_run)
+
+    departments = dict(Department.objects.values_list("code", "id"))
+    roles = dict(Role.objects.values_list("name", "id"))
+    password = make_password(None)
+    seen: set[str] = set()
+    claimed: set[str] = set()
+
+    for chunk in _chunks(records, chunk_size):
+        report.rows += len(chunk)
+        _apply_chunk(chunk, departments, roles, password, seen, claimed, report)
+
+    if terminate_missing:
+        if report.unreadable:
+            # Their employee codes are unknown; they would be terminated.
+            report.error(
+                None, None, f"Missing employees not terminated: {report.unreadable} records could not be read."
+            )
+        else:
+            _terminate_missing(seen, report)
+
+    report.seconds = time.monotonic() - started
+    return report
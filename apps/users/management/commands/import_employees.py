@@ -0,0 +1,66 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.importer import DEFAULT_CHUNK_SIZE, format_for, import_employees, read_records
+
+
+class Command(BaseCommand):
+    help = "Create or update employees from an HRIS CSV or JSON Lines export."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with header row) or .jsonl file.")
+        parser.add_argument(
+            "--format",
+            choices=["csv", "jsonl"],
+            help="File format. Defaults to the file extension.",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help="Records applied per transaction.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report what would change without writing.",
+        )
+        parser.add_argument(
+            "--terminate-missing",
+            action="store_true",
+            help="Terminate active non-staff employees not in the file (full exports only).",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        fmt = options["format"] or format_for(path)
+
+        try:
+            with open(path, newline="", encoding="utf-8-sig") as stream:
+                report = import_employees(
+                    read_records(stream, fmt),
+                    chunk_size=options["chunk_size"],
+                    dry_run=options["dry_run"],
+                    terminate_missing=options["terminate_missing"],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc))
+        except ValueError as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
+
+        for number, chunk in enumerate(report.chunks, start=1):
+            self.stdout.write(
+                f"Chunk {number}: {chunk['rows']} rows, {chunk['created']} created, "
+                f"{chunk['updated']} updated in {chunk['seconds']:.3f}s"
+            )
+        for error in report.errors:
+            if error["row"] is None:
+                self.stderr.write(error["error"])
+            else:
+                self.stderr.write(f"Row {error['row']} ({error['employee_code']}): {error['error']}")
+
+        prefix = "Dry run: would have " if report.dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}created {report.created}, updated {report.updated}, "
+            f"terminated {report.terminated}; {report.unchanged} unchanged, "
+            f"{len(report.errors)} errors, {report.rows} rows in {report.seconds:.2f}s"
+        ))
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.3 on 2026-10-18 18:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_alter_employee_pay_rate_alter_employee_pay_type'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='max_session_duration',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='role',
+            name='max_session_duration',
+            field=models.DurationField(blank=True, null=True),
+        ),
+    ]
@@ -7,6 +7,10 @@ class Department(models.Model):
     code = models.CharField(max_length=20, unique=True)
     is_active = models.BooleanField(default=True)
 
+    # Open sessions older than this are closed automatically; blank falls
+    # back to settings.ATTENDANCE_MAX_SESSION_DURATION.
+    max_session_duration = models.DurationField(null=True, blank=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -19,6 +23,8 @@ class Role(models.Model):
     description = models.TextField(blank=True)
     is_active = models.BooleanField(default=True)
 
+    max_session_duration = models.DurationField(null=True, blank=True)
+
     def __str__(self):
         return self.name
 
@@ -4,13 +4,13 @@ from .models import Department, Role, Employee
 class DepartmentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Department
-        fields = ['id', 'name', 'code', 'is_active']
+        fields = ['id', 'name', 'code', 'is_active', 'max_session_duration']
 
 
 class RoleSerializer(serializers.ModelSerializer):
     class Meta:
         model = Role
-        fields = ['id', 'name', 'description', 'is_active']
+        fields = ['id', 'name', 'description', 'is_active', 'max_session_duration']
 
 
 class EmployeeSerializer(serializers.ModelSerializer):
@@ -0,0 +1,53 @@
+from django.db.models.signals import post_init, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .models import Employee
+
+PAY_FIELDS = ("pay_type", "pay_rate")
+
+# Sent when employees' pay_type or pay_rate changed. Receivers get
+# ``employee_ids``, a set of Employee primary keys. Bulk writers (e.g. the
+# HRIS importer) send it themselves.
+pay_changed = Signal()
+
+
+def _touches_pay(update_fields) -> bool:
+    return update_fields is None or any(field in update_fields for field in PAY_FIELDS)
+
+
+def _loaded_pay(instance):
+    """Pay fields as held by the instance, or None if any is deferred."""
+    values = instance.__dict__
+    if any(field not in values for field in PAY_FIELDS):
+        return None
+    return tuple(values[field] for field in PAY_FIELDS)
+
+
+@receiver(post_init, sender=Employee)
+def remember_loaded_pay(sender, instance, **kwargs):
+    # Kept from load time so saving does not have to read the row back.
+    instance._loaded_pay = _loaded_pay(instance)
+
+
+@receiver(pre_save, sender=Employee)
+def remember_previous_pay(sender, instance, update_fields=None, raw=False, **kwargs):
+    instance._previous_pay = None
+    if raw or instance._state.adding or instance.pk is None or not _touches_pay(update_fields):
+        return
+    instance._previous_pay = getattr(instance, "_loaded_pay", None)
+    if instance._previous_pay is None:
+        # Loaded with the pay fields deferred.
+        instance._previous_pay = (
+            Employee.objects.filter(pk=instance.pk).values_list(*PAY_FIELDS).first()
+        )
+
+
+@receiver(post_save, sender=Employee)
+def send_pay_changed(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    previous = getattr(instance, "_previous_pay", None)
+    if _touches_pay(update_fields):
+        instance._loaded_pay = _loaded_pay(instance)
+    if raw or created or previous is None:
+        return
+    if previous != tuple(getattr(instance, field) for field in PAY_FIELDS):
+        pay_changed.send(sender=Employee, employee_ids={instance.pk})
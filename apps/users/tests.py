@@ -0,0 +1,113 @@
+import io
+
+from django.test import TestCase
+
+from .importer import import_employees, read_records
+from .models import Department, Employee
+
+
+def make_employee(code, **fields):
+    return Employee.objects.create(username=code, employee_code=code, **fields)
+
+
+class ImportTests(TestCase):
+
+    def setUp(self):
+        self.department = Department.objects.create(name="Assembly", code="ASM")
+
+    def errors(self, report):
+        return [(error["row"], error["employee_code"], error["error"]) for error in report.errors]
+
+    def test_creates_and_updates_employees(self):
+        make_employee("E1", first_name="Ann")
+        make_employee("E2", first_name="Bo")
+
+        report = import_employees(
+            read_records(io.StringIO(
+                "employee_code,first_name,department,pay_rate\n"
+                "E1,Anna,ASM,21.5\n"
+                "E2,Bo,,\n"
+                "E3,Cy,ASM,18\n"
+            ), "csv"),
+            chunk_size=2,
+        )
+
+        self.assertEqual((report.created, report.updated, report.unchanged), (1, 1, 1))
+        self.assertEqual(report.errors, [])
+        first = Employee.objects.get(employee_code="E1")
+        self.assertEqual((first.first_name, first.department, str(first.pay_rate)), ("Anna", self.department, "21.50"))
+        self.assertEqual(Employee.objects.get(employee_code="E3").username, "E3")
+
+    def test_dry_run_writes_nothing(self):
+        report = import_employees([{"employee_code": "E1"}], dry_run=True)
+
+        self.assertEqual(report.created, 1)
+        self.assertFalse(Employee.objects.exists())
+
+    def test_invalid_values_are_reported_per_row(self):
+        report = import_employees([
+            {"employee_code": "E1", "timezone": "Mars/Olympus"},
+            {"employee_code": "E2", "department": "NOPE"},
+            {"employee_code": "E3", "timezone": "Europe/Paris"},
+        ])
+
+        self.assertEqual(self.errors(report), [
+            (1, "E1", "Unknown timezone 'Mars/Olympus'."),
+            (2, "E2", "Unknown department code 'NOPE'."),
+        ])
+        self.assertEqual(list(Employee.objects.values_list("employee_code", "timezone")), [("E3", "Europe/Paris")])
+
+    def test_usernames_stay_unique(self):
+        make_employee("E1")
+        make_employee("E2")
+
+        report = import_employees(
+            [
+                # Existing account renamed onto another account's username.
+                {"employee_code": "E1", "username": "E2"},
+                {"employee_code": "E3", "username": "carol"},
+                # Same username as an earlier row, in a later chunk.
+                {"employee_code": "E4", "username": "carol"},
+                {"employee_code": "E2", "username": "carol"},
+                {"employee_code": "E5", "username": "E1"},
+            ],
+            chunk_size=2,
+        )
+
+        self.assertEqual(self.errors(report), [
+            (1, "E1", "Username 'E2' is already in use."),
+            (3, "E4", "Duplicate username 'carol' in file."),
+            (4, "E2", "Duplicate username 'carol' in file."),
+            (5, "E5", "Username 'E1' is already in use."),
+        ])
+        self.assertEqual(
+            dict(Employee.objects.values_list("employee_code", "username")),
+            {"E1": "E1", "E2": "E2", "E3": "carol"},
+        )
+
+    def test_unreadable_records_block_terminations(self):
+        make_employee("E1")
+        make_employee("E2")
+
+        report = import_employees(
+            read_records(io.StringIO('{"employee_code": "E1"}\n{not json\n'), "jsonl"),
+            terminate_missing=True,
+        )
+
+        self.assertEqual(report.unreadable, 1)
+        self.assertEqual(report.errors[0]["row"], 2)
+        self.assertEqual(report.terminated, 0)
+        self.assertTrue(Employee.objects.get(employee_code="E2").is_active)
+
+    def test_missing_employees_are_terminated(self):
+        make_employee("E1")
+        make_employee("E2")
+        make_employee("ADMIN", is_staff=True)
+
+        report = import_employees([{"employee_code": "E1"}], terminate_missing=True)
+
+        self.assertEqual(report.terminated, 1)
+        self.assertEqual(
+            list(Employee.objects.filter(is_active=False).values_list("employee_code", "employment_status")),
+            [("E2", "TERMINATED")],
+        )
@@ -1,7 +1,12 @@
-from rest_framework import viewsets
+import io
+
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 
+from .importer import format_for, import_employees, read_records
 from .models import Department, Role, Employee
 from .serializers import DepartmentSerializer, RoleSerializer, EmployeeSerializer
 
@@ -46,8 +51,8 @@ class EmployeeViewSet(viewsets.ModelViewSet):
     serializer_class = EmployeeSerializer
 
     def get_permissions(self):
-        # Only admins can create or delete employees
-        if self.action in ["create", "destroy"]:
+        # Only admins can create, import or delete employees
+        if self.action in ["create", "destroy", "import_employees"]:
             return [IsAdminUser()]
         # Authenticated users can list/retrieve/update within their queryset
         return [IsAuthenticated()]
@@ -57,3 +62,37 @@ class EmployeeViewSet(viewsets.ModelViewSet):
         if user.is_staff:
             return Employee.objects.all()
         return Employee.objects.filter(id=user.id)
+
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser])
+    def import_employees(self, request):
+        """
+        Admin-only: create or update employees from an HRIS export.
+
+        Multipart body: ``file`` (CSV with header row, or .jsonl), and
+        optional ``dry_run`` and ``terminate_missing`` ("true"/"false").
+        Returns the import report.
+        """
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response(
+                {"detail": "Upload the export as 'file'."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        def flag(name):
+            return str(request.data.get(name, "")).lower() in ("1", "true", "yes")
+
+        stream = io.TextIOWrapper(upload.file, encoding="utf-8-sig", newline="")
+        try:
+            report = import_employees(
+                read_records(stream, format_for(upload.name)),
+                dry_run=flag("dry_run"),
+                terminate_missing=flag("terminate_missing"),
+            )
+        except ValueError as exc:
+            return Response(
+                {"detail": f"Could not read file: {exc}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return Response(report.as_dict())
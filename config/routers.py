@@ -0,0 +1,145 @@
+"""
+Read-replica routing.
+
+Reads go to the primary ("default") unless the current request has opted
+in through ReplicaReadMixin. Opted-in GET/HEAD/OPTIONS requests read from
+one of ``settings.DATABASE_REPLICAS``, except:
+
+- for a client that made a write request within the last
+  ``REPLICA_STICKY_SECONDS`` (so it sees its own write despite
+  replication lag);
+- when every replica failed its last connection check; a failed replica
+  is retried after ``REPLICA_RETRY_SECONDS``.
+
+Writes and migrations always use the primary.
+
+The sticky window is a cookie set by ReplicaStickyMiddleware on the
+response to a successful write, so whichever worker serves the next
+request sees it without a lookup. Clients that drop cookies, and events
+replayed for an employee by someone else (kiosk batches), are not
+pinned. Database cache entries are always read from the primary, so they
+never lag.
+"""
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import OperationalError
+from rest_framework.permissions import SAFE_METHODS
+
+DEFAULT_STICKY_SECONDS = 10
+DEFAULT_RETRY_SECONDS = 30
+
+# Cookie marking a client whose reads stay on the primary.
+STICKY_COOKIE = "replica_sticky"
+
+# app_label of django.core.cache.backends.db.DatabaseCache entries.
+CACHE_APP_LABEL = "django_cache"
+
+# Alias reads are routed to in the current context.
+_read_db: ContextVar[str] = ContextVar("read_db", default=DEFAULT_DB_ALIAS)
+
+_down_until: dict[str, float] = {}
+_down_lock = threading.Lock()
+
+
+def replicas() -> list[str]:
+    return list(getattr(settings, "DATABASE_REPLICAS", []))
+
+
+def is_stuck_to_primary(request) -> bool:
+    """Whether the client made a write request within the sticky window."""
+    return STICKY_COOKIE in request.COOKIES
+
+
+def _available(alias: str) -> bool:
+    now = time.monotonic()
+    with _down_lock:
+        if _down_until.get(alias, 0) > now:
+            return False
+
+    try:
+        connections[alias].ensure_connection()
+    except OperationalError:
+        retry = getattr(settings, "REPLICA_RETRY_SECONDS", DEFAULT_RETRY_SECONDS)
+        with _down_lock:
+            _down_until[alias] = now + retry
+        return False
+    return True
+
+
+def choose_replica() -> str:
+    """
+    A random available replica, or the primary if none is available.
+    """
+    candidates = replicas()
+    random.shuffle(candidates)
+    for alias in candidates:
+        if _available(alias):
+            return alias
+    return DEFAULT_DB_ALIAS
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return DEFAULT_DB_ALIAS
+        return _read_db.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replicas()
+
+
+class ReplicaReadMixin:
+    """
+    APIView mixin: serve safe-method requests from a read replica.
+
+    One replica is chosen per request. ``self.read_db`` holds it, for
+    querysets evaluated after the view returns (e.g. streamed responses).
+    """
+    read_db = DEFAULT_DB_ALIAS
+
+    def dispatch(self, request, *args, **kwargs):
+        token = _read_db.set(DEFAULT_DB_ALIAS)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            _read_db.reset(token)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS and not is_stuck_to_primary(request):
+            self.read_db = choose_replica()
+            _read_db.set(self.read_db)
+
+
+class ReplicaStickyMiddleware:
+    """
+    Keep a client's reads on the primary for ``REPLICA_STICKY_SECONDS``
+    after a successful write request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        seconds = getattr(settings, "REPLICA_STICKY_SECONDS", DEFAULT_STICKY_SECONDS)
+        if (
+            replicas()
+            and seconds > 0
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            response.set_cookie(STICKY_COOKIE, "1", max_age=seconds, httponly=True, samesite="Lax")
+        return response
@@ -1,6 +1,8 @@
+from datetime import timedelta
 from pathlib import Path
 import os
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -26,9 +28,12 @@ INSTALLED_APPS = [
     "apps.attendance",
     "apps.tracker",
     "apps.overtime",
+    "apps.benchmarks",
+    "apps.monitoring",
 ]
 
 MIDDLEWARE = [
+    "apps.monitoring.middleware.RequestMetricsMiddleware",
     'corsheaders.middleware.CorsMiddleware',
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -37,6 +42,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "config.routers.ReplicaStickyMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
@@ -58,6 +64,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "config.wsgi.application"
+ASGI_APPLICATION = "config.asgi.application"
 
 DATABASES = {
     "default": {
@@ -67,9 +74,49 @@ DATABASES = {
         "PASSWORD": os.environ.get("POSTGRES_PASSWORD", "optitrack_password"),
         "HOST": os.environ.get("POSTGRES_HOST", "localhost"),
         "PORT": os.environ.get("POSTGRES_PORT", "5432"),
+        # Seconds a connection is kept open across requests (0 closes it
+        # after every request, None keeps it forever).
+        "CONN_MAX_AGE": int(os.environ.get("DB_CONN_MAX_AGE", "60")),
+        # Check a persistent connection is still usable before reusing it.
+        "CONN_HEALTH_CHECKS": os.environ.get("DB_CONN_HEALTH_CHECKS", "True") == "True",
     }
 }
 
+# Optional connection pool (psycopg 3 only). Pooled connections are
+# returned to the pool at the end of each request, so CONN_MAX_AGE must
+# be 0.
+if os.environ.get("DB_POOL", "False") == "True":
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        raise ImproperlyConfigured(
+            "DB_POOL=True requires psycopg 3 with the pool extra: pip install 'psycopg[binary,pool]'."
+        )
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.environ.get("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.environ.get("DB_POOL_MAX_SIZE", "10")),
+            # Seconds a request waits for a free connection before failing.
+            "timeout": float(os.environ.get("DB_POOL_TIMEOUT", "10")),
+        }
+    }
+
+# Read replicas (see config/routers.py): comma-separated hosts sharing the
+# primary's credentials, e.g. DB_REPLICA_HOSTS=replica1.internal,replica2.internal
+DATABASE_REPLICAS = []
+for _index, _host in enumerate(h.strip() for h in os.environ.get("DB_REPLICA_HOSTS", "").split(",") if h.strip()):
+    _alias = f"replica{_index + 1}"
+    DATABASES[_alias] = {**DATABASES["default"], "HOST": _host, "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ["config.routers.ReplicaRouter"]
+
+# Seconds a client's reads stay on the primary after a write request.
+REPLICA_STICKY_SECONDS = int(os.environ.get("REPLICA_STICKY_SECONDS", "10"))
+# Seconds before a replica that failed to connect is tried again.
+REPLICA_RETRY_SECONDS = int(os.environ.get("REPLICA_RETRY_SECONDS", "30"))
+
 AUTH_USER_MODEL = "users.Employee"
 
 LANGUAGE_CODE = "en-gb"
@@ -110,8 +157,99 @@ REST_FRAMEWORK = {
     ],
 }
 
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "simple": {"format": "%(asctime)s %(levelname)s %(name)s %(message)s"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "simple"},
+    },
+    "loggers": {
+        "apps": {
+            "handlers": ["console"],
+            "level": os.environ.get("DJANGO_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
+# Request instrumentation (apps.monitoring)
+MONITORING = {
+    "SAMPLE_RATE": float(os.environ.get("MONITORING_SAMPLE_RATE", "1.0")),
+    "NPLUSONE_THRESHOLD": int(os.environ.get("MONITORING_NPLUSONE_THRESHOLD", "10")),
+    "SLOW_REQUEST_MS": int(os.environ.get("MONITORING_SLOW_REQUEST_MS", "1000")),
+}
+
+# Open sessions are auto-closed after this long (manage.py
+# close_stale_sessions) unless the employee's department or role sets
+# max_session_duration; if both do, the shorter one applies.
+ATTENDANCE_MAX_SESSION_DURATION = timedelta(
+    hours=float(os.environ.get("ATTENDANCE_MAX_SESSION_HOURS", "16"))
+)
+
+# Closed sessions older than this many whole months are moved to
+# WorkSessionArchive by manage.py archive_work_sessions.
+ATTENDANCE_HOT_MONTHS = int(os.environ.get("ATTENDANCE_HOT_MONTHS", "13"))
+
+# Directory where manage.py build_hours_matrix writes employee x day hours
+# matrices for worker processes to map (apps.attendance.matrix). Empty:
+# every process builds its own.
+ATTENDANCE_MATRIX_DIR = os.environ.get("ATTENDANCE_MATRIX_DIR", "")
+
+# Session anomaly scan (manage.py scan_attendance_anomalies)
+ATTENDANCE_ANOMALIES = {
+    "CHUNK_SIZE": int(os.environ.get("ATTENDANCE_ANOMALY_CHUNK_SIZE", "2000")),
+    "LAG_SECONDS": int(os.environ.get("ATTENDANCE_ANOMALY_LAG_SECONDS", "300")),
+    "LONG_SESSION_HOURS": float(os.environ.get("ATTENDANCE_ANOMALY_LONG_SESSION_HOURS", "20")),
+}
+
+# Live occupancy board used by the tracker dashboard endpoints
+TRACKER_OCCUPANCY_CACHE = {
+    "BACKEND": "apps.tracker.occupancy.LocalMemoryBackend",
+    "TTL": int(os.environ.get("TRACKER_OCCUPANCY_TTL", "30")),
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    },
+    # Personal summaries (apps.tracker.summary_cache). Shared by all workers
+    # so an invalidation on clock-in/out reaches every one of them; a
+    # per-process cache (LocMem) would keep serving stale summaries. The
+    # database cache (table created by the tracker migrations) costs each
+    # request, 304s included, one primary-key read on the primary; point
+    # SUMMARY_CACHE_BACKEND at django.core.cache.backends.redis.RedisCache
+    # (or memcached) to avoid it. Past MAX_ENTRIES the database cache culls
+    # entries in key order, not least recently used first.
+    "summaries": {
+        "BACKEND": os.environ.get("SUMMARY_CACHE_BACKEND", "django.core.cache.backends.db.DatabaseCache"),
+        "LOCATION": os.environ.get("SUMMARY_CACHE_LOCATION", "optitrack_summary_cache"),
+        "TIMEOUT": int(os.environ.get("SUMMARY_CACHE_TTL", "300")),
+        "OPTIONS": {"MAX_ENTRIES": int(os.environ.get("SUMMARY_CACHE_MAX_ENTRIES", "10000"))},
+    },
+}
+TRACKER_SUMMARY_CACHE_ALIAS = "summaries"
+
+# Seconds without a heartbeat after which a RUNNING overtime recalculation
+# job is considered abandoned and claimed again. Must exceed the time one
+# batch of employees takes.
+OVERTIME_JOB_LEASE_SECONDS = int(os.environ.get("OVERTIME_JOB_LEASE_SECONDS", "900"))
+
+# What-if overtime simulation (apps.overtime.simulation)
+OVERTIME_SIMULATION = {
+    "CACHE_SECONDS": int(os.environ.get("OVERTIME_SIMULATION_CACHE_SECONDS", "300")),
+    "CACHE_PERIODS": int(os.environ.get("OVERTIME_SIMULATION_CACHE_PERIODS", "4")),
+}
+
+# Server-Sent Events stream of clock-in/clock-out deltas
+TRACKER_EVENT_STREAM = {
+    "QUEUE_SIZE": int(os.environ.get("TRACKER_STREAM_QUEUE_SIZE", "100")),
+    "HEARTBEAT": int(os.environ.get("TRACKER_STREAM_HEARTBEAT", "15")),
+}
+
 # Optional: Customize token lifetime
-from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
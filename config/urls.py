@@ -15,5 +15,6 @@ urlpatterns = [
     path('api/v1/attendance/', include('apps.attendance.urls')),
     path('api/v1/tracker/', include('apps.tracker.urls')),
     path("api/v1/overtime/", include("apps.overtime.urls")),
+    path("api/v1/monitoring/", include("apps.monitoring.urls")),
 ]
 